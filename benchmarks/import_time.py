@@ -0,0 +1,70 @@
+# benchmarks/import_time.py
+"""
+Checks the cold-start import cost of the headless entry points.
+
+Runs 'python -X importtime -c "import <module>"' in a fresh interpreter,
+takes the best of several runs and fails (exit status 1) if the module's
+cumulative import time exceeds the budget or if it pulls in a GUI/array
+dependency. Run from the project root:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget-ms 30 --repeat 10
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Headless modules and the packages they must never import
+CHECKED_MODULES = ["src.cli", "src.core"]
+FORBIDDEN_PREFIXES = ("PySide6", "numpy", "shiboken6")
+
+
+def measure(module):
+    """
+    Imports module in a fresh interpreter with -X importtime.
+
+    Returns:
+        tuple: (cumulative microseconds for module, set of imported module names)
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    cumulative = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self_us, cumulative_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        if not cumulative_us.isdigit():
+            continue # Header line
+        imported.add(name)
+        if name == module:
+            cumulative = int(cumulative_us)
+    return cumulative, imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time budget check for the headless modules.")
+    parser.add_argument("--budget-ms", type=float, default=50.0,
+                        help="maximum cumulative import time per module (default 50 ms)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per module, best is reported (default 5)")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in CHECKED_MODULES:
+        runs = [measure(module) for _ in range(max(args.repeat, 1))]
+        best_us = min(cumulative for cumulative, _imported in runs)
+        forbidden = sorted(name for name in runs[0][1] if name.startswith(FORBIDDEN_PREFIXES))
+        ok = best_us / 1000.0 <= args.budget_ms and not forbidden
+        failed |= not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {module}: {best_us / 1000.0:.1f} ms (budget {args.budget_ms:.0f} ms)")
+        if forbidden:
+            print(f"     imports {', '.join(forbidden)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# benchmarks/plot.py
+"""
+Offscreen cost of the history graphs (src/plot_widget.py) with a full day of
+history: 8 GPUs x every history metric x 24 h of 1 s samples, so the 5 min
+window reads the raw tier and the 1 h and 24 h windows read rollup tiers.
+
+Benchmarks (one set per time window):
+    rebuild_<window>   new data arrived: query, decimate and render (what a tick costs)
+    cached_<window>    repaint without new data (expose, overlapping windows)
+
+Every plot draws all history metrics for all GPUs, far more series than a
+tab of the main window, so the numbers are an upper bound per visible graph.
+Needs PySide6 and NumPy; run from the project root:
+
+    python benchmarks/plot.py
+    python benchmarks/plot.py --width 1920 --output plot.json
+    python benchmarks/plot.py --compare plot.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.sampling import _git_revision, measure, print_results # noqa: E402
+
+WINDOWS = (("5min", 300), ("1h", 3600), ("24h", 86400))
+
+
+def fill_history(history, gpus, seconds, end):
+    """Appends seconds of 1 s samples ending at end: smooth load with sparse spikes."""
+    import numpy as np
+    rng = np.random.default_rng(1)
+    columns = len(history.metrics)
+    base = rng.uniform(30.0, 200.0, size=(gpus, columns))
+    phase = rng.uniform(0.0, 2.0 * np.pi, size=(gpus, columns))
+    values = np.empty((gpus, columns))
+    for second in range(seconds):
+        np.sin(phase + second / 600.0, out=values)
+        values *= 0.2
+        values += 1.0
+        values *= base
+        if second % 997 == 0:
+            values[:, 0] *= 1.5 # Short spikes that rollup means would flatten
+        history.append(end - seconds + second + 1, values)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offscreen rendering of the history graphs.")
+    parser.add_argument("--iterations", type=int, default=10, help="timed calls per benchmark (default 10)")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed calls first (default 3)")
+    parser.add_argument("--gpus", type=int, default=8, help="GPUs in the history (default 8)")
+    parser.add_argument("--hours", type=float, default=24.0, help="history filled in (default 24)")
+    parser.add_argument("--width", type=int, default=960, help="plot width in pixels (default 960)")
+    parser.add_argument("--height", type=int, default=240, help="plot height in pixels (default 240)")
+    parser.add_argument("--output", help="write results (with run metadata) to this JSON file")
+    parser.add_argument("--compare", help="earlier --output file; differences are shown in percent")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PySide6.QtWidgets import QApplication
+    except ImportError:
+        print("PySide6 is not installed.", file=sys.stderr)
+        return 1
+    from src.history import HISTORY_METRICS, HistoryStore
+    from src.plot_widget import MetricPlotWidget
+    app = QApplication.instance() or QApplication([]) # noqa: F841 (widgets need it)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+    history = HistoryStore(gpu_count=args.gpus)
+    end = time.time()
+    started = time.perf_counter()
+    fill_history(history, args.gpus, int(args.hours * 3600), end)
+    print(f"Filled {args.gpus} GPU(s) x {len(HISTORY_METRICS)} metrics x {args.hours:g} h "
+          f"in {time.perf_counter() - started:.1f} s ({history.nbytes / 1e6:.1f} MB)", file=sys.stderr)
+
+    widget = MetricPlotWidget(history, [(metric, metric) for metric in HISTORY_METRICS])
+    widget.notify_new_data(end)
+    results = {}
+    for name, seconds in WINDOWS:
+        widget.set_window_seconds(seconds)
+        clock = [end]
+
+        def new_data():
+            clock[0] += 1e-3 # A new sample time invalidates the cache, as on every collector round
+            widget.notify_new_data(clock[0])
+
+        render = lambda: widget.render_to_image(args.width, args.height)
+        results[f"rebuild_{name}"] = measure(render, args.iterations, args.warmup, setup=new_data)
+        results[f"cached_{name}"] = measure(render, args.iterations, args.warmup)
+
+    print_results(results, baseline)
+    if args.output:
+        report = {
+            "revision": _git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "config": {"gpus": args.gpus, "hours": args.hours, "width": args.width, "height": args.height},
+            "results": results,
+        }
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
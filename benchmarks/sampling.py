@@ -0,0 +1,319 @@
+# benchmarks/sampling.py
+"""
+Per-call cost of the sampling and overclocking query paths, measured against
+the stub tools from benchmarks/stubs.py (no GPU or root needed).
+
+Benchmarks:
+    dynamic_status     core.get_gpu_dynamic_status() (one nvidia-smi run per call)
+    parse_status       core.parse_dynamic_status_output() on pre-captured output
+    vram_temperature   core.get_vram_temperature() (one-shot sudo + gddr6_helper)
+    vram_sysfs         core.SysfsVramReader.read() on a fake sysfs tree (batches of 1000)
+    oc_info_cold       overclocking.get_gpu_overclock_info() with an empty cache
+    oc_info_warm       overclocking.get_gpu_overclock_info() with a filled cache
+    gui_tick           one collector round plus MainWindow.update_dynamic_status()
+                       and the resulting repaint, offscreen (needs PySide6)
+
+Each benchmark reports wall-clock latency percentiles, CPU time per call in
+this process and in reaped child processes, and Python allocations per call
+(tracemalloc, measured in a separate pass so tracing does not skew timings).
+The stubs are Python scripts, so every spawn also pays an interpreter start on
+top of the configured latency: compare results from the same machine only.
+Run from the project root:
+
+    python benchmarks/sampling.py --output bench.json
+    python benchmarks/sampling.py --gpus 4 --latency-ms nvidia-smi=80 --compare bench.json
+    python benchmarks/sampling.py --only gui_tick --iterations 200
+    python benchmarks/sampling.py --only gui_tick --simulate 64,seed=1   # scaling, simulated GPUs
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.stubs import install_stubs # noqa: E402
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(int(round(percent / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def measure(function, iterations, warmup=3, setup=None, alloc_iterations=None):
+    """
+    Calls function repeatedly and summarizes its cost.
+
+    Args:
+        function (callable): Code under test, called without arguments.
+        iterations (int): Timed calls.
+        warmup (int): Untimed calls first (caches, lazy imports, first spawn).
+        setup (callable): Called before every call, outside the measurement.
+        alloc_iterations (int): Calls traced for allocations (default: iterations, at most 50).
+
+    Returns:
+        dict: Milliseconds (latency percentiles, mean, max, CPU per call) and
+              bytes (allocation peak / retained per call).
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        function()
+
+    wall, cpu, child_cpu = [], [], []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        children_before = os.times()
+        cpu_before = time.process_time()
+        started = time.perf_counter()
+        function()
+        wall.append(time.perf_counter() - started)
+        cpu.append(time.process_time() - cpu_before)
+        children_after = os.times()
+        child_cpu.append((children_after.children_user - children_before.children_user)
+                         + (children_after.children_system - children_before.children_system))
+
+    # Allocation pass: peak and retained traced memory per call
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_iterations or min(iterations, 50)):
+            if setup:
+                setup()
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            function()
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+
+    wall.sort()
+    result = {"iterations": iterations}
+    for percent in PERCENTILES:
+        result[f"p{percent}_ms"] = round(percentile(wall, percent) * 1000.0, 3)
+    result["mean_ms"] = round(sum(wall) / len(wall) * 1000.0, 3)
+    result["max_ms"] = round(wall[-1] * 1000.0, 3)
+    result["cpu_ms_per_call"] = round(sum(cpu) / len(cpu) * 1000.0, 3)
+    result["child_cpu_ms_per_call"] = round(sum(child_cpu) / len(child_cpu) * 1000.0, 3)
+    result["alloc_peak_bytes"] = int(sorted(peaks)[len(peaks) // 2])
+    result["alloc_retained_bytes"] = int(sorted(retained)[len(retained) // 2])
+    return result
+
+
+# --- Benchmarks (each returns measure() results, or None if skipped) ---
+def bench_dynamic_status(args):
+    from src import core
+    return measure(lambda: core.get_gpu_dynamic_status(0), args.iterations, args.warmup)
+
+
+def bench_parse_status(args):
+    from src import core
+    output = subprocess.run(["nvidia-smi", f"--query-gpu={','.join(core.DYNAMIC_QUERY_ITEMS)}",
+                             "--format=csv,noheader,nounits"], capture_output=True, text=True, check=True).stdout
+    # Pure parsing is too fast to time per call on its own: time batches of 100
+    return measure(lambda: [core.parse_dynamic_status_output(output) for _ in range(100)],
+                   args.iterations, args.warmup)
+
+
+def bench_vram_temperature(args):
+    from src import core
+    return measure(core.get_vram_temperature, args.iterations, args.warmup)
+
+
+def bench_vram_sysfs(args):
+    import struct
+    from src import core
+    root = tempfile.mkdtemp(prefix="gpu_mon_sysfs_")
+    try:
+        device_id, (offset, _vram, _arch, _name) = next(iter(core.load_gddr6_devices().items()))
+        device_dir = os.path.join(root, "bus", "pci", "devices", "0000:01:00.0")
+        os.makedirs(device_dir)
+        with open(os.path.join(device_dir, "vendor"), "w") as vendor_file:
+            vendor_file.write(f"0x{core.NVIDIA_VENDOR_ID:04x}\n")
+        with open(os.path.join(device_dir, "device"), "w") as device_file:
+            device_file.write(f"0x{device_id:04x}\n")
+        bar = bytearray(offset + 4096)
+        struct.pack_into("<I", bar, offset, 60 * 0x20)
+        with open(os.path.join(device_dir, "resource0"), "wb") as bar_file:
+            bar_file.write(bar)
+        reader = core.SysfsVramReader(root)
+        try:
+            return measure(lambda: [reader.read() for _ in range(1000)], args.iterations, args.warmup)
+        finally:
+            reader.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_oc_info_cold(args):
+    from src import overclocking
+    return measure(lambda: overclocking.get_gpu_overclock_info(0), args.iterations, args.warmup,
+                   setup=overclocking.clear_overclock_info_cache)
+
+
+def bench_oc_info_warm(args):
+    from src import overclocking
+    overclocking.get_gpu_overclock_info(0) # Fills the cache
+    return measure(lambda: overclocking.get_gpu_overclock_info(0), args.iterations, args.warmup)
+
+
+def bench_gui_tick(args):
+    try:
+        from PySide6.QtWidgets import QApplication
+    except ImportError:
+        return None
+    from src.collector import SampleCollector
+    from src.main_window import MainWindow
+    app = QApplication.instance() or QApplication([])
+    window = MainWindow()
+    window.show()
+    app.processEvents()
+    # Drive sampling from here instead of the collector thread, one round per tick
+    window.collector.stop()
+    window.collector = SampleCollector(interval=1.0, history=window.history)
+
+    def tick():
+        snapshot = window.collector.collect_once()
+        window.update_dynamic_status(snapshot)
+        app.processEvents()
+
+    try:
+        return measure(tick, args.iterations, args.warmup)
+    finally:
+        window.collector.stop()
+        window.close()
+        app.processEvents()
+
+
+BENCHMARKS = {
+    "dynamic_status": bench_dynamic_status,
+    "parse_status": bench_parse_status,
+    "vram_temperature": bench_vram_temperature,
+    "vram_sysfs": bench_vram_sysfs,
+    "oc_info_cold": bench_oc_info_cold,
+    "oc_info_warm": bench_oc_info_warm,
+    "gui_tick": bench_gui_tick,
+}
+
+
+# --- Reporting ---
+def _git_revision():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=PROJECT_ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return revision + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    columns = ("p50_ms", "p90_ms", "p99_ms", "cpu_ms_per_call", "child_cpu_ms_per_call", "alloc_peak_bytes")
+    widths = [max(len(column), 16) + 2 for column in columns]
+    print(f"{'benchmark':<18}" + "".join(f"{column:>{width}}" for column, width in zip(columns, widths)))
+    for name, result in results.items():
+        if result is None:
+            print(f"{name:<18}  skipped")
+            continue
+        cells = []
+        for column, width in zip(columns, widths):
+            cell = f"{result[column]:g}"
+            previous = (baseline or {}).get(name) or {}
+            if previous.get(column):
+                cell += f" ({(result[column] - previous[column]) / previous[column] * 100.0:+.0f}%)"
+            cells.append(f"{cell:>{width}}")
+        print(f"{name:<18}" + "".join(cells))
+
+
+def _parse_latencies(items):
+    latencies = {}
+    for item in items:
+        tool, _, milliseconds = item.partition("=")
+        if not milliseconds:
+            raise argparse.ArgumentTypeError(f"expected TOOL=MS, got '{item}'")
+        latencies[tool] = float(milliseconds)
+    return latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the sampling and OC query paths against stub tools.")
+    parser.add_argument("--iterations", type=int, default=30, help="timed calls per benchmark (default 30)")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed calls first (default 3)")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS),
+                        help="run only this benchmark (repeatable)")
+    parser.add_argument("--gpus", type=int, default=1, help="GPUs reported by the stubs (default 1)")
+    parser.add_argument("--latency-ms", action="append", default=[], metavar="TOOL=MS",
+                        help="stub startup latency, e.g. nvidia-smi=80 (repeatable)")
+    parser.add_argument("--values", help="JSON file of nvidia-smi field -> value overrides for the stubs")
+    parser.add_argument("--output", help="write results (with run metadata) to this JSON file")
+    parser.add_argument("--compare", help="earlier --output file; differences are shown in percent")
+    parser.add_argument("--simulate", metavar="SPEC",
+                        help="read simulated GPUs (src/simulated.py) instead of the stub tools, e.g. '64,seed=1'")
+    args = parser.parse_args(argv)
+
+    values = None
+    if args.values:
+        with open(args.values) as values_file:
+            values = json.load(values_file)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+    stub_dir = tempfile.mkdtemp(prefix="gpu_mon_bench_")
+    try:
+        config = install_stubs(stub_dir, gpus=args.gpus, latency_ms=_parse_latencies(args.latency_ms), values=values)
+        # Must be in place before src is imported: core resolves the helper path at import
+        os.environ["PATH"] = stub_dir + os.pathsep + os.environ.get("PATH", "")
+        os.environ["GPU_MON_BACKEND"] = "smi" # NVML cannot be stubbed; one nvidia-smi run per sample
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        os.environ.setdefault("DISPLAY", ":0")
+        from src import core
+        core.HELPER_PATH = os.path.join(stub_dir, "gddr6_helper")
+        core.SYSFS_ROOT = stub_dir # No PCI devices there: vram_temperature measures the helper
+        # MainWindow (gui_tick) caches static info: keep the stubs' GPUs out of the user's real cache
+        from src import static_cache
+        static_cache.DEFAULT_PATH = os.path.join(stub_dir, "static_info.json")
+        if args.simulate:
+            from src import simulated
+            simulated.install(simulated.from_spec(args.simulate))
+
+        results = {}
+        for name in args.only or BENCHMARKS:
+            results[name] = BENCHMARKS[name](args)
+        core.shutdown()
+    finally:
+        shutil.rmtree(stub_dir, ignore_errors=True)
+
+    print_results(results, baseline)
+    if args.output:
+        report = {
+            "revision": _git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "stub_config": {"gpus": config["gpus"], "latency_ms": config["latency_ms"]},
+            "simulate": args.simulate,
+            "results": results,
+        }
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
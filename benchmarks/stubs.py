@@ -0,0 +1,171 @@
+# benchmarks/stubs.py
+"""
+Stand-ins for the external tools gpu_mon_qt runs: nvidia-smi, nvidia-settings,
+gddr6_helper and sudo. The stubs are small Python scripts written to a
+directory that is put first on PATH, so the application code under test runs
+unchanged (same commands, same parsing) without an Nvidia GPU or root.
+
+Latency and output are read from stub_config.json next to the scripts:
+
+    {
+      "gpus": 2,
+      "latency_ms": {"nvidia-smi": 30, "nvidia-settings": 80, "gddr6_helper": 5},
+      "values": {"fan.speed": "[N/A]"},
+      "offsets": {"GPUGraphicsClockOffset": [150, -1000, 1000]},
+      "vram_temperature": 72
+    }
+
+"values" overrides nvidia-smi fields; a field without a value prints '[N/A]'.
+"""
+import json
+import os
+import stat
+import sys
+
+# nvidia-smi --query-gpu field -> value ('{i}' is the GPU index)
+DEFAULT_SMI_VALUES = {
+    "index": "{i}",
+    "uuid": "GPU-{i:08x}-0000-0000-0000-bench0000000",
+    "gpu_name": "NVIDIA GeForce RTX 4090",
+    "name": "NVIDIA GeForce RTX 4090",
+    "memory.total": "24564",
+    "driver_version": "570.86.16",
+    "pcie.link.gen.max": "4",
+    "temperature.gpu": "{t}",
+    "utilization.gpu": "37",
+    "utilization.memory": "12",
+    "memory.free": "20000",
+    "memory.used": "4564",
+    "power.draw": "212.47",
+    "clocks.current.graphics": "2520",
+    "clocks.current.memory": "10501",
+    "fan.speed": "45",
+    "power.limit": "450.00",
+    "power.min_limit": "150.00",
+    "power.max_limit": "600.00",
+    "power.default_limit": "450.00",
+}
+# nvidia-settings attribute -> [current, min, max]
+DEFAULT_OFFSETS = {
+    "GPUGraphicsClockOffset": [100, -1000, 1000],
+    "GPUMemoryTransferRateOffset": [800, -2000, 6000],
+}
+DEFAULT_LATENCY_MS = {"nvidia-smi": 25, "nvidia-settings": 60, "gddr6_helper": 5}
+
+# Shared by every stub: loads the configuration and sleeps for the tool's latency
+_PRELUDE = '''import json, os, sys, time
+CONFIG = json.load(open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_config.json")))
+def startup(tool):
+    time.sleep(CONFIG["latency_ms"].get(tool, 0) / 1000.0)
+'''
+
+_NVIDIA_SMI = '''
+args = sys.argv[1:]
+startup("nvidia-smi")
+if "-pl" in args:
+    print(f"Power limit for GPU 00000000:01:00.0 was set to {args[args.index('-pl') + 1]} W from 450.00 W.")
+    sys.exit(0)
+query = next((a.split("=", 1)[1] for a in args if a.startswith("--query-gpu=")), "index")
+fields = query.split(",")
+gpus = range(CONFIG["gpus"])
+if "-i" in args:
+    gpus = [int(args[args.index("-i") + 1])]
+def sample():
+    for i in gpus:
+        values = [CONFIG["values"].get(f, "[N/A]").format(i=i, t=55 + i) for f in fields]
+        sys.stdout.write(", ".join(values) + "\\n")
+    sys.stdout.flush()
+if "-lms" in args:
+    interval = int(args[args.index("-lms") + 1]) / 1000.0
+    while True:
+        sample(); time.sleep(interval)
+sample()
+'''
+
+_NVIDIA_SETTINGS = '''
+import re
+args = sys.argv[1:]
+startup("nvidia-settings")
+terse = "-t" in args
+for option, value in zip(args, args[1:]):
+    if option == "-q":
+        match = re.match(r"\\[gpu:(\\d+)\\]/(\\w+)", value)
+        name = match.group(2)
+        current, low, high = CONFIG["offsets"][name]
+        if terse:
+            print(current)
+        else:
+            print(f"  Attribute '{name}' (bench:0[gpu:{match.group(1)}]): {current}.")
+            print(f"    The valid values for '{name}' are in the range {low} - {high} (inclusive).")
+            print(f"    '{name}' can use the following target types: GPU.\\n")
+    elif option == "-a":
+        print(f"  Attribute '{value}' assigned.")
+'''
+
+_GDDR6_HELPER = '''
+args = sys.argv[1:]
+startup("gddr6_helper")
+if "--interval-ms" in args:
+    interval = int(args[args.index("--interval-ms") + 1]) / 1000.0
+    while True:
+        print(CONFIG["vram_temperature"], flush=True); time.sleep(interval)
+print(CONFIG["vram_temperature"])
+'''
+
+# sudo: drops its own options and runs the command as the current user
+_SUDO = '''
+args = sys.argv[1:]
+while args and args[0].startswith("-"):
+    args.pop(0)
+os.execvp(args[0], args)
+'''
+
+STUBS = {
+    "nvidia-smi": _NVIDIA_SMI,
+    "nvidia-settings": _NVIDIA_SETTINGS,
+    "gddr6_helper": _GDDR6_HELPER,
+    "sudo": _SUDO,
+}
+
+
+def write_config(directory, gpus=1, latency_ms=None, values=None, offsets=None, vram_temperature=72):
+    """
+    (Re)writes stub_config.json; running stubs pick it up on their next start.
+
+    Args:
+        directory (str): Stub directory (see install_stubs).
+        gpus (int): Number of GPUs nvidia-smi reports.
+        latency_ms (dict): Tool name -> startup latency, merged over DEFAULT_LATENCY_MS.
+        values (dict): nvidia-smi field -> value, merged over DEFAULT_SMI_VALUES.
+        offsets (dict): nvidia-settings attribute -> [current, min, max].
+        vram_temperature (int): Value printed by gddr6_helper.
+    """
+    config = {
+        "gpus": gpus,
+        "latency_ms": dict(DEFAULT_LATENCY_MS, **(latency_ms or {})),
+        "values": dict(DEFAULT_SMI_VALUES, **(values or {})),
+        "offsets": dict(DEFAULT_OFFSETS, **(offsets or {})),
+        "vram_temperature": vram_temperature,
+    }
+    with open(os.path.join(directory, "stub_config.json"), "w") as config_file:
+        json.dump(config, config_file, indent=2)
+    return config
+
+
+def install_stubs(directory, **config):
+    """
+    Writes the stub executables and their configuration to directory.
+    Put directory first on PATH to use them; keyword arguments go to write_config().
+
+    Returns:
+        dict: The configuration written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    # -S: skip site-packages, the stubs only need the standard library and start faster
+    shebang = f"#!{sys.executable} -S\n"
+    for name, body in STUBS.items():
+        path = os.path.join(directory, name)
+        with open(path, "w") as script:
+            script.write(shebang + _PRELUDE + body)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return write_config(directory, **config)
@@ -0,0 +1,9 @@
+# exporter.py (in project root)
+# Headless Prometheus exporter: serves /metrics without starting the Qt GUI.
+
+import sys
+
+from src.exporter import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,132 @@
 # main.py (in project root)
 
+import time
+STARTED = time.perf_counter() # Origin of the startup trace, taken before anything heavy is imported
+
+import argparse
+import json
+import logging
 import sys
-from PySide6.QtWidgets import QApplication
-
-# --- Import the MainWindow from the src package ---
-# This works because main.py is in the parent directory of src,
-# and src contains __init__.py making it a package.
-try:
-    from src.main_window import MainWindow
-except ImportError as e:
-    print(f"Error importing MainWindow from src package: {e}")
-    print("Ensure src directory exists, contains __init__.py, main_window.py, and core.py.")
-    sys.exit(1)
+import threading
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Nvidia GPU monitor")
+    parser.add_argument("--record", metavar="FILE", help="record the session to a binary history file")
+    parser.add_argument("--replay", metavar="FILE", help="replay a recorded session instead of reading the GPUs")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed factor (default 1.0, 0 = as fast as possible)")
+    parser.add_argument("--simulate", metavar="SPEC",
+                        help="show simulated GPUs instead of the hardware, e.g. '32' or '64,seed=3,latency_ms=40'")
+    parser.add_argument("--aggregate", metavar="[HOST:]PORT",
+                        help="show the GPUs of remote agents (python -m src.remote agent) instead of local ones")
+    parser.add_argument("--fan-curves", metavar="FILE",
+                        help="control the fans with the curves in this JSON file (see src/fan_control.py)")
+    parser.add_argument("--profile", metavar="NAME",
+                        help="apply this OC profile at startup instead of the autostart one (see python -m src.cli profile)")
+    parser.add_argument("--no-profile", action="store_true", help="do not apply the autostart profile")
+    parser.add_argument("--startup-trace", action="store_true",
+                        help="print the startup trace (ms to first paint / first sample) as JSON and exit")
+    parser.add_argument("--alerts", metavar="FILE",
+                        help="alert rules (JSON list, see src/alerts.py) instead of the default ones")
+    parser.add_argument("--alert-command", metavar="COMMAND",
+                        help="also run this command for every raised alert, e.g. 'notify-send \"{name}\" \"{message}\"'")
+    args, qt_args = parser.parse_known_args(argv)
+    if args.fan_curves:
+        if args.replay or args.aggregate:
+            parser.error("--fan-curves only applies to local GPUs (not with --replay or --aggregate)")
+        try:
+            with open(args.fan_curves) as curves_file:
+                args.fan_curves = json.load(curves_file)
+        except (OSError, ValueError) as e:
+            parser.error(f"cannot read fan curves: {e}")
+    if args.alerts:
+        try:
+            with open(args.alerts) as alerts_file:
+                args.alerts = json.load(alerts_file)
+        except (OSError, ValueError) as e:
+            parser.error(f"cannot read alert rules: {e}")
+    if args.simulate:
+        from src import simulated
+        try:
+            args.simulate = simulated.from_spec(args.simulate)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.aggregate:
+        if args.replay:
+            parser.error("--aggregate cannot be combined with --replay")
+        from src import remote
+        try:
+            args.aggregate = remote.parse_address(args.aggregate)
+        except ValueError as e:
+            parser.error(str(e))
+    return args, qt_args
+
+
+def start_profile(window, name, with_fan_curves):
+    """
+    Applies the --profile (or the autostart) OC profile once the window is up,
+    so the profile file and the OC code are only loaded after the first paint.
+    """
+    from src import profiles
+    try:
+        name, settings = profiles.startup_profile(name)
+    except profiles.ProfileError as e:
+        logging.error(f"Profile not applied: {e}")
+        return
+    if settings is None:
+        return
+    logging.info(f"Applying profile '{name}'")
+    # May wait for the broker's authentication prompt: keep it off the GUI thread
+    threading.Thread(target=profiles.apply_profile, args=(settings,), name="profile-apply", daemon=True).start()
+    curves = profiles.fan_curves(settings) if with_fan_curves else None
+    if curves is not None:
+        window.start_fan_control(curves)
+
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = MainWindow() # Create an instance of the main window
+    args, qt_args = parse_args(sys.argv[1:])
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from src import instrumentation
+    instrumentation.set_startup_origin(STARTED)
+    # --- Import Qt and the MainWindow only once the GUI is actually started ---
+    # This works because main.py is in the parent directory of src,
+    # and src contains __init__.py making it a package.
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtCore import QTimer
+    try:
+        from src.main_window import MainWindow
+    except ImportError as e:
+        print(f"Error importing MainWindow from src package: {e}")
+        print("Ensure src directory exists, contains __init__.py, main_window.py, and core.py.")
+        sys.exit(1)
+    instrumentation.startup_mark("imports")
+    if args.simulate:
+        from src import simulated
+        simulated.install(args.simulate)
+    from src import alerts
+    notifiers = [alerts.log_notifier]
+    if args.alert_command:
+        notifiers.append(alerts.CommandNotifier(args.alert_command))
+    try:
+        if args.alerts is not None:
+            alert_engine = alerts.AlertEngine.from_config(args.alerts, notifiers=notifiers)
+        else:
+            alert_engine = alerts.AlertEngine(notifiers=notifiers)
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"Invalid alert rules: {e}")
+        sys.exit(2)
+    app = QApplication(sys.argv[:1] + qt_args)
+    try:
+        window = MainWindow(record_path=args.record, replay_path=args.replay, replay_speed=args.speed,
+                            fan_curves=args.fan_curves, aggregate=args.aggregate, alerts=alert_engine) # Create an instance of the main window
+    except OSError as e:
+        print(f"Cannot listen for agents: {e}")
+        sys.exit(1)
+    instrumentation.startup_mark("window_created")
+    if args.startup_trace:
+        window.startup_complete.connect(lambda trace: (print(json.dumps(trace)), window.close(), app.quit()))
     window.show()         # Show the window
+    if not args.replay and not args.aggregate and not args.no_profile:
+        QTimer.singleShot(0, lambda: start_profile(window, args.profile, args.fan_curves is None))
     sys.exit(app.exec())  # Start the Qt event loop
@@ -0,0 +1,282 @@
+# src/alerts.py
+"""
+Threshold alerts evaluated on the live sample stream.
+
+A rule compares a metric against a constant or a multiple of another metric
+and optionally has to hold for a while before it fires:
+
+    temperature > 85 for 30s
+    vram_temperature > 100
+    power >= 0.98 * power_limit for 5m
+
+Rules are parsed and compiled once into column/threshold/duration arrays.
+Each snapshot is turned into one (GPUs x metrics) matrix and every rule is
+evaluated for every GPU with a handful of array operations, so the cost per
+sample hardly changes with the number of rules or GPUs. The only state is
+the time each condition started holding (one float per GPU and rule): a
+rule becomes active once now - since >= duration, without looking back at
+history. A missing value (NaN) neither raises nor clears an alert.
+
+Raised and cleared alerts are AlertEvents handed to the notifiers, plain
+callables (log_notifier and CommandNotifier are provided). The engine is a
+collector sink, evaluated on the sampling thread; the GUI polls
+alerted_metrics() to highlight value labels.
+
+Config file for main.py --alerts (JSON): a list of rules, either rule
+strings or objects with 'rule' and optional 'name' and 'severity':
+
+    ["temperature > 85 for 30s",
+     {"rule": "power >= 0.98 * power_limit for 5m", "name": "Power limited", "severity": "info"}]
+"""
+import logging
+import re
+import shlex
+import subprocess
+import threading
+
+import numpy as np
+
+from . import instrumentation
+from .history import HISTORY_METRICS, snapshot_to_values
+
+DEFAULT_RULES = (
+    "temperature > 85 for 30s",
+    "vram_temperature > 100",
+    "power >= 0.98 * power_limit for 5m",
+)
+# GPUs the state arrays are sized for initially; they grow when more appear
+DEFAULT_GPU_CAPACITY = 8
+
+_DURATION_UNITS = {"s": 1.0, "m": 60.0, "h": 3600.0}
+_RULE_PATTERN = re.compile(
+    r"^\s*(?P<metric>\w+)\s*(?P<op>>=|<=|>|<)\s*"
+    r"(?:(?P<factor>[-+]?\d+(?:\.\d*)?)\s*\*\s*(?P<reference>[a-z_]\w*)|(?P<reference_only>[a-z_]\w*)|(?P<threshold>[-+]?\d+(?:\.\d*)?))"
+    r"(?:\s+for\s+(?P<duration>\d+(?:\.\d*)?)\s*(?P<unit>[smh]?))?\s*$")
+
+
+class AlertRule:
+    """
+    One parsed rule: metric OP threshold, or metric OP factor * reference.
+
+    Attributes:
+        text (str): Rule as written.
+        name (str): Display name (default: the rule text).
+        severity (str): Free-form severity handed to notifiers ('warning' by default).
+        metric (str): Compared history metric.
+        op (str): One of '>', '>=', '<', '<='.
+        threshold (float): Constant right-hand side (None if reference is set).
+        factor (float): Multiplier of reference.
+        reference (str): Right-hand side metric, or None.
+        duration (float): Seconds the condition must hold before the alert is raised.
+    """
+    __slots__ = ("text", "name", "severity", "metric", "op", "threshold", "factor", "reference", "duration")
+
+    def __init__(self, text, name=None, severity="warning"):
+        match = _RULE_PATTERN.match(text)
+        if match is None:
+            raise ValueError(f"Cannot parse alert rule '{text}' (expected e.g. 'temperature > 85 for 30s').")
+        self.text = text.strip()
+        self.name = name or self.text
+        self.severity = severity
+        self.metric = match["metric"]
+        self.op = match["op"]
+        self.reference = match["reference"] or match["reference_only"]
+        self.factor = float(match["factor"]) if match["factor"] else 1.0
+        self.threshold = float(match["threshold"]) if match["threshold"] else None
+        self.duration = float(match["duration"]) * _DURATION_UNITS[match["unit"] or "s"] if match["duration"] else 0.0
+        for metric in (self.metric, self.reference):
+            if metric is not None and metric not in HISTORY_METRICS:
+                raise ValueError(f"Unknown metric '{metric}' in alert rule '{text}' "
+                                 f"(known: {', '.join(HISTORY_METRICS)}).")
+
+    @classmethod
+    def from_config(cls, entry):
+        """A rule from a config entry: a rule string or {'rule', 'name', 'severity'}."""
+        if isinstance(entry, str):
+            return cls(entry)
+        return cls(entry["rule"], name=entry.get("name"), severity=entry.get("severity", "warning"))
+
+    def __repr__(self):
+        return f"AlertRule({self.text!r})"
+
+
+class AlertEvent:
+    """A rule starting (raised=True) or ceasing to hold for one GPU."""
+    __slots__ = ("gpu", "rule", "raised", "value", "timestamp")
+
+    def __init__(self, gpu, rule, raised, value, timestamp):
+        self.gpu = gpu
+        self.rule = rule
+        self.raised = raised
+        self.value = value
+        self.timestamp = timestamp
+
+    @property
+    def message(self):
+        state = "raised" if self.raised else "cleared"
+        value = "" if self.value != self.value else f" ({self.rule.metric} = {self.value:g})"
+        return f"GPU {self.gpu}: {self.rule.name} {state}{value}"
+
+    def __repr__(self):
+        return f"AlertEvent({self.message!r})"
+
+
+# --- Notifiers ---
+def log_notifier(event):
+    """Logs raised alerts as warnings and cleared ones as info."""
+    if event.raised:
+        logging.warning(f"Alert: {event.message}")
+    else:
+        logging.info(f"Alert: {event.message}")
+
+
+class CommandNotifier:
+    """
+    Runs a command for every event, e.g. notify-send. The command is a
+    template formatted with the event's fields: {gpu}, {name}, {rule},
+    {severity}, {state} ('raised'/'cleared'), {value} and {message}.
+    The command is not waited for; finished ones are reaped on the next event.
+
+    Args:
+        command (str or list): Argument list, or a string split like a shell would.
+        cleared (bool): Also run for cleared alerts.
+    """
+
+    def __init__(self, command, cleared=False):
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.cleared = cleared
+        self._running = []
+
+    def __call__(self, event):
+        self._running = [process for process in self._running if process.poll() is None]
+        if not event.raised and not self.cleared:
+            return
+        fields = {"gpu": event.gpu, "name": event.rule.name, "rule": event.rule.text, "severity": event.rule.severity,
+                  "state": "raised" if event.raised else "cleared", "value": f"{event.value:g}", "message": event.message}
+        argv = [argument.format(**fields) for argument in self.command]
+        try:
+            self._running.append(subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL))
+            instrumentation.spawned(argv[0])
+        except OSError as e:
+            instrumentation.error("alerts", "command_failed", f"Cannot run alert command {argv[0]}", detail=str(e))
+
+
+# --- Engine ---
+class AlertEngine:
+    """
+    Evaluates compiled rules on every snapshot.
+
+    Args:
+        rules (iterable): AlertRules or rule strings.
+        notifiers (iterable): Callables receiving each AlertEvent.
+        gpu_capacity (int): Initial size of the per-GPU state.
+    """
+
+    def __init__(self, rules=DEFAULT_RULES, notifiers=(log_notifier,), gpu_capacity=DEFAULT_GPU_CAPACITY):
+        self.rules = [rule if isinstance(rule, AlertRule) else AlertRule(rule) for rule in rules]
+        self.notifiers = list(notifiers)
+        metric_index = {name: column for column, name in enumerate(HISTORY_METRICS)}
+        self._metric_index = metric_index
+        ones_column = len(HISTORY_METRICS) # Constant 1.0, so constant thresholds need no special case
+        # Compiled rules: lhs column, rhs = factor * column, comparison sign and strictness, duration
+        self._lhs = np.array([metric_index[rule.metric] for rule in self.rules], dtype=np.intp)
+        self._rhs = np.array([metric_index[rule.reference] if rule.reference else ones_column for rule in self.rules],
+                             dtype=np.intp)
+        self._factor = np.array([rule.factor if rule.reference else rule.threshold for rule in self.rules])
+        self._sign = np.array([1.0 if rule.op in (">", ">=") else -1.0 for rule in self.rules])
+        self._inclusive = np.array([rule.op in (">=", "<=") for rule in self.rules])
+        self._duration = np.array([rule.duration for rule in self.rules])
+        self._metric_masks = [frozenset([rule.metric]) for rule in self.rules]
+        self._lock = threading.Lock() # Guards the published alert state
+        self._since = None
+        self._active = None
+        self._allocate(max(gpu_capacity, 1))
+        self._alerted = {}
+        self.version = 0 # Incremented whenever the set of active alerts changes
+
+    def _allocate(self, capacity):
+        """(Re)sizes the per-GPU arrays, keeping the state of the GPUs seen so far."""
+        self._values = np.empty((capacity, len(HISTORY_METRICS) + 1))
+        self._values[:, -1] = 1.0
+        since = np.full((capacity, len(self.rules)), np.nan) # When each condition started holding
+        active = np.zeros((capacity, len(self.rules)), dtype=bool)
+        if self._since is not None:
+            rows = self._since.shape[0]
+            since[:rows] = self._since
+            active[:rows] = self._active
+        self._since, self._active = since, active
+
+    @classmethod
+    def from_config(cls, config, **kwargs):
+        """Builds an engine from a parsed --alerts file (see module docstring); raises ValueError for bad rules."""
+        if not isinstance(config, list):
+            raise ValueError("The alert config must be a list of rules.")
+        return cls([AlertRule.from_config(entry) for entry in config], **kwargs)
+
+    def update(self, snapshot):
+        """
+        Evaluates every rule for every GPU of snapshot.
+
+        Returns:
+            list: AlertEvents for the alerts raised or cleared by this snapshot.
+        """
+        if not self.rules:
+            return []
+        highest = max(snapshot.gpus, default=-1)
+        if highest >= self._values.shape[0]:
+            self._allocate(max(highest + 1, 2 * self._values.shape[0]))
+        values = self._values
+        snapshot_to_values(snapshot, self._metric_index, values[:, :-1])
+        now = snapshot.timestamp
+        difference = self._sign * (values[:, self._lhs] - self._factor * values[:, self._rhs])
+        holds = (difference > 0) | (self._inclusive & (difference == 0))
+        known = ~np.isnan(difference)
+        since = self._since
+        since[known & ~holds] = np.nan
+        since[holds & np.isnan(since)] = now
+        # NaN since compares False (not holding); a missing value keeps the alert as it was
+        active = np.where(known, (now - since) >= self._duration, self._active)
+        changed = active != self._active
+        if not changed.any():
+            return []
+        events = []
+        for gpu, position in zip(*np.nonzero(changed)):
+            rule = self.rules[position]
+            events.append(AlertEvent(int(gpu), rule, bool(active[gpu, position]),
+                                     float(values[gpu, self._lhs[position]]), now))
+        self._active = active
+        alerted = {}
+        for gpu, position in zip(*np.nonzero(active)):
+            alerted[int(gpu)] = alerted.get(int(gpu), frozenset()) | self._metric_masks[position]
+        with self._lock:
+            self._alerted = alerted
+            self.version += 1
+        for event in events:
+            for notifier in self.notifiers:
+                try:
+                    notifier(event)
+                except Exception as e:
+                    instrumentation.error("alerts", "notifier_failed", f"Alert notifier {notifier!r} failed", detail=str(e))
+        return events
+
+    def alerted_metrics(self):
+        """
+        Returns:
+            tuple: (version, {GPU index: frozenset of metrics with an active alert}).
+                   The version changes whenever the mapping does.
+        """
+        with self._lock:
+            return self.version, self._alerted
+
+    def active(self):
+        """Active alerts as [(GPU index, AlertRule)]."""
+        return [(int(gpu), self.rules[position]) for gpu, position in zip(*np.nonzero(self._active))]
+
+    # --- Collector sink ---
+    def append_snapshot(self, snapshot):
+        """Collector sink interface: evaluates snapshot on the calling (sampling) thread."""
+        try:
+            with instrumentation.timed("alerts"):
+                self.update(snapshot)
+        except Exception as e:
+            instrumentation.error("alerts", "exception", type(e).__name__, detail=str(e))
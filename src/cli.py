@@ -0,0 +1,317 @@
+# src/cli.py
+"""
+Headless command line interface: static info, one snapshot, or a continuous
+stream of GPU status as a table, JSON or CSV.
+
+    python -m src.cli static
+    python -m src.cli snapshot --format json
+    python -m src.cli stream --interval 2 --format csv
+    python -m src.cli profile save quiet     # then: profile apply quiet
+
+Meant for cron jobs and ssh sessions, so it only imports core and the standard
+library (no Qt, no NumPy); json/csv are imported when the format needs them.
+Diagnostics printed by core go to stderr to keep stdout machine-readable.
+"""
+import argparse
+import contextlib
+import sys
+import time
+
+from . import core
+from .metrics import GPU_METRICS, VRAM_TEMPERATURE, is_missing
+
+# (status key, column title) for dynamic status rows
+STATUS_COLUMNS = [("index", "GPU")] + [(metric.key, metric.column_title) for metric in GPU_METRICS]
+VRAM_COLUMN = (VRAM_TEMPERATURE.key, VRAM_TEMPERATURE.column_title)
+
+STATIC_COLUMNS = [
+    ("index", "GPU"),
+    ("name", "Name"),
+    ("uuid", "UUID"),
+    ("vram", "VRAM"),
+    ("driver", "Driver"),
+    ("pcie_max_gen", "PCIe Gen"),
+]
+
+# How long a one-shot query waits for a streaming backend's first sample
+FIRST_SAMPLE_TIMEOUT = 5.0
+
+
+def _quiet_core():
+    """Sends core's print() diagnostics to stderr while it is called."""
+    return contextlib.redirect_stdout(sys.stderr)
+
+
+def _json_value(value):
+    """Status value for JSON: numbers stay numbers, missing (NaN) -> null."""
+    if isinstance(value, float):
+        if is_missing(value):
+            return None
+        return int(value) if value.is_integer() else value
+    return value
+
+
+def _format_table(columns, rows):
+    widths = [len(title) for _key, title in columns]
+    cells = []
+    for row in rows:
+        line = [str(row.get(key, "")) for key, _title in columns]
+        widths = [max(w, len(c)) for w, c in zip(widths, line)]
+        cells.append(line)
+    header = "  ".join(title.rjust(w) for (_key, title), w in zip(columns, widths))
+    body = ["  ".join(c.rjust(w) for c, w in zip(line, widths)) for line in cells]
+    return header, body
+
+
+def _status_rows(samples, vram_temperature, numeric=False):
+    """
+    One row per GPU sample. numeric keeps the float values (for JSON);
+    otherwise they are formatted like the GUI panels ('N/A' if missing).
+    """
+    rows = []
+    for index in sorted(samples):
+        sample = samples[index]
+        row = {"index": index}
+        for metric, value in zip(GPU_METRICS, sample.values):
+            row[metric.key] = value if numeric else metric.format_value(value)
+        if index == 0 and vram_temperature is not None:
+            row["vram_temperature"] = vram_temperature
+        rows.append(row)
+    return rows
+
+
+class _Writer:
+    """Prints rows in one output format; the header is written only once."""
+
+    def __init__(self, fmt, columns, stream=None):
+        self.fmt = fmt
+        self.columns = columns
+        self.stream = stream or sys.stdout
+        self._header_written = False
+        self._csv = None
+        if fmt == "csv":
+            import csv
+            self._csv = csv.writer(self.stream)
+        elif fmt == "json":
+            import json
+            self._json = json
+
+    def write_static(self, infos):
+        if self.fmt == "json":
+            self._json.dump(infos, self.stream, indent=2)
+            self.stream.write("\n")
+        else:
+            self._write_rows(infos)
+        self.stream.flush()
+
+    def write_sample(self, timestamp, samples, vram_temperature=None):
+        rows = _status_rows(samples, vram_temperature, numeric=self.fmt == "json")
+        if self.fmt == "json":
+            # One object per line (JSON Lines) so streams can be parsed incrementally
+            gpus = [{key: _json_value(value) for key, value in row.items()} for row in rows]
+            self.stream.write(self._json.dumps({"timestamp": round(timestamp, 3), "gpus": gpus}) + "\n")
+        else:
+            stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(timestamp))
+            self._write_rows([dict(row, time=stamp) for row in rows])
+        self.stream.flush()
+
+    def _write_rows(self, rows):
+        if self.fmt == "csv":
+            if not self._header_written:
+                self._csv.writerow([key for key, _title in self.columns])
+            self._csv.writerows([[row.get(key, "") for key, _title in self.columns] for row in rows])
+        else:
+            header, body = _format_table(self.columns, rows)
+            if not self._header_written:
+                self.stream.write(header + "\n")
+            self.stream.write("\n".join(body) + "\n")
+        self._header_written = True
+
+
+def _sample_columns(with_vram, with_time):
+    columns = list(STATUS_COLUMNS)
+    if with_vram:
+        columns.append(VRAM_COLUMN)
+    if with_time:
+        columns.insert(0, ("time", "Time"))
+    return columns
+
+
+def _wait_first_sample(timeout):
+    """Polls the backend until it returns data (streaming backends start empty)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        statuses = core.get_all_gpu_dynamic_status()
+        if statuses or time.monotonic() >= deadline:
+            return statuses
+        time.sleep(0.05)
+
+
+# --- Commands ---
+def cmd_static(args):
+    with _quiet_core():
+        infos = core.get_all_gpu_static_info()
+    if not infos:
+        print("Could not query GPU static info.", file=sys.stderr)
+        return 1
+    _Writer(args.format, STATIC_COLUMNS).write_static(infos)
+    return 0
+
+
+def cmd_snapshot(args):
+    with _quiet_core():
+        core.select_backend(streaming=False)
+        timestamp = time.time()
+        statuses = _wait_first_sample(FIRST_SAMPLE_TIMEOUT)
+        vram_temperature = core.get_vram_temperature() if args.vram else None
+    if not statuses:
+        print("Could not query GPU status.", file=sys.stderr)
+        return 1
+    writer = _Writer(args.format, _sample_columns(args.vram, with_time=False))
+    writer.write_sample(timestamp, statuses, vram_temperature)
+    return 0
+
+
+def cmd_stream(args):
+    interval_ms = max(int(args.interval * 1000), 1)
+    with _quiet_core():
+        core.select_backend(streaming=True, interval_ms=interval_ms)
+        if args.vram:
+            core.start_vram_temperature_stream(interval_ms)
+    writer = _Writer(args.format, _sample_columns(args.vram, with_time=True))
+    written = 0
+    next_tick = time.monotonic()
+    while args.count is None or written < args.count:
+        timestamp = time.time()
+        with _quiet_core():
+            statuses = core.get_all_gpu_dynamic_status()
+            vram_temperature = core.get_vram_temperature() if args.vram else None
+        if statuses:
+            writer.write_sample(timestamp, statuses, vram_temperature)
+            written += 1
+        next_tick += args.interval
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_tick = time.monotonic() # Fell behind: skip the missed ticks
+    return 0
+
+
+def cmd_profile(args):
+    import json
+    from . import profiles # Pulls in the OC code only for profile commands
+    try:
+        store = profiles.ProfileStore(args.file)
+        if args.action == "list":
+            for name in store.names():
+                print(name + (" (autostart)" if name == store.autostart else ""))
+        elif args.action == "show":
+            print(json.dumps(store.get(args.name), indent=2))
+        elif args.action == "delete":
+            store.delete(args.name)
+        elif args.action == "autostart":
+            if args.name or args.off:
+                store.set_autostart(None if args.off else args.name)
+            else:
+                print(store.autostart or "(none)")
+        elif args.action == "save":
+            with _quiet_core():
+                profile = profiles.capture(gpu_indices=args.gpu)
+            if not profile:
+                print("Could not read the current GPU settings.", file=sys.stderr)
+                return 1
+            store.save(args.name, profile)
+            print(f"Saved profile '{args.name}' for {len(profile)} GPU(s).")
+        else: # apply
+            profile = store.get(args.name)
+            with _quiet_core():
+                static_infos = core.get_all_gpu_static_info() or []
+                if args.dry_run:
+                    changes, _missing = profiles.pending_changes(profile, static_infos)
+                    results = {gpu: {setting: (None, f"would set {value}") for setting, value in settings.items()}
+                               for gpu, settings in changes.items()}
+                else:
+                    results = profiles.apply_profile(profile, static_infos)
+            if not results:
+                print("All GPUs already match the profile.")
+            failed = False
+            for gpu, settings in sorted(results.items()):
+                for setting, (success, message) in settings.items():
+                    failed |= success is False
+                    print(f"GPU {gpu} {setting}: {message}")
+            return 1 if failed else 0
+    except profiles.ProfileError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.cli",
+                                     description="Print Nvidia GPU information without starting the GUI.")
+    parser.add_argument("--simulate", metavar="SPEC",
+                        help="read simulated GPUs instead of the hardware, e.g. '16' or '16,na=fan_speed'")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    static = commands.add_parser("static", help="static GPU information (name, VRAM, driver, ...)")
+    static.set_defaults(handler=cmd_static)
+
+    snapshot = commands.add_parser("snapshot", help="one sample of every GPU's status")
+    snapshot.set_defaults(handler=cmd_snapshot)
+
+    stream = commands.add_parser("stream", help="sample continuously until interrupted")
+    stream.add_argument("--interval", type=float, default=1.0, help="seconds between samples (default 1.0)")
+    stream.add_argument("--count", type=int, help="stop after this many samples")
+    stream.set_defaults(handler=cmd_stream)
+
+    profile = commands.add_parser("profile", help="save, list and apply OC profiles (see src/profiles.py)")
+    profile.add_argument("--file", help="profile file (default ~/.config/gpu_mon_qt/profiles.json)")
+    profile.set_defaults(handler=cmd_profile)
+    actions = profile.add_subparsers(dest="action", required=True)
+    actions.add_parser("list", help="profile names")
+    for action, help_text in (("show", "print a profile as JSON"), ("delete", "remove a profile")):
+        actions.add_parser(action, help=help_text).add_argument("name")
+    save = actions.add_parser("save", help="store the current settings of the GPUs as a profile")
+    save.add_argument("name")
+    save.add_argument("--gpu", type=int, action="append", help="only this GPU index (repeatable)")
+    apply = actions.add_parser("apply", help="apply a profile, changing only the settings that differ")
+    apply.add_argument("name")
+    apply.add_argument("--dry-run", action="store_true", help="only print what would change")
+    autostart = actions.add_parser("autostart", help="profile applied when the GUI starts")
+    autostart.add_argument("name", nargs="?")
+    autostart.add_argument("--off", action="store_true", help="no autostart profile")
+
+    for sub in (static, snapshot, stream):
+        sub.add_argument("--format", choices=("table", "json", "csv"), default="table",
+                         help="output format (default table)")
+    for sub in (snapshot, stream):
+        sub.add_argument("--vram", action="store_true",
+                         help="include the VRAM temperature (needs gddr6_helper and sudo)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.simulate:
+        from . import simulated # Only loaded when asked for, to keep the CLI's start-up lean
+        try:
+            simulated.install(simulated.from_spec(args.simulate))
+        except ValueError as e:
+            parser.error(str(e))
+    try:
+        return args.handler(args)
+    except KeyboardInterrupt:
+        return 0
+    except BrokenPipeError:
+        # Output piped into e.g. 'head' that exited; silence the flush at exit
+        sys.stdout = open("/dev/null", "w")
+        return 0
+    finally:
+        with _quiet_core():
+            core.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
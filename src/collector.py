@@ -0,0 +1,247 @@
+# src/collector.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import core, instrumentation
+from .metrics import GPU_METRIC_KEYS, positions_for
+from .scheduler import DEFAULT_METRIC_INTERVALS, MetricScheduler
+
+# Interval multiplier while no view is visible but history/recording still wants data
+BACKGROUND_RATE_FACTOR = 10.0
+
+
+class Snapshot:
+    """
+    One completed round of sampling.
+
+    Attributes:
+        sequence (int): Increments with every snapshot produced by a collector.
+        timestamp (float): Wall-clock time (time.time()) the round started.
+        gpus (dict): GPU index -> metrics.GpuSample (read-only), empty if the
+                     telemetry backend failed.
+        vram_temperature: int (°C), a status string from core.get_vram_temperature()
+                          (e.g. 'No Root?'), or None if the helper was not polled.
+        duration (float): Seconds the round took (slowest source).
+    """
+    __slots__ = ("sequence", "timestamp", "gpus", "vram_temperature", "duration")
+
+    def __init__(self, sequence, timestamp, gpus, vram_temperature=None, duration=0.0):
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.gpus = gpus
+        self.vram_temperature = vram_temperature
+        self.duration = duration
+
+
+class SampleCollector:
+    """
+    Samples all telemetry sources on a background thread.
+
+    Independent sources (GPU telemetry backend, VRAM temperature helper) run
+    concurrently on a small thread pool, so a round takes as long as the slowest
+    source rather than the sum of all of them. Finished snapshots replace the
+    previous one in a single slot and on_snapshot is called from the collector
+    thread; consumers read latest() and never wait on I/O.
+
+    Each metric is read on its own deadline-based schedule (see
+    scheduler.MetricScheduler): metrics due together are read with one backend
+    call, and values not due in a round are carried over from the previous
+    one, so every Snapshot holds a complete status. If a round overruns, the
+    missed ticks are dropped (coalesced) instead of queueing up.
+
+    set_visible(False) throttles sampling while no view shows the data: to
+    BACKGROUND_RATE_FACTOR times the intervals if history or sinks still
+    record it, or paused entirely for display-only use.
+
+    Args:
+        interval (float): Seconds between rounds for the fastest metrics;
+                          DEFAULT_METRIC_INTERVALS are scaled by it.
+        on_snapshot (callable): Called with each new Snapshot (collector thread).
+        history (HistoryStore): Optional store every snapshot is appended to.
+        sinks (list): Further objects with an append_snapshot(snapshot) method
+                      (e.g. a HistoryRecorder), fed on the collector thread.
+        metric_intervals (dict): Overrides seconds between reads per metric.
+    """
+
+    def __init__(self, interval=1.0, on_snapshot=None, history=None, sinks=(), metric_intervals=None):
+        self.interval = interval
+        self.on_snapshot = on_snapshot
+        self.history = history
+        self.sinks = list(sinks)
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="gpu-mon-source")
+        self._lock = threading.Lock()
+        self._latest = None
+        self._sequence = 0
+        self._stop_event = threading.Event()
+        self._wake = threading.Event() # Interrupts the wait when the schedule changes
+        self._thread = None
+        intervals = {metric: step * interval for metric, step in DEFAULT_METRIC_INTERVALS.items()}
+        intervals.update(metric_intervals or {})
+        self.scheduler = MetricScheduler(intervals)
+        self._schedule_lock = threading.Lock()
+        # Last values per GPU / VRAM, carried into rounds where they are not due
+        self._last_gpus = {}
+        self._last_vram = None
+        # VRAM helper state: None = not probed yet, True/False after the first read
+        self._vram_available = None
+        self._vram_probe = None # Future of the running probe
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="gpu-mon-collector", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def latest(self):
+        """Returns the most recent completed Snapshot, or None before the first one."""
+        with self._lock:
+            return self._latest
+
+    def set_visible(self, visible):
+        """
+        Tells the collector whether any view currently displays its data.
+        Becoming visible again triggers an immediate full round.
+        """
+        with self._schedule_lock:
+            if visible:
+                self.scheduler.paused = False
+                self.scheduler.set_rate_factor(1.0)
+                self.scheduler.wake_all()
+            elif self.history is None and not self.sinks:
+                self.scheduler.paused = True # Nobody keeps the data: don't sample at all
+            else:
+                self.scheduler.set_rate_factor(BACKGROUND_RATE_FACTOR)
+        self._wake.set()
+
+    def _read_vram(self):
+        # The first read doubles as the availability probe. If the helper is
+        # missing or cannot run, stop polling it and report the probe status once.
+        if self._vram_available is False:
+            return None
+        if not core.vram_helper_available():
+            self._vram_available = False
+            return "No Helper"
+        with instrumentation.timed("vram_temperature"):
+            value = core.get_vram_temperature()
+        if self._vram_available is None:
+            self._vram_available = isinstance(value, int)
+            if self._vram_available:
+                # Probe succeeded: keep one helper process running from now on
+                core.start_vram_temperature_stream(int(self.scheduler.intervals["vram_temperature"] * 1000))
+        return value
+
+    def collect_once(self, metrics=None):
+        """
+        Runs one sampling round (blocking) and publishes its Snapshot.
+
+        Args:
+            metrics (iterable): Metrics to read this round (None = all). All due
+                                GPU fields go into one backend call; the rest
+                                keep their previous values.
+        """
+        started = time.monotonic()
+        timestamp = time.time()
+        if metrics is None:
+            fields, read_vram = None, True
+        else:
+            fields = [key for key in GPU_METRIC_KEYS if key in metrics]
+            read_vram = "vram_temperature" in metrics
+            if len(fields) == len(GPU_METRIC_KEYS):
+                fields = None
+        gpus_future = None
+        if fields is None or fields:
+            gpus_future = self._executor.submit(self._read_gpus, fields)
+        vram_future = None
+        if self._vram_probe is not None or (read_vram and self._vram_available is None):
+            # The probe may wait for sudo's timeout: rounds go on without it and the
+            # next round picks its result up, even if VRAM is not due in that round
+            if self._vram_probe is None:
+                self._vram_probe = self._executor.submit(self._read_vram)
+            if self._vram_probe.done():
+                vram_future, self._vram_probe = self._vram_probe, None
+        elif read_vram:
+            vram_future = self._executor.submit(self._read_vram)
+        if gpus_future is None:
+            gpus = self._last_gpus
+        else:
+            try:
+                fresh = gpus_future.result()
+            except Exception as e:
+                instrumentation.error("collector", "exception", f"GPU status read failed: {e}")
+                fresh = None
+            gpus = self._merge_gpus(fresh, fields)
+        if vram_future is None:
+            vram_temperature = self._last_vram
+        else:
+            try:
+                vram_temperature = vram_future.result()
+            except Exception as e:
+                instrumentation.error("collector", "exception", f"VRAM temperature read failed: {e}")
+                vram_temperature = "Py Error"
+            self._last_vram = vram_temperature
+        duration = time.monotonic() - started
+        instrumentation.observe("collector_round", duration)
+        with self._lock:
+            self._sequence += 1
+            snapshot = Snapshot(self._sequence, timestamp, gpus, vram_temperature, duration)
+            self._latest = snapshot
+        if self.history is not None:
+            self.history.append_snapshot(snapshot)
+        for sink in self.sinks:
+            sink.append_snapshot(snapshot)
+        if self.on_snapshot is not None:
+            self.on_snapshot(snapshot)
+        return snapshot
+
+    def _read_gpus(self, fields):
+        with instrumentation.timed("gpu_status"):
+            return core.get_all_gpu_dynamic_status(fields)
+
+    def _merge_gpus(self, fresh, fields):
+        if not fresh:
+            # Failed read (or a streaming backend without data yet): report it and
+            # read every metric on the next tick rather than retrying at once
+            self._last_gpus = {}
+            with self._schedule_lock:
+                self.scheduler.wake_all(min(self.scheduler.interval(metric) for metric in GPU_METRIC_KEYS))
+            return {}
+        if fields is None:
+            merged = fresh # Complete samples; nothing to carry over
+        else:
+            positions = positions_for(fields)
+            merged = {}
+            for index, sample in fresh.items():
+                previous = self._last_gpus.get(index)
+                if previous is None:
+                    merged[index] = sample
+                else:
+                    combined = previous.copy() # Published samples are never modified
+                    combined.update_from(sample, positions)
+                    merged[index] = combined
+        self._last_gpus = merged
+        return merged
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            with self._schedule_lock:
+                due = self.scheduler.pop_due()
+            if due:
+                try:
+                    self.collect_once(due)
+                except RuntimeError:
+                    break # Executor shut down underneath us
+            with self._schedule_lock:
+                delay = self.scheduler.next_deadline() - time.monotonic()
+            # Sleeps until the next deadline; set_visible()/stop() interrupt the wait
+            if self._wake.wait(None if delay == float("inf") else max(delay, 0.0)):
+                self._wake.clear()
@@ -4,29 +4,49 @@ import re
 import os # Needed for path joining
 import sys # For sys.prefix (optional, for finding helper)
 import shutil # For checking if helper exists in PATH
+import threading # For long-lived streaming child processes
+import time
 
-# Static info function
-def get_gpu_static_info():
+try:
+    from . import instrumentation
+    from .metrics import GPU_METRICS, GPU_METRIC_KEYS, MIB, MISSING, GpuSample, positions_for
+except ImportError:
+    import instrumentation # Running core.py directly
+    from metrics import GPU_METRICS, GPU_METRIC_KEYS, MIB, MISSING, GpuSample, positions_for
+
+# Static info functions
+def get_all_gpu_static_info():
     """
-    Gets static GPU information (Name, VRAM, Driver, Max PCIe Gen) using nvidia-smi.
-    Assumes a single GPU for simplicity. Returns None on error.
+    Gets static information (Index, UUID, Name, VRAM, Driver, Max PCIe Gen) for
+    every GPU with a single nvidia-smi query.
+
+    Returns:
+        list: One dict per GPU, ordered by index. Keys: 'index', 'uuid', 'name',
+              'vram', 'driver', 'pcie_max_gen'.
+        None: On error.
     """
+    if _device_source is not None:
+        return _device_source.get_all_static_info()
     try:
-        query_items = ["gpu_name", "memory.total", "driver_version", "pcie.link.gen.max"]
-        output_keys = ["name", "vram", "driver", "pcie_max_gen"]
+        query_items = ["index", "uuid", "gpu_name", "memory.total", "driver_version", "pcie.link.gen.max"]
+        output_keys = ["index", "uuid", "name", "vram", "driver", "pcie_max_gen"]
         command = f"nvidia-smi --query-gpu={','.join(query_items)} --format=csv,noheader,nounits"
+        instrumentation.spawned("nvidia-smi")
         result = subprocess.run(
             command, shell=True, capture_output=True, text=True, check=True, timeout=5
         )
-        output_line = result.stdout.strip().split('\n')[0]
-        values = [v.strip() for v in output_line.split(',')]
-        if len(values) == len(query_items):
+        infos = []
+        for output_line in result.stdout.strip().split('\n'):
+            if not output_line.strip():
+                continue
+            values = [v.strip() for v in output_line.split(',')]
+            if len(values) != len(query_items):
+                print(f"Error parsing static info: Expected {len(query_items)} values, got {len(values)}. Output: '{output_line}'")
+                return None
             info = dict(zip(output_keys, values))
             info["vram"] = f"{info['vram']} MiB"
-            return info
-        else:
-            print(f"Error parsing static info: Expected {len(query_items)} values, got {len(values)}. Output: '{output_line}'")
-            return None
+            infos.append(info)
+        return infos or None
     except FileNotFoundError:
         print("Error: 'nvidia-smi' command not found (for static info).")
         return None
@@ -37,87 +57,621 @@ def get_gpu_static_info():
         print("Error: nvidia-smi command for static info timed out.")
         return None
     except Exception as e:
-        print(f"An unexpected error occurred in get_gpu_static_info: {e}")
+        print(f"An unexpected error occurred in get_all_gpu_static_info: {e}")
         return None
 
-# --- Updated function for ALL dynamic status data ---
-def get_gpu_dynamic_status():
+
+def get_gpu_static_info(gpu_index=0):
     """
-    Gets dynamic GPU status (Temp, Util GPU/Mem, Mem Free/Used, Power, Clocks, Fan)
-    using nvidia-smi. Assumes a single GPU for simplicity.
+    Gets static GPU information (Name, VRAM, Driver, Max PCIe Gen) for one GPU.
+    Returns None on error or if no GPU has the given index.
+    """
+    for info in get_all_gpu_static_info() or []:
+        if info["index"] == str(gpu_index):
+            return info
+    return None
+
+# --- Dynamic status query definition (derived from the metric registry) ---
+# nvidia-smi field names, in query order
+DYNAMIC_QUERY_ITEMS = ["index"] + [metric.smi_field for metric in GPU_METRICS]
+# Keys of the legacy status dicts (GpuSample.to_status()), matching DYNAMIC_QUERY_ITEMS
+DYNAMIC_OUTPUT_KEYS = ["index"] + list(GPU_METRIC_KEYS)
+
+
+def parse_dynamic_status_line(output_line, positions=None):
+    """
+    Parses one CSV line of 'nvidia-smi --query-gpu=index,<fields>' output.
+
+    Args:
+        positions (tuple): METRIC_INDEX positions of the queried fields after
+                           'index', in query order (None = all GPU_METRICS).
 
     Returns:
-        dict: A dictionary containing status keys on success. Values are strings
-              as returned by nvidia-smi (need parsing/unit adding later).
-              Keys: 'temperature', 'gpu_util', 'mem_util', 'mem_free', 'mem_used',
-                    'power', 'core_clock', 'mem_clock', 'fan_speed'
-        None: If any error occurs during fetching or parsing.
+        GpuSample: Parsed values; fields not queried and "[N/A]" values are MISSING.
+        None: If the line does not contain the expected number of fields.
     """
-    try:
-        # Define the properties to query - adding new items
-        query_items = [
-            "temperature.gpu",
-            "utilization.gpu",
-            "utilization.memory",
-            "memory.free",
-            "memory.used",
-            "power.draw",             # Added
-            "clocks.current.graphics",# Added
-            "clocks.current.memory",  # Added
-            "fan.speed"               # Added
-        ]
-        # Define keys for the output dictionary, matching the order of query_items
-        output_keys = [
-            "temperature",
-            "gpu_util",
-            "mem_util",
-            "mem_free",
-            "mem_used",
-            "power",                  # Added
-            "core_clock",             # Added
-            "mem_clock",              # Added
-            "fan_speed"               # Added
-        ]
+    if positions is None:
+        positions = ALL_POSITIONS
+    values = output_line.split(',')
+    if len(values) != len(positions) + 1:
+        instrumentation.error("gpu_status", "parse", f"Expected {len(positions) + 1} values, got {len(values)}",
+                              detail=f"Output: '{output_line}'")
+        return None
+    index = values[0].strip()
+    if not index.isdigit():
+        return None
+    sample = GpuSample(int(index))
+    row = sample.values
+    for position, text in zip(positions, values[1:]):
+        row[position] = GPU_METRICS[position].parse(text)
+    return sample
 
-        command = f"nvidia-smi --query-gpu={','.join(query_items)} --format=csv,noheader,nounits"
 
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=5 # Using a timeout
-        )
+def parse_dynamic_status_output(output, positions=None):
+    """
+    Parses the full output of a dynamic status query (one line per GPU).
 
-        # Example output: 60, 10, 5, 6000, 2000, 55.12, 1500, 7000, 30
-        output_line = result.stdout.strip().split('\n')[0]
-        values = [v.strip() for v in output_line.split(',')]
-
-        if len(values) == len(query_items):
-            status = dict(zip(output_keys, values))
-            # Handle potential "[N/A]" values which nvidia-smi might return
-            # for certain fields (like fan speed on passively cooled cards)
-            for key, value in status.items():
-                if "[not supported]" in value.lower() or "[n/a]" in value.lower():
-                     status[key] = "N/A" # Standardize missing value representation
-            return status
-        else:
-            print(f"Error parsing dynamic status: Expected {len(query_items)} values, got {len(values)}. Output: '{output_line}'")
+    Returns:
+        dict: GPU index (int) mapped to its GpuSample. Unparseable lines are skipped.
+    """
+    samples = {}
+    for line in output.split('\n'):
+        if not line.strip():
+            continue
+        sample = parse_dynamic_status_line(line, positions)
+        if sample is not None:
+            samples[sample.index] = sample
+    return samples
+
+
+ALL_POSITIONS = positions_for(None)
+
+
+class SmiBackend:
+    """
+    Telemetry backend that runs 'nvidia-smi --query-gpu' once per sample.
+    Always available as long as nvidia-smi is installed, but every call costs
+    a process spawn, driver init and CSV parsing.
+    """
+    name = "nvidia-smi"
+
+    def get_all_dynamic_status(self, fields=None):
+        """
+        Gets dynamic status (Temp, Util GPU/Mem, Mem Free/Used, Power, Clocks, Fan)
+        for every GPU with one nvidia-smi invocation.
+
+        Args:
+            fields (iterable): Status keys to query, or None for all of them.
+                               'index' is always included.
+
+        Returns:
+            dict: GPU index mapped to a GpuSample (see metrics.GPU_METRICS);
+                  fields not queried or reported as "[N/A]" are MISSING.
+            None: If any error occurs during fetching or parsing.
+        """
+        try:
+            positions = positions_for(fields)
+            query = ",".join(["index"] + [GPU_METRICS[position].smi_field for position in positions])
+            command = f"nvidia-smi --query-gpu={query} --format=csv,noheader,nounits"
+
+            instrumentation.spawned("nvidia-smi")
+            result = subprocess.run(
+                command,
+                shell=True,
+                capture_output=True,
+                text=True,
+                check=True,
+                timeout=5 # Using a timeout
+            )
+
+            # Example output (one line per GPU): 0, 60, 10, 5, 6000, 2000, 55.12, 1500, 7000, 30
+            return parse_dynamic_status_output(result.stdout, positions) or None
+
+        except FileNotFoundError:
+            instrumentation.error("gpu_status", "not_found", "'nvidia-smi' command not found")
+            return None
+        except subprocess.CalledProcessError as e:
+            instrumentation.error("gpu_status", "exit_status", f"nvidia-smi exited with status {e.returncode}",
+                                  detail=f"Stderr: {e.stderr.strip()}")
             return None
+        except subprocess.TimeoutExpired:
+            instrumentation.error("gpu_status", "timeout", "nvidia-smi timed out")
+            return None
+        except Exception as e:
+            instrumentation.error("gpu_status", "exception", f"Unexpected error: {e}")
+            return None
+
+    def close(self):
+        pass
+
+
+class NvmlBackend:
+    """
+    Telemetry backend that talks to the driver in-process through NVML (pynvml).
+    The library is initialized once and device handles are cached, so a sample
+    is just a handful of direct library calls.
+
+    Args:
+        nvml: Module providing the pynvml API. Defaults to importing 'pynvml';
+              tests can pass a stub module instead.
+
+    Raises:
+        ImportError: If pynvml is not installed.
+        Exception: Whatever nvmlInit() raises if the driver cannot be reached.
+    """
+    name = "nvml"
+
+    def __init__(self, nvml=None):
+        if nvml is None:
+            import pynvml as nvml
+        self._nvml = nvml
+        self._error_type = getattr(nvml, "NVMLError", Exception)
+        nvml.nvmlInit()
+        try:
+            count = nvml.nvmlDeviceGetCount()
+            self._handles = [nvml.nvmlDeviceGetHandleByIndex(i) for i in range(count)]
+            self._device_readers = [self._readers(handle) for handle in self._handles]
+            # Per-process utilization: newest sample time and last SM % per PID, per device
+            self._process_timestamps = [0] * count
+            self._process_utilization = [{} for _ in range(count)]
+        except Exception:
+            nvml.nvmlShutdown()
+            raise
+
+    def _read(self, func):
+        # A single unsupported field (e.g. fan speed on passive cards) must not
+        # take the whole sample down, so each read is guarded separately.
+        try:
+            return func()
+        except self._error_type:
+            return None
+
+    def _readers(self, handle):
+        # Reader name (metrics.Metric.nvml) -> library call; one call may serve several metrics
+        nvml = self._nvml
+        return {
+            "temperature": lambda: nvml.nvmlDeviceGetTemperature(handle, nvml.NVML_TEMPERATURE_GPU),
+            "utilization": lambda: nvml.nvmlDeviceGetUtilizationRates(handle),
+            "memory": lambda: nvml.nvmlDeviceGetMemoryInfo(handle),
+            "power": lambda: nvml.nvmlDeviceGetPowerUsage(handle),
+            "power_limit": lambda: nvml.nvmlDeviceGetEnforcedPowerLimit(handle),
+            "graphics_clock": lambda: nvml.nvmlDeviceGetClockInfo(handle, nvml.NVML_CLOCK_GRAPHICS),
+            "memory_clock": lambda: nvml.nvmlDeviceGetClockInfo(handle, nvml.NVML_CLOCK_MEM),
+            "fan": lambda: nvml.nvmlDeviceGetFanSpeed(handle),
+        }
+
+    def _read_device(self, index, handle, positions=None):
+        if positions is None:
+            positions = ALL_POSITIONS
+        readers = self._device_readers[index]
+        results = {} # Each library call is made at most once per sample
+        sample = GpuSample(index)
+        row = sample.values
+        for position in positions:
+            reader, attribute, scale = GPU_METRICS[position].nvml
+            if reader not in results:
+                results[reader] = self._read(readers[reader])
+            result = results[reader]
+            if result is not None and attribute is not None:
+                result = getattr(result, attribute)
+            if result is not None:
+                row[position] = result * scale
+        return sample
+
+    def get_all_dynamic_status(self, fields=None):
+        """
+        Gets dynamic status for every GPU via NVML. Only the library calls
+        needed for fields (status keys, None = all) are made.
+
+        Returns:
+            dict: Same shape as SmiBackend.get_all_dynamic_status().
+            None: If no device is present or the read fails unexpectedly.
+        """
+        if not self._handles:
+            instrumentation.error("gpu_status", "no_device", "NVML reports no GPUs")
+            return None
+        positions = positions_for(fields)
+        try:
+            return {index: self._read_device(index, handle, positions)
+                    for index, handle in enumerate(self._handles)}
+        except Exception as e:
+            instrumentation.error("gpu_status", "nvml", f"Unexpected NVML error: {e}")
+            return None
+
+    def _read_process_utilization(self, index, handle):
+        """PID -> SM utilization (%) of device index; PIDs without new samples keep their last value."""
+        utilization = self._process_utilization[index]
+        try:
+            samples = self._nvml.nvmlDeviceGetProcessUtilization(handle, self._process_timestamps[index])
+        except self._error_type:
+            return utilization # No samples since the last call, or not supported
+        for sample in samples:
+            utilization[sample.pid] = float(sample.smUtil)
+            self._process_timestamps[index] = max(self._process_timestamps[index], sample.timeStamp)
+        return utilization
+
+    def get_all_processes(self):
+        """Same contract as get_all_gpu_processes(), read through NVML."""
+        try:
+            processes = {}
+            for index, handle in enumerate(self._handles):
+                utilization = self._read_process_utilization(index, handle)
+                rows = []
+                for process in self._nvml.nvmlDeviceGetComputeRunningProcesses(handle):
+                    used = process.usedGpuMemory
+                    rows.append((process.pid, used / MIB if used is not None else MISSING,
+                                 utilization.get(process.pid, MISSING), None))
+                running = {row[0] for row in rows}
+                for pid in [pid for pid in utilization if pid not in running]:
+                    del utilization[pid]
+                processes[index] = rows
+            return processes
+        except Exception as e:
+            instrumentation.error("processes", "nvml", f"Unexpected NVML error: {e}")
+            return None
+
+    def close(self):
+        try:
+            self._nvml.nvmlShutdown()
+        except Exception:
+            pass
+
+
+class LineStreamProcess:
+    """
+    Keeps a single long-lived child process running and hands every complete
+    stdout line to a callback on a background reader thread.
+
+    If the child exits (crash, driver reload, killed), it is restarted after
+    a delay that backs off up to max_restart_delay. A trailing line without a
+    newline (child died mid-write) is discarded rather than parsed.
+
+    Args:
+        command (list): Command line of the child process.
+        on_line (callable): Called with each complete line (newline stripped).
+        name (str): Label used in log messages and the thread name.
+        restart_delay (float): Initial delay in seconds before a restart.
+        max_restart_delay (float): Upper bound for the restart back-off.
+    """
+
+    def __init__(self, command, on_line, name="child", restart_delay=1.0, max_restart_delay=30.0):
+        self.command = list(command)
+        self.on_line = on_line
+        self.name = name
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.restart_count = 0
+        self._stop_event = threading.Event()
+        self._proc_lock = threading.Lock()
+        self._proc = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-reader", daemon=True)
+        self._thread.start()
+
+    def is_running(self):
+        with self._proc_lock:
+            return self._proc is not None and self._proc.poll() is None
+
+    def stop(self, timeout=2.0):
+        """Terminates the child and joins the reader thread."""
+        self._stop_event.set()
+        with self._proc_lock:
+            proc = self._proc
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        delay = self.restart_delay
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            instrumentation.spawned(self.name)
+            try:
+                proc = subprocess.Popen(
+                    self.command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    stdin=subprocess.DEVNULL,
+                    text=True,
+                    bufsize=1, # Line buffered
+                )
+            except OSError as e:
+                instrumentation.error(self.name, "start_failed", f"Could not start {self.name} ({e})")
+                proc = None
+            if proc is not None:
+                with self._proc_lock:
+                    self._proc = proc
+                for line in proc.stdout:
+                    if not line.endswith('\n'):
+                        break # Partial last line from a dying child
+                    line = line.strip()
+                    if line:
+                        self.on_line(line)
+                proc.stdout.close()
+                returncode = proc.wait()
+                if self._stop_event.is_set():
+                    break
+                instrumentation.error(self.name, "exited", f"{self.name} exited with status {returncode}; restarting")
+            # Reset the back-off once a child has stayed up for a while
+            if time.monotonic() - started > self.max_restart_delay:
+                delay = self.restart_delay
+            self.restart_count += 1
+            if self._stop_event.wait(delay):
+                break
+            delay = min(delay * 2, self.max_restart_delay)
+        with self._proc_lock:
+            self._proc = None
+
+
+class SmiStreamBackend:
+    """
+    Telemetry backend that keeps one persistent 'nvidia-smi ... -lms <interval>'
+    process running and caches the latest parsed line per GPU (nvidia-smi prints
+    one line per GPU each interval). get_all_dynamic_status() only returns the
+    cached samples and never spawns anything.
+
+    Args:
+        interval_ms (int): Sampling interval passed to nvidia-smi.
+        command (list): Overrides the child command line (e.g. a fake script
+                        printing CSV lines, for testing).
+        stale_after (float): Seconds after which the cached sample is considered
+                             stale and None is returned. Defaults to 3 intervals.
+    """
+    name = "nvidia-smi-stream"
+
+    def __init__(self, interval_ms=1000, command=None, stale_after=None):
+        if command is None:
+            command = ["nvidia-smi", f"--query-gpu={','.join(DYNAMIC_QUERY_ITEMS)}",
+                       "--format=csv,noheader,nounits", "-lms", str(int(interval_ms))]
+        self.stale_after = stale_after if stale_after is not None else max(3 * interval_ms / 1000.0, 2.0)
+        self._lock = threading.Lock()
+        self._latest = {} # GPU index -> (GpuSample, monotonic receive time)
+        self._stream = LineStreamProcess(command, self._on_line, name="nvidia-smi stream")
+        self._stream.start()
+
+    def _on_line(self, line):
+        sample = parse_dynamic_status_line(line)
+        if sample is None:
+            return
+        with self._lock:
+            self._latest[sample.index] = (sample, time.monotonic())
+
+    def get_all_dynamic_status(self, fields=None):
+        """
+        Returns the most recent sample of every GPU streamed by nvidia-smi.
+        GPUs whose last sample is older than stale_after are left out; None is
+        returned if nothing (fresh) has arrived. The stream always carries every
+        field, so fields is accepted for interface compatibility and ignored.
+        """
+        now = time.monotonic()
+        with self._lock:
+            # Samples are replaced, never modified, once cached, so they can be shared
+            statuses = {index: sample for index, (sample, received) in self._latest.items()
+                        if now - received <= self.stale_after}
+        return statuses or None
+
+    def close(self):
+        self._stream.stop()
+
+
+# --- Backend selection ---
+# GPU_MON_BACKEND=nvml|smi-stream|smi forces a backend. By default NVML is tried
+# first, then a persistent nvidia-smi stream, then one nvidia-smi run per sample.
+_backend = None
+
+
+def _create_default_backend(streaming=True, interval_ms=1000):
+    if _device_source is not None:
+        return _device_source
+    requested = os.environ.get("GPU_MON_BACKEND", "").strip().lower()
+    if requested in ("smi", "nvidia-smi"):
+        return SmiBackend()
+    if requested not in ("smi-stream", "stream"):
+        try:
+            return NvmlBackend()
+        except Exception as e:
+            instrumentation.error("gpu_status", "nvml_unavailable", "NVML backend unavailable; falling back to nvidia-smi",
+                                  detail=str(e))
+    if streaming and shutil.which("nvidia-smi"):
+        return SmiStreamBackend(interval_ms)
+    return SmiBackend()
+
+
+def get_backend():
+    """Returns the active telemetry backend, creating the default one on first use."""
+    global _backend
+    if _backend is None:
+        _backend = _create_default_backend()
+    return _backend
+
+
+def select_backend(streaming=True, interval_ms=1000):
+    """
+    Installs the default backend for the given usage pattern and returns it.
+
+    Args:
+        streaming (bool): False for one-shot use (e.g. a single CLI query), where
+                          a streaming nvidia-smi child would only add startup
+                          latency; NVML or a plain nvidia-smi run is used instead.
+        interval_ms (int): Sampling interval for a streaming backend.
+    """
+    set_backend(_create_default_backend(streaming, interval_ms))
+    return _backend
 
+
+def set_backend(backend):
+    """
+    Replaces the active telemetry backend (closing the previous one).
+    Passing None resets to the default selection on next use.
+    """
+    global _backend
+    if _backend is not None and _backend is not backend:
+        _backend.close()
+    _backend = backend
+
+
+def shutdown():
+    """Releases backend resources (NVML handles, child processes)."""
+    set_backend(None)
+    stop_vram_temperature_stream()
+    close_vram_reader()
+
+
+# --- Simulated devices ---
+# A device source (e.g. simulated.SimulatedDevices) replaces every hardware
+# reading at once: static info, dynamic status (it is also the telemetry
+# backend) and VRAM temperature.
+_device_source = None
+
+
+def set_device_source(source):
+    """
+    Routes all readings to source, or back to the hardware for None.
+
+    source must provide get_all_static_info(), get_vram_temperature(), the
+    has_vram_helper attribute and the telemetry backend interface.
+    """
+    global _device_source
+    stop_vram_temperature_stream()
+    _device_source = source
+    set_backend(source) # None: default backend selection on next use
+
+
+def has_device_source():
+    """True if readings come from a device source (set_device_source()) instead of the hardware."""
+    return _device_source is not None
+
+
+def vram_helper_available():
+    """True if get_vram_temperature() can return readings at all (in-process reader, helper found or simulated)."""
+    if _device_source is not None:
+        return _device_source.has_vram_helper
+    return HELPER_PATH is not None or _get_sysfs_reader() is not None
+
+
+def get_all_gpu_dynamic_status(fields=None):
+    """
+    Gets dynamic status for every GPU from the active telemetry backend (NVML if
+    available, otherwise nvidia-smi) in a single batched query.
+
+    Args:
+        fields (iterable): Status keys to read (None = all). Backends that can
+                           restrict their query only read these; 'index' is
+                           always present.
+
+    Returns:
+        dict: GPU index (int) mapped to a metrics.GpuSample of parsed floats
+              (temperature, gpu_util, mem_util, mem_free, mem_used, power,
+              core_clock, mem_clock, fan_speed); missing values are NaN.
+              Treat samples as read-only, backends may share them.
+        None: If any error occurs during fetching or parsing.
+    """
+    if fields is None:
+        return get_backend().get_all_dynamic_status()
+    return get_backend().get_all_dynamic_status(fields)
+
+
+def get_gpu_dynamic_status(gpu_index=0):
+    """
+    Gets dynamic GPU status (Temp, Util GPU/Mem, Mem Free/Used, Power, Clocks, Fan)
+    for a single GPU. See get_all_gpu_dynamic_status() for the dict layout.
+
+    Returns:
+        GpuSample: Status of the GPU with the given index.
+        None: If any error occurs or the GPU is not present.
+    """
+    statuses = get_all_gpu_dynamic_status()
+    if not statuses:
+        return None
+    return statuses.get(gpu_index)
+
+# --- Compute processes ---
+# --query-compute-apps has no GPU index field: GPUs are matched by UUID
+COMPUTE_APPS_QUERY_ITEMS = ["gpu_uuid", "pid", "used_memory", "process_name"]
+_uuid_indices = {} # GPU UUID -> index, filled from the static info on demand
+_unmatched_uuids = set() # UUIDs the static info did not know
+
+
+def parse_compute_apps_output(output, uuid_indices):
+    """
+    Parses 'nvidia-smi --query-compute-apps' CSV output (COMPUTE_APPS_QUERY_ITEMS,
+    noheader, nounits). Lines of unknown GPUs or with an unparsable PID are skipped.
+
+    Returns:
+        dict: GPU index -> [(pid, used memory MiB, SM utilization %, process name)];
+              nvidia-smi does not report utilization per process, so it is MISSING.
+    """
+    processes = {}
+    for line in output.splitlines():
+        # The process name comes last and may itself contain commas
+        values = [value.strip() for value in line.split(",", len(COMPUTE_APPS_QUERY_ITEMS) - 1)]
+        if len(values) != len(COMPUTE_APPS_QUERY_ITEMS):
+            continue
+        uuid, pid, used_memory, name = values
+        index = uuid_indices.get(uuid)
+        if index is None or not pid.isdigit():
+            continue
+        try:
+            used_memory = float(used_memory)
+        except ValueError:
+            used_memory = MISSING # "[N/A]" (e.g. under WDDM or in some containers)
+        processes.setdefault(index, []).append((int(pid), used_memory, MISSING, name))
+    return processes
+
+
+def _query_compute_apps():
+    try:
+        instrumentation.spawned("nvidia-smi")
+        result = subprocess.run(
+            ["nvidia-smi", f"--query-compute-apps={','.join(COMPUTE_APPS_QUERY_ITEMS)}", "--format=csv,noheader,nounits"],
+            capture_output=True, text=True, check=True, timeout=5)
     except FileNotFoundError:
-        print("Error: 'nvidia-smi' command not found (for dynamic status).")
+        instrumentation.error("processes", "not_found", "'nvidia-smi' command not found")
         return None
     except subprocess.CalledProcessError as e:
-        print(f"Error executing nvidia-smi for dynamic status: {e}\nStderr: {e.stderr.strip()}")
+        instrumentation.error("processes", "exit_status", f"nvidia-smi exited with status {e.returncode}",
+                              detail=f"Stderr: {e.stderr.strip()}")
         return None
     except subprocess.TimeoutExpired:
-        print("Error: nvidia-smi command for dynamic status timed out.")
-        return None
-    except Exception as e:
-        print(f"An unexpected error occurred in get_gpu_dynamic_status: {e}")
+        instrumentation.error("processes", "timeout", "nvidia-smi timed out")
         return None
+    uuids = {line.split(",", 1)[0].strip() for line in result.stdout.splitlines() if line.strip()}
+    unknown = uuids - _uuid_indices.keys() - _unmatched_uuids
+    if unknown:
+        # A GPU not seen before: reload the mapping (once per UUID, MIG instances never match)
+        _uuid_indices.clear()
+        _uuid_indices.update({info["uuid"]: int(info["index"]) for info in get_all_gpu_static_info() or ()})
+        _unmatched_uuids.update(unknown - _uuid_indices.keys())
+    return parse_compute_apps_output(result.stdout, _uuid_indices)
+
+
+def get_all_gpu_processes():
+    """
+    Gets the compute processes of every GPU: from NVML if it is the active
+    backend (which also provides per-process SM utilization), otherwise with
+    one 'nvidia-smi --query-compute-apps' run.
+
+    Returns:
+        dict: GPU index -> [(pid, used memory MiB, SM utilization %, process name or None)];
+              GPUs without processes may be absent, unknown values are NaN.
+        None: If the query fails.
+    """
+    reader = getattr(get_backend(), "get_all_processes", None)
+    if reader is not None:
+        return reader()
+    return _query_compute_apps()
 
 # --- Path to the compiled C helper ---
 # Adjust this path as needed. Assumes gddr6_helper is in the same dir as core.py
@@ -129,11 +683,202 @@ if not os.path.exists(HELPER_PATH) or not os.access(HELPER_PATH, os.X_OK):
     HELPER_PATH = shutil.which(HELPER_NAME) # None if not found in PATH
 
 
+class VramTemperatureStream:
+    """
+    Keeps one 'gddr6_helper --interval-ms N' child running (via sudo -n) and
+    caches the latest reading. The helper resolves the PCI device and maps the
+    register page once, then prints one temperature per line.
+
+    Args:
+        interval_ms (int): Reading interval passed to the helper.
+        command (list): Overrides the child command line, e.g.
+                        [HELPER_PATH, '--interval-ms', '100', '--mem-path', <file>,
+                         '--device-id', '0x2786', '--bar0', '0'] for testing
+                        without hardware or root.
+        stale_after (float): Seconds after which the cached value is treated as
+                             missing. Defaults to 3 intervals.
+    """
+
+    def __init__(self, interval_ms=1000, command=None, stale_after=None):
+        if command is None:
+            command = ["sudo", "-n", HELPER_PATH, "--interval-ms", str(int(interval_ms))]
+        self.stale_after = stale_after if stale_after is not None else max(3 * interval_ms / 1000.0, 2.0)
+        self._lock = threading.Lock()
+        self._latest = None
+        self._latest_time = 0.0
+        self._stream = LineStreamProcess(command, self._on_line, name="gddr6_helper stream")
+        self._stream.start()
+
+    def _on_line(self, line):
+        try:
+            temperature = int(line)
+        except ValueError:
+            instrumentation.error("vram_temperature", "parse", "Cannot parse helper output as integer",
+                                  detail=f"Output: '{line}'")
+            return
+        with self._lock:
+            self._latest = temperature
+            self._latest_time = time.monotonic()
+
+    def get_temperature(self):
+        """
+        Returns:
+            int: Latest VRAM temperature in °C.
+            str: 'Not Supported' for a negative reading, 'N/A' if no fresh reading.
+        """
+        with self._lock:
+            if self._latest is None or time.monotonic() - self._latest_time > self.stale_after:
+                return "N/A"
+            temperature = self._latest
+        return temperature if temperature >= 0 else "Not Supported"
+
+    def close(self):
+        self._stream.stop()
+
+
+# --- In-process VRAM temperature reader ---
+# Device table shared with gddr6_helper.c (which #includes it)
+GDDR6_DEVICES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gddr6_devices.def")
+# Root of the sysfs tree to scan; a fake tree (with a regular file as resource0) works for testing
+SYSFS_ROOT = os.environ.get("GPU_MON_SYSFS_ROOT", "/sys")
+NVIDIA_VENDOR_ID = 0x10DE
+_GDDR6_DEVICE_LINE = re.compile(r'^\s*GDDR6_DEVICE\(\s*(0x[0-9A-Fa-f]+)\s*,\s*(0x[0-9A-Fa-f]+)\s*,\s*"([^"]*)"\s*,'
+                                r'\s*"([^"]*)"\s*,\s*"([^"]*)"\s*\)')
+
+
+def load_gddr6_devices(path=None):
+    """
+    Parses the shared device table (gddr6_devices.def).
+
+    Returns:
+        dict: PCI device ID (int) -> (register offset, memory type, architecture, name).
+    """
+    devices = {}
+    with open(path or GDDR6_DEVICES_PATH) as table_file:
+        for line in table_file:
+            match = _GDDR6_DEVICE_LINE.match(line)
+            if match:
+                device_id, offset, vram, arch, name = match.groups()
+                devices.setdefault(int(device_id, 16), (int(offset, 16), vram, arch, name)) # First entry wins, as in C
+    return devices
+
+
+class SysfsVramReader:
+    """
+    Reads the VRAM temperature register in-process: finds the first supported
+    Nvidia GPU under <sysfs_root>/bus/pci/devices, maps the register's page of
+    its BAR0 (the device's resource0 file) once, and then every reading is a
+    single 32-bit load from the mapping, without sudo, a child process or a
+    PCI scan.
+
+    resource0 is only readable by root unless access was granted once (see
+    README), and a kernel with strict /dev/mem checks also needs iomem=relaxed,
+    like the helper.
+
+    Args:
+        sysfs_root (str): sysfs mount point (default SYSFS_ROOT).
+        devices (dict): Device table (default: load_gddr6_devices()).
+
+    Raises:
+        LookupError: If no supported GPU is present.
+        OSError: If resource0 cannot be opened or mapped (e.g. permission denied).
+    """
+
+    def __init__(self, sysfs_root=None, devices=None):
+        import mmap
+        devices = devices if devices is not None else load_gddr6_devices()
+        self.pci_address, self.device_id, (self.offset, _vram, _arch, self.name) = self._find_device(
+            os.path.join(sysfs_root or SYSFS_ROOT, "bus", "pci", "devices"), devices)
+        page_base = self.offset - self.offset % mmap.PAGESIZE
+        path = os.path.join(sysfs_root or SYSFS_ROOT, "bus", "pci", "devices", self.pci_address, "resource0")
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            self._map = mmap.mmap(fd, mmap.PAGESIZE, mmap.MAP_SHARED, mmap.PROT_READ, offset=page_base)
+        finally:
+            os.close(fd) # The mapping stays valid without the descriptor
+        # Native 32-bit words: one aligned load per reading, as the register needs
+        self._words = memoryview(self._map).cast("I")
+        self._index = (self.offset - page_base) // 4
+
+    @staticmethod
+    def _find_device(devices_dir, devices):
+        """(PCI address, device ID, table entry) of the first supported Nvidia GPU in bus order."""
+        for address in sorted(os.listdir(devices_dir)):
+            try:
+                with open(os.path.join(devices_dir, address, "vendor")) as vendor_file:
+                    if int(vendor_file.read(), 16) != NVIDIA_VENDOR_ID:
+                        continue
+                with open(os.path.join(devices_dir, address, "device")) as device_file:
+                    device_id = int(device_file.read(), 16)
+            except (OSError, ValueError):
+                continue
+            if device_id in devices:
+                return address, device_id, devices[device_id]
+        raise LookupError(f"No supported GPU in {devices_dir}")
+
+    def read(self):
+        """VRAM temperature in °C."""
+        return (self._words[self._index] & 0x00000FFF) // 0x20
+
+    def close(self):
+        self._words.release()
+        self._map.close()
+
+
+_sysfs_reader = None # None: not tried yet, False: unavailable
+
+
+def _get_sysfs_reader():
+    global _sysfs_reader
+    if _sysfs_reader is None:
+        try:
+            _sysfs_reader = SysfsVramReader()
+        except (OSError, LookupError, ValueError) as e:
+            instrumentation.error("vram_temperature", "sysfs_unavailable",
+                                  "In-process VRAM reader unavailable; using gddr6_helper", detail=str(e))
+            _sysfs_reader = False
+    return _sysfs_reader or None
+
+
+def close_vram_reader():
+    """Unmaps the in-process reader's register page; the next reading tries to open it again."""
+    global _sysfs_reader
+    if _sysfs_reader:
+        _sysfs_reader.close()
+    _sysfs_reader = None
+
+
+_vram_stream = None
+
+
+def start_vram_temperature_stream(interval_ms=1000, command=None):
+    """
+    Switches get_vram_temperature() to a persistent helper child process.
+    Callers should probe with a one-shot get_vram_temperature() first: error
+    details (e.g. sudo refusing) are only reported by the one-shot path.
+    """
+    global _vram_stream
+    stop_vram_temperature_stream()
+    if _device_source is not None or (command is None and (HELPER_PATH is None or _get_sysfs_reader() is not None)):
+        return # Simulated and in-process readings need no helper process
+    _vram_stream = VramTemperatureStream(interval_ms, command)
+
+
+def stop_vram_temperature_stream():
+    global _vram_stream
+    if _vram_stream is not None:
+        _vram_stream.close()
+        _vram_stream = None
+
+
 def get_vram_temperature():
     """
-    Gets VRAM temperature by executing the compiled 'gddr6_helper' C program.
+    Gets VRAM temperature, in-process (SysfsVramReader) if the GPU's BAR0 can be
+    mapped, otherwise from the compiled 'gddr6_helper' C program. If a
+    streaming helper was started (start_vram_temperature_stream), returns its
+    latest cached reading; otherwise runs the helper once.
 
-    REQUIRES:
+    REQUIRES (helper):
         - The 'gddr6_helper' executable to be compiled and located at HELPER_PATH
           or in the system PATH.
         - The 'gddr6_helper' to be run with root privileges (e.g., via sudo).
@@ -145,6 +890,14 @@ def get_vram_temperature():
              if the temperature cannot be retrieved. 'Not Supported' might mean
              the GPU isn't in the helper's table or mapping failed.
     """
+    if _device_source is not None:
+        return _device_source.get_vram_temperature()
+    reader = _get_sysfs_reader()
+    if reader is not None:
+        return reader.read()
+    if _vram_stream is not None:
+        return _vram_stream.get_temperature()
+
     if HELPER_PATH is None:
         # print("VRAM Temp Error: gddr6_helper executable not found.")
         return "No Helper" # Helper program not found or not executable
@@ -153,6 +906,7 @@ def get_vram_temperature():
     command = ["sudo", "-n", HELPER_PATH] # -n: non-interactive sudo
 
     try:
+        instrumentation.spawned("gddr6_helper")
         result = subprocess.run(
             command,
             capture_output=True,
@@ -164,57 +918,57 @@ def get_vram_temperature():
         # Parse the output (expecting a single integer)
         temp_str = result.stdout.strip()
         if not temp_str: # Handle empty output case
-             print(f"VRAM Temp Error: Helper '{HELPER_PATH}' produced no output.")
+             instrumentation.error("vram_temperature", "no_output", f"Helper '{HELPER_PATH}' produced no output")
              return "Error"
 
         temperature = int(temp_str)
 
         if temperature < 0: # Helper uses -1 for internal errors typically
-             print(f"VRAM Temp Info: Helper indicated error or no compatible device (returned {temperature}).")
              # Could refine this based on specific negative return codes if added to C helper
+             instrumentation.error("vram_temperature", "not_supported",
+                                   f"Helper indicated error or no compatible device (returned {temperature})")
              return "Not Supported"
         return temperature
 
     except FileNotFoundError:
         # This would catch if 'sudo' itself isn't found, highly unlikely
-        print("VRAM Temp Error: 'sudo' command not found?")
+        instrumentation.error("vram_temperature", "not_found", "'sudo' command not found")
         return "Error"
     except subprocess.CalledProcessError as e:
         # Helper exited with a non-zero status
         stderr_output = e.stderr.strip()
+        detail = f"Stderr: {stderr_output or '(empty)'}"
         # Check if it's likely a sudo password prompt failure
         if "password is required" in stderr_output or "incorrect password attempt" in stderr_output or "sudo: a password is required" in stderr_output:
-            print("VRAM Temp Error: sudo requires a password or failed authentication.")
+            instrumentation.error("vram_temperature", "auth", "sudo requires a password or failed authentication")
             return "No Root?"
         elif "Root privileges required" in stderr_output:
-            print("VRAM Temp Error: Helper explicitly requires root (sudo might have failed).")
+            instrumentation.error("vram_temperature", "auth", "Helper explicitly requires root (sudo might have failed)")
             return "No Root?"
         elif "Memory mapping failed" in stderr_output:
-             print(f"VRAM Temp Error: Helper failed to map memory.\nStderr: {stderr_output}")
+             instrumentation.error("vram_temperature", "map_failed", "Helper failed to map memory", detail=detail)
              return "Not Supported" # Likely incompatible or requires kernel param
         elif "Could not open /dev/mem" in stderr_output:
-             print(f"VRAM Temp Error: Helper could not open /dev/mem.\nStderr: {stderr_output}")
+             instrumentation.error("vram_temperature", "auth", "Helper could not open /dev/mem", detail=detail)
              return "No Root?" # Could be permissions or other issue
         else:
             # Other errors from the helper
-            print(f"VRAM Temp Error: Helper exited with status {e.returncode}.")
-            if stderr_output:
-                print(f"  Stderr: {stderr_output}")
-            else:
-                print("  Stderr: (empty)")
+            instrumentation.error("vram_temperature", "exit_status", f"Helper exited with status {e.returncode}",
+                                  detail=detail)
             return "Error" # General helper error
 
     except subprocess.TimeoutExpired:
-        print(f"VRAM Temp Error: Helper command '{' '.join(command)}' timed out.")
+        instrumentation.error("vram_temperature", "timeout", f"Helper command '{' '.join(command)}' timed out")
         # Attempt to kill the process if possible (may need pid, complex)
         return "Timeout"
     except ValueError:
         # Output wasn't a valid integer
-        print(f"VRAM Temp Error: Cannot parse helper output '{result.stdout.strip()}' as integer.")
+        instrumentation.error("vram_temperature", "parse", "Cannot parse helper output as integer",
+                              detail=f"Output: '{result.stdout.strip()}'")
         return "Parse Err"
     except Exception as e:
         # Catch-all for other unexpected Python errors
-        print(f"An unexpected Python error occurred in get_vram_temperature: {e}")
+        instrumentation.error("vram_temperature", "exception", f"Unexpected error: {e}")
         return "Py Error"
 
 
@@ -252,14 +1006,7 @@ if __name__ == "__main__":
     print("\n--- Testing Dynamic Status ---")
     dynamic_status = get_gpu_dynamic_status()
     if dynamic_status:
-        print(f"  Temperature: {dynamic_status.get('temperature', '?')} °C")
-        print(f"  GPU Utilization: {dynamic_status.get('gpu_util', '?')} %")
-        print(f"  Memory Utilization: {dynamic_status.get('mem_util', '?')} %")
-        print(f"  Memory Free: {dynamic_status.get('mem_free', '?')} MiB")
-        print(f"  Memory Used: {dynamic_status.get('mem_used', '?')} MiB")
-        print(f"  Power Draw: {dynamic_status.get('power', '?')} W")         # Added test
-        print(f"  Core Clock: {dynamic_status.get('core_clock', '?')} MHz")   # Added test
-        print(f"  Memory Clock: {dynamic_status.get('mem_clock', '?')} MHz") # Added test
-        print(f"  Fan Speed: {dynamic_status.get('fan_speed', '?')} %")       # Added test
+        for metric in GPU_METRICS:
+            print(f"  {metric.title} {dynamic_status.format(metric.key)}")
     else:
         print("  Could not get dynamic GPU status.")
\ No newline at end of file
@@ -0,0 +1,122 @@
+# src/debug_dialog.py
+"""
+Diagnostics dialog showing the self-instrumentation (instrumentation.stats()):
+per-source latencies, error counts by category and child process spawns.
+Refreshes once a second while visible; 'Copy JSON' puts the raw stats on the
+clipboard for bug reports.
+"""
+import json
+
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                               QTableWidget, QTableWidgetItem, QHeaderView, QApplication)
+from PySide6.QtCore import Qt, QTimer
+
+from . import instrumentation
+
+
+def _cell(value):
+    if value is None:
+        text = "-"
+    elif isinstance(value, float):
+        text = f"{value:.1f}"
+    else:
+        text = str(value)
+    item = QTableWidgetItem(text)
+    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+    if not isinstance(value, str):
+        item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+    return item
+
+
+def _make_table(headers):
+    table = QTableWidget(0, len(headers))
+    table.setHorizontalHeaderLabels(headers)
+    table.verticalHeader().setVisible(False)
+    table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+    table.horizontalHeader().setStretchLastSection(True)
+    return table
+
+
+def _fill_table(table, rows):
+    table.setRowCount(len(rows))
+    for row_index, row in enumerate(rows):
+        for column, value in enumerate(row):
+            table.setItem(row_index, column, _cell(value))
+
+
+class InstrumentationDialog(QDialog):
+    """Live view of instrumentation.stats()."""
+    LATENCY_HEADERS = ["Source", "Calls", "Mean ms", "p50 ms", "p90 ms", "p99 ms", "Max ms"]
+    REFRESH_MS = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("GPU Monitor Diagnostics")
+        self.resize(640, 520)
+        layout = QVBoxLayout(self)
+
+        layout.addWidget(QLabel("<b>Latency per source</b> (percentiles over the last calls)"))
+        self.latency_table = _make_table(self.LATENCY_HEADERS)
+        layout.addWidget(self.latency_table, 2)
+
+        counters_layout = QHBoxLayout()
+        errors_layout = QVBoxLayout()
+        errors_layout.addWidget(QLabel("<b>Errors</b>"))
+        self.error_table = _make_table(["Source", "Category", "Count"])
+        errors_layout.addWidget(self.error_table)
+        counters_layout.addLayout(errors_layout, 2)
+        spawns_layout = QVBoxLayout()
+        spawns_layout.addWidget(QLabel("<b>Processes spawned</b>"))
+        self.spawn_table = _make_table(["Program", "Count"])
+        spawns_layout.addWidget(self.spawn_table)
+        counters_layout.addLayout(spawns_layout, 1)
+        layout.addLayout(counters_layout, 1)
+
+        bottom_layout = QHBoxLayout()
+        self.summary_label = QLabel()
+        bottom_layout.addWidget(self.summary_label, 1)
+        copy_button = QPushButton("Copy JSON")
+        copy_button.clicked.connect(self.copy_json)
+        bottom_layout.addWidget(copy_button)
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset_stats)
+        bottom_layout.addWidget(reset_button)
+        layout.addLayout(bottom_layout)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        stats = instrumentation.stats()
+        _fill_table(self.latency_table, [
+            [source, summary["count"], summary["mean_ms"], summary["p50_ms"], summary["p90_ms"],
+             summary["p99_ms"], summary["max_ms"]]
+            for source, summary in stats["latency"].items()])
+        _fill_table(self.error_table, [
+            [source, category, count]
+            for source, categories in stats["errors"].items() for category, count in sorted(categories.items())])
+        _fill_table(self.spawn_table, list(stats["spawns"].items()))
+        startup = stats["startup"]
+        startup_text = "".join(f", {label} after {startup[milestone]:.0f} ms" for milestone, label in
+                               (("first_paint", "first paint"), ("first_sample_shown", "first sample"))
+                               if milestone in startup)
+        self.summary_label.setText(f"Uptime {stats['uptime_s']:.0f} s{startup_text}, "
+                                   f"{stats['suppressed_log_entries']} repeated log entries suppressed")
+
+    def copy_json(self):
+        QApplication.clipboard().setText(json.dumps(instrumentation.stats(), indent=2))
+
+    def reset_stats(self):
+        instrumentation.reset()
+        self.refresh()
+
+    # Only refresh while the dialog is shown
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
@@ -0,0 +1,220 @@
+# src/exporter.py
+"""
+Headless Prometheus / OpenMetrics exporter.
+
+Sampling runs on a SampleCollector with its own schedule. A scrape only
+serializes the latest snapshot, and the rendered text is cached until the
+next snapshot arrives, so any number of concurrent scrapers cost neither
+extra nvidia-smi runs nor repeated formatting.
+
+Does not import Qt.
+"""
+import argparse
+import json
+import math
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import core, instrumentation
+from .collector import SampleCollector
+from .metrics import GPU_METRICS, VRAM_TEMPERATURE
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _render_counter(lines, name, help_text, label, counts, openmetrics):
+    # OpenMetrics names the counter family without the '_total' suffix of its samples
+    if not counts:
+        return
+    lines.append(f"# HELP {name}_total {help_text}" if not openmetrics else f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name}_total counter" if not openmetrics else f"# TYPE {name} counter")
+    for labels, count in counts:
+        label_text = ",".join(f'{key}="{_escape_label(value)}"' for key, value in zip(label, labels))
+        lines.append(f"{name}_total{{{label_text}}} {count}")
+
+
+def render_instrumentation(lines, stats, openmetrics=False):
+    """Appends the exporter's own instrumentation (instrumentation.stats()) to lines."""
+    if stats["latency"]:
+        lines.append("# HELP gpu_mon_source_latency_seconds Call latency of each data source.")
+        lines.append("# TYPE gpu_mon_source_latency_seconds histogram")
+        for source, summary in stats["latency"].items():
+            label = f'source="{_escape_label(source)}"'
+            for bound_ms, cumulative in summary["buckets"]:
+                bound = "+Inf" if bound_ms is None else _format_value(bound_ms / 1000.0)
+                lines.append(f'gpu_mon_source_latency_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"gpu_mon_source_latency_seconds_sum{{{label}}} {summary['total_s']!r}")
+            lines.append(f"gpu_mon_source_latency_seconds_count{{{label}}} {summary['count']}")
+    _render_counter(lines, "gpu_mon_source_errors", "Errors per data source and category.", ("source", "category"),
+                    [((source, category), count) for source, categories in stats["errors"].items()
+                     for category, count in sorted(categories.items())], openmetrics)
+    _render_counter(lines, "gpu_mon_process_spawns", "Child processes started per program.", ("program",),
+                    [((program,), count) for program, count in stats["spawns"].items()], openmetrics)
+
+
+def render_exposition(snapshot, static_info, openmetrics=False, stats=None):
+    """
+    Serializes a collector Snapshot in the Prometheus text format.
+
+    Args:
+        snapshot (Snapshot): Latest snapshot, or None if none has completed yet.
+        static_info (dict): GPU index -> static info dict (for uuid/name labels).
+        openmetrics (bool): Emit the OpenMetrics variant (adds '# EOF').
+        stats (dict): instrumentation.stats() to include, or None.
+
+    Returns:
+        str: Exposition text.
+    """
+    lines = []
+    lines.append("# HELP gpu_mon_up Whether the last sampling round returned GPU data.")
+    lines.append("# TYPE gpu_mon_up gauge")
+    lines.append(f"gpu_mon_up {1 if snapshot is not None and snapshot.gpus else 0}")
+    if snapshot is not None:
+        labels = {}
+        for gpu_index in sorted(snapshot.gpus):
+            info = static_info.get(gpu_index, {})
+            labels[gpu_index] = (f'gpu="{gpu_index}",uuid="{_escape_label(info.get("uuid", ""))}",'
+                                 f'name="{_escape_label(info.get("name", ""))}"')
+        for metric in GPU_METRICS:
+            name, help_text, scale = metric.export
+            samples = []
+            for gpu_index in sorted(snapshot.gpus):
+                value = snapshot.gpus[gpu_index].get(metric.key) * scale
+                if math.isfinite(value): # Missing (NaN): omit the sample rather than exporting a fake value
+                    samples.append(f"{name}{{{labels[gpu_index]}}} {_format_value(value)}")
+            if samples:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.extend(samples)
+        if isinstance(snapshot.vram_temperature, int) and 0 in labels:
+            name, help_text, scale = VRAM_TEMPERATURE.export
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{{{labels[0]}}} {_format_value(snapshot.vram_temperature * scale)}")
+        lines.append("# HELP gpu_mon_sample_timestamp_seconds Time the exported sample was taken.")
+        lines.append("# TYPE gpu_mon_sample_timestamp_seconds gauge")
+        lines.append(f"gpu_mon_sample_timestamp_seconds {snapshot.timestamp:.3f}")
+        lines.append("# HELP gpu_mon_sample_duration_seconds Time the sampling round took.")
+        lines.append("# TYPE gpu_mon_sample_duration_seconds gauge")
+        lines.append(f"gpu_mon_sample_duration_seconds {snapshot.duration:.6f}")
+    if stats is not None:
+        render_instrumentation(lines, stats, openmetrics)
+    if openmetrics:
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """
+    Caches the rendered exposition of the collector's latest snapshot. Text is
+    re-rendered at most once per snapshot and format, regardless of scrape rate.
+    """
+
+    def __init__(self, collector, static_info=None):
+        self.collector = collector
+        self.static_info = static_info or {}
+        self._lock = threading.Lock()
+        self._cache = {} # openmetrics flag -> (snapshot sequence, encoded body)
+        self.render_count = 0
+
+    def render(self, openmetrics=False):
+        """Returns the encoded exposition body for the latest snapshot."""
+        snapshot = self.collector.latest()
+        sequence = snapshot.sequence if snapshot is not None else 0
+        with self._lock:
+            cached = self._cache.get(openmetrics)
+            if cached is not None and cached[0] == sequence:
+                return cached[1]
+            body = render_exposition(snapshot, self.static_info, openmetrics,
+                                     instrumentation.stats()).encode("utf-8")
+            self._cache[openmetrics] = (sequence, body)
+            self.render_count += 1
+            return body
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    exporter = None # Set on the subclass created by make_server()
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+            body = self.exporter.render(openmetrics)
+            content_type = OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE
+            self._reply(200, content_type, body)
+        elif path == "/stats":
+            # Instrumentation (latencies, errors, spawns) as JSON, for debugging
+            self._reply(200, "application/json", json.dumps(instrumentation.stats(), indent=2).encode("utf-8"))
+        elif path == "/":
+            self._reply(200, "text/html; charset=utf-8",
+                        b"<html><body><h1>GPU Monitor exporter</h1><a href='/metrics'>Metrics</a> "
+                        b"<a href='/stats'>Stats</a></body></html>")
+        else:
+            self._reply(404, "text/plain; charset=utf-8", b"Not found\n")
+
+    def _reply(self, code, content_type, body):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # One line per scrape would flood the log
+
+
+def make_server(exporter, address="0.0.0.0", port=9835):
+    """Creates (but does not start) the HTTP server serving /metrics from exporter."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"exporter": exporter})
+    server = ThreadingHTTPServer((address, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve GPU metrics for Prometheus over HTTP.")
+    parser.add_argument("--address", default="0.0.0.0", help="listen address (default 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=9835, help="listen port (default 9835)")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="seconds between samples, independent of scrapes (default 1.0)")
+    parser.add_argument("--simulate", metavar="SPEC", help="export simulated GPUs, e.g. '64,seed=3'")
+    args = parser.parse_args(argv)
+    if args.simulate:
+        from . import simulated
+        try:
+            simulated.install(simulated.from_spec(args.simulate))
+        except ValueError as e:
+            parser.error(str(e))
+
+    static_info = {int(info["index"]): info for info in core.get_all_gpu_static_info() or []}
+    collector = SampleCollector(interval=args.interval)
+    exporter = MetricsExporter(collector, static_info)
+    server = make_server(exporter, args.address, args.port)
+    collector.start()
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt) # Clean shutdown under systemd
+    print(f"Serving metrics on http://{args.address}:{args.port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        collector.stop()
+        core.shutdown()
+    return 0
@@ -0,0 +1,313 @@
+# src/fan_control.py
+"""
+Fan curves: per-GPU temperature -> fan speed mappings evaluated on the
+collector's snapshots and written through the privileged broker.
+
+A 1 Hz loop that wrote the curve value on every sample would start
+nvidia-settings once a second (and sit behind the pkexec prompt on the
+first write). FanController therefore only writes when the target really
+moves:
+
+* hysteresis: the speed follows rising temperatures at once, but only goes
+  down once the temperature is hysteresis_c below the point that raised it;
+* dwell: a target is held for at least min_dwell_s before it changes again;
+* write-on-change: a new target is written only if it differs from the last
+  written one by min_change_pct or more (the curve's end points are always
+  written, so 'full speed' and 'idle' are reached exactly).
+
+All fans whose target changed in one update are written with a single
+broker transaction, i.e. one nvidia-settings run. The writer is any object
+with the broker's apply(items) method, so tests pass a FakeOcBroker.
+
+Config file for main.py --fan-curves (JSON):
+
+    {"hysteresis_c": 3, "min_dwell_s": 5, "min_change_pct": 5,
+     "gpus": {"0": {"points": [[40, 30], [60, 45], [75, 70], [85, 100]], "fans": [0, 1]},
+              "all": {"points": [[50, 35], [80, 100]]}}}
+
+'all' applies to every GPU without its own entry; GPUs may also be named by
+UUID (as in profiles). Fans default to the fan with the GPU's index (one
+fan per GPU).
+"""
+import bisect
+import json
+import logging
+import math
+import threading
+import time
+
+try:
+    from . import instrumentation, oc_broker
+    from .metrics import is_missing
+except ImportError:
+    import instrumentation, oc_broker # Running fan_control.py directly from src/
+    from metrics import is_missing
+
+DEFAULT_HYSTERESIS_C = 3.0
+DEFAULT_MIN_DWELL_S = 5.0
+DEFAULT_MIN_CHANGE_PCT = 5
+# Seconds without a temperature reading before the fans are set to the curve's maximum
+DEFAULT_FAILSAFE_S = 10.0
+
+
+class FanCurve:
+    """
+    Piecewise-linear temperature (°C) -> fan speed (%) curve, flat beyond
+    its first and last points.
+
+    Args:
+        points (iterable): (temperature, speed) pairs; temperatures strictly
+                           increasing after sorting, speeds within 0-100.
+
+    Raises:
+        ValueError: For an empty curve, duplicate temperatures or speeds out of range.
+    """
+
+    def __init__(self, points):
+        points = sorted((float(temperature), float(speed)) for temperature, speed in points)
+        if not points:
+            raise ValueError("A fan curve needs at least one point.")
+        for (temperature, _speed), (next_temperature, _next_speed) in zip(points, points[1:]):
+            if next_temperature == temperature:
+                raise ValueError(f"Duplicate fan curve temperature {temperature:g} °C.")
+        if any(not 0.0 <= speed <= 100.0 for _temperature, speed in points):
+            raise ValueError("Fan curve speeds must be between 0 and 100 %.")
+        self.points = points
+        self._temperatures = [temperature for temperature, _speed in points]
+        self.min_speed = min(speed for _temperature, speed in points)
+        self.max_speed = max(speed for _temperature, speed in points)
+
+    def speed_at(self, temperature):
+        """Fan speed (%) for temperature (°C)."""
+        position = bisect.bisect_right(self._temperatures, temperature)
+        if position == 0:
+            return self.points[0][1]
+        if position == len(self.points):
+            return self.points[-1][1]
+        (low_temperature, low_speed), (high_temperature, high_speed) = self.points[position - 1], self.points[position]
+        return low_speed + (high_speed - low_speed) * (temperature - low_temperature) / (high_temperature - low_temperature)
+
+    def __repr__(self):
+        return f"FanCurve({[(t, s) for t, s in self.points]!r})"
+
+
+class _FanState:
+    """Control state of one GPU."""
+    __slots__ = ("target", "anchor_temperature", "changed_at", "written", "last_reading")
+
+    def __init__(self):
+        self.target = None             # Speed the controller wants (%)
+        self.anchor_temperature = None # Temperature that set the current target
+        self.changed_at = None         # Time the target last changed
+        self.written = None            # Last speed written successfully (%)
+        self.last_reading = None       # Time of the last valid temperature
+
+
+class FanController:
+    """
+    Evaluates fan curves on telemetry snapshots and writes changed targets.
+
+    update() is synchronous and does the actual work (call it directly in
+    tests). As a collector sink (append_snapshot()), snapshots are handed to
+    a worker thread instead, so a slow write or the first authentication
+    prompt never stalls sampling; snapshots arriving meanwhile are coalesced
+    into the newest one.
+
+    Args:
+        curves (dict): GPU index -> FanCurve.
+        fans (dict): GPU index -> fan indices written for it (default [gpu index]).
+        writer: Object with apply(items) -> [(success, message)] (default: the OC broker).
+        hysteresis_c (float): Temperature drop (°C) needed before the speed is lowered.
+        min_dwell_s (float): Minimum seconds between target changes of a GPU.
+        min_change_pct (float): Minimum difference to the last written speed for a write.
+        failsafe_s (float): Seconds without a temperature before the curve's maximum is set.
+        clock (callable): Monotonic time source (replaceable for testing).
+    """
+
+    def __init__(self, curves, fans=None, writer=None, hysteresis_c=DEFAULT_HYSTERESIS_C,
+                 min_dwell_s=DEFAULT_MIN_DWELL_S, min_change_pct=DEFAULT_MIN_CHANGE_PCT,
+                 failsafe_s=DEFAULT_FAILSAFE_S, clock=time.monotonic):
+        self.curves = dict(curves)
+        self.fans = {gpu: list((fans or {}).get(gpu, [gpu])) for gpu in self.curves}
+        self.writer = writer
+        self.hysteresis_c = hysteresis_c
+        self.min_dwell_s = min_dwell_s
+        self.min_change_pct = min_change_pct
+        self.failsafe_s = failsafe_s
+        self._clock = clock
+        self._states = {gpu: _FanState() for gpu in self.curves}
+        self._lock = threading.Lock() # Serializes update() and release()
+        self._pending = None
+        self._pending_event = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config, gpu_indices, uuids=None, **kwargs):
+        """
+        Builds a controller from a parsed config file (see module docstring).
+
+        Args:
+            config (dict): Parsed JSON.
+            gpu_indices (iterable): GPUs present; 'all' expands to these.
+            uuids (dict): GPU index -> UUID, for entries keyed by UUID.
+
+        Raises:
+            ValueError: For invalid curves or unknown GPU indices.
+        """
+        gpu_indices = list(gpu_indices)
+        uuids = uuids or {}
+        curves, fans = {}, {}
+        entries = config.get("gpus", {})
+        for gpu in gpu_indices:
+            entry = entries.get(str(gpu)) or entries.get(uuids.get(gpu)) or entries.get("all")
+            if entry is not None:
+                curves[gpu] = FanCurve(entry["points"])
+                if "fans" in entry:
+                    fans[gpu] = [int(fan) for fan in entry["fans"]]
+        unknown = set(entries) - {"all"} - {str(gpu) for gpu in gpu_indices} - set(uuids.values())
+        for key in sorted(key for key in unknown if key.startswith("GPU-")):
+            logging.warning(f"Fan curve for GPU {key} skipped: not present.") # Boards come and go
+        unknown = sorted(key for key in unknown if not key.startswith("GPU-"))
+        if unknown:
+            raise ValueError(f"Fan curve for unknown GPU(s): {', '.join(unknown)}")
+        for key in ("hysteresis_c", "min_dwell_s", "min_change_pct", "failsafe_s"):
+            if key in config:
+                kwargs.setdefault(key, float(config[key]))
+        return cls(curves, fans=fans, **kwargs)
+
+    @classmethod
+    def from_file(cls, path, gpu_indices, **kwargs):
+        with open(path) as config_file:
+            return cls.from_config(json.load(config_file), gpu_indices, **kwargs)
+
+    def _apply(self, items):
+        writer = self.writer if self.writer is not None else oc_broker.get_broker()
+        with instrumentation.timed("fan_write"):
+            return writer.apply(items)
+
+    # --- Control ---
+    def _next_target(self, gpu, state, temperature, now):
+        """New target speed for gpu, or None to keep the current one."""
+        curve = self.curves[gpu]
+        if temperature is None:
+            if state.last_reading is None:
+                state.last_reading = now # Grace period starts with the first sample
+            # No reading for too long: run the fans at the curve's maximum
+            if now - state.last_reading < self.failsafe_s:
+                return None
+            return curve.max_speed if state.target != curve.max_speed else None
+        state.last_reading = now
+        speed = curve.speed_at(temperature)
+        if state.target is None:
+            return speed
+        if speed > state.target:
+            pass # Rising: follow the curve
+        elif speed < state.target and temperature <= state.anchor_temperature - self.hysteresis_c:
+            # Falling far enough: take the speed of a point hysteresis_c warmer, so the
+            # fans do not step down and straight back up around the anchor
+            speed = max(curve.speed_at(temperature + self.hysteresis_c), speed)
+            if speed >= state.target:
+                return None
+        else:
+            return None
+        if now - state.changed_at < self.min_dwell_s and speed < curve.max_speed:
+            return None # Too soon (reaching the maximum is never delayed)
+        return speed
+
+    def _needs_write(self, gpu, state):
+        if state.written is None:
+            return True
+        if state.target == state.written:
+            return False
+        curve = self.curves[gpu]
+        return (abs(state.target - state.written) >= self.min_change_pct
+                or state.target in (curve.min_speed, curve.max_speed))
+
+    def update(self, snapshot):
+        """
+        Evaluates the curves on one Snapshot and writes the changed fan targets
+        with one writer.apply() call.
+
+        Returns:
+            dict: GPU index -> speed (%) written in this update (empty if none).
+        """
+        now = self._clock()
+        with self._lock:
+            if self._stopped:
+                return {}
+            changed = {}
+            for gpu, state in self._states.items():
+                sample = snapshot.gpus.get(gpu) if snapshot is not None else None
+                temperature = sample.get("temperature") if sample is not None else None
+                if temperature is not None and is_missing(temperature):
+                    temperature = None
+                target = self._next_target(gpu, state, temperature, now)
+                if target is not None:
+                    if target != state.target:
+                        state.changed_at = now
+                        # After a failsafe the first valid reading may lower the speed right away
+                        state.anchor_temperature = temperature if temperature is not None else math.inf
+                    state.target = target
+                if state.target is not None and self._needs_write(gpu, state):
+                    changed[gpu] = int(round(state.target))
+            if not changed:
+                return {}
+            items = [{"op": "fan_speed", "gpu": gpu, "fan": fan, "value": speed}
+                     for gpu, speed in changed.items() for fan in self.fans[gpu]]
+            replies = self._apply(items)
+            written = {}
+            position = 0
+            for gpu, speed in changed.items():
+                gpu_replies = replies[position:position + len(self.fans[gpu])]
+                position += len(self.fans[gpu])
+                failures = [message for success, message in gpu_replies if not success]
+                if failures:
+                    # Retried on the next sample; the log limiter collapses repeats
+                    instrumentation.error("fan_write", "write_failed", failures[0])
+                else:
+                    self._states[gpu].written = speed
+                    written[gpu] = speed
+            if written:
+                logging.info(f"Fan targets written: {written}")
+            return written
+
+    def release(self):
+        """Returns every controlled fan to automatic (driver) control and stops controlling."""
+        with self._lock:
+            self._stopped = True
+            touched = [gpu for gpu, state in self._states.items() if state.written is not None]
+            if not touched:
+                return []
+            return self._apply([{"op": "fan_auto", "gpu": gpu} for gpu in touched])
+
+    # --- Collector sink ---
+    def append_snapshot(self, snapshot):
+        """Collector sink interface: queues snapshot for the worker thread."""
+        self._pending = snapshot
+        self._pending_event.set()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="gpu-mon-fans", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._pending_event.wait()
+            self._pending_event.clear()
+            snapshot, self._pending = self._pending, None
+            if self._stopped:
+                return
+            if snapshot is not None:
+                try:
+                    self.update(snapshot)
+                except Exception as e:
+                    instrumentation.error("fan_write", "exception", type(e).__name__, detail=str(e))
+
+    def stop(self, timeout=2.0):
+        """Stops the worker thread and hands the fans back to the driver."""
+        results = self.release()
+        self._pending_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        return results
@@ -3,7 +3,7 @@
 // This code is heavily based on and adapted from the gddr6 project by olealgoritme:
 // https://github.com/olealgoritme/gddr6
 // Many thanks for their work in identifying the required offsets and method.
-// Modifications made for single-run execution and simplified output.
+// Modifications made for single-run and streaming execution and simplified output.
 // ************************
 
 #define _GNU_SOURCE
@@ -18,13 +18,14 @@
 #include <errno.h>
 #include <fcntl.h>
 #include <sys/mman.h>
+#include <signal.h>
+#include <time.h>
 #include <pci/pci.h>
-// Removed signal.h as we don't need the cleanup handler for a single run
 
 #define PG_SZ sysconf(_SC_PAGE_SIZE)
 #define PRINT_ERROR_STDERR(msg) fprintf(stderr, "Error: %s (at %s:%d)\n", msg, __FILE__, __LINE__)
 
-// --- Device Struct and Table (Copied from original) ---
+// --- Device Struct and Table (entries in gddr6_devices.def, shared with core.py) ---
 struct device {
     uint32_t offset;
     uint16_t dev_id;
@@ -42,57 +43,39 @@ struct device {
 };
 
 struct device dev_table[] = {
-    { .offset = 0x0000E2A8, .dev_id = 0x2684, .vram = "GDDR6X", .arch = "AD102", .name =  "RTX 4090" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2685, .vram = "GDDR6X", .arch = "AD102", .name =  "RTX 4090 D" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2702, .vram = "GDDR6X", .arch = "AD103", .name =  "RTX 4080 Super" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2704, .vram = "GDDR6X", .arch = "AD103", .name =  "RTX 4080" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2705, .vram = "GDDR6X", .arch = "AD103", .name =  "RTX 4070 Ti Super" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2782, .vram = "GDDR6X", .arch = "AD104", .name =  "RTX 4070 Ti" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2783, .vram = "GDDR6X", .arch = "AD104", .name =  "RTX 4070 Super" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2786, .vram = "GDDR6X", .arch = "AD104", .name =  "RTX 4070" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2860, .vram = "GDDR6",  .arch = "AD106", .name =  "RTX 4070 Max-Q / Mobile" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2203, .vram = "GDDR6X", .arch = "GA102", .name =  "RTX 3090 Ti" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2204, .vram = "GDDR6X", .arch = "GA102", .name =  "RTX 3090" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2208, .vram = "GDDR6X", .arch = "GA102", .name =  "RTX 3080 Ti" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2206, .vram = "GDDR6X", .arch = "GA102", .name =  "RTX 3080" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2216, .vram = "GDDR6X", .arch = "GA102", .name =  "RTX 3080 LHR" },
-    { .offset = 0x0000EE50, .dev_id = 0x2484, .vram = "GDDR6",  .arch = "GA104", .name =  "RTX 3070" },
-    { .offset = 0x0000EE50, .dev_id = 0x2488, .vram = "GDDR6",  .arch = "GA104", .name =  "RTX 3070 LHR" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2531, .vram = "GDDR6",  .arch = "GA106", .name =  "RTX A2000" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2571, .vram = "GDDR6",  .arch = "GA106", .name =  "RTX A2000" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2232, .vram = "GDDR6",  .arch = "GA102", .name =  "RTX A4500" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2231, .vram = "GDDR6",  .arch = "GA102", .name =  "RTX A5000" },
-    { .offset = 0x0000E2A8, .dev_id = 0x26B1, .vram = "GDDR6",  .arch = "AD102", .name =  "RTX A6000" },
-    { .offset = 0x0000E2A8, .dev_id = 0x27b8, .vram = "GDDR6",  .arch = "AD104", .name =  "L4" },
-    { .offset = 0x0000E2A8, .dev_id = 0x26b9, .vram = "GDDR6",  .arch = "AD102", .name =  "L40S" },
-    { .offset = 0x0000E2A8, .dev_id = 0x2236, .vram = "GDDR6",  .arch = "GA102", .name =  "A10" },
+#define GDDR6_DEVICE(id, register_offset, vram_type, chip, model) \
+    { .offset = register_offset, .dev_id = id, .vram = vram_type, .arch = chip, .name = model },
+#include "gddr6_devices.def"
+#undef GDDR6_DEVICE
 };
 // -------------------------------------------------------
 
-int main(int argc, char *argv[]) {
-    int fd = -1;
+static volatile sig_atomic_t keep_running = 1;
+
+static void handle_stop_signal(int sig) {
+    (void)sig;
+    keep_running = 0;
+}
+
+static void print_usage(const char *prog) {
+    fprintf(stderr,
+            "Usage: %s [--interval-ms N] [--mem-path PATH] [--device-id ID --bar0 ADDR]\n"
+            "  (no options)      Print one VRAM temperature reading and exit.\n"
+            "  --interval-ms N   Keep running and print one reading every N ms.\n"
+            "  --mem-path PATH   Read registers from PATH instead of /dev/mem\n"
+            "                    (e.g. a regular file, for testing without root).\n"
+            "  --device-id ID    Skip the PCI scan and use this device ID ...\n"
+            "  --bar0 ADDR       ... with this BAR0 address (both hex or decimal).\n",
+            prog);
+}
+
+// Finds the first PCI device listed in dev_table and records its BAR0.
+static struct device *find_device(void) {
     struct pci_access *pacc = NULL;
     struct pci_dev *pci_dev = NULL;
     struct device *found_device = NULL; // Pointer to the found device info in dev_table
     ssize_t dev_table_size = (sizeof(dev_table) / sizeof(struct device));
-    void *mapped_addr = MAP_FAILED;
-    int temp = -1; // Use -1 to indicate error/not found
-
-    // 1. Check privileges early (doesn't guarantee /dev/mem access but is a hint)
-    if (geteuid() != 0) {
-         PRINT_ERROR_STDERR("Root privileges required to access /dev/mem.");
-         return 1; // Exit with error
-    }
-
-    // 2. Open /dev/mem
-    fd = open("/dev/mem", O_RDONLY | O_SYNC); // Added O_SYNC
-    if (fd == -1) {
-        PRINT_ERROR_STDERR("Could not open /dev/mem");
-        perror("  Reason");
-        return 1;
-    }
 
-    // 3. Find the first compatible PCI device
     pacc = pci_alloc();
     pci_init(pacc);
     pci_scan_bus(pacc);
@@ -112,6 +95,81 @@ int main(int argc, char *argv[]) {
 
 device_found:
     pci_cleanup(pacc); // Clean up PCI access resources
+    return found_device;
+}
+
+// Looks up a device ID in dev_table without touching the PCI bus.
+static struct device *lookup_device(uint16_t dev_id, pciaddr_t bar0) {
+    ssize_t dev_table_size = (sizeof(dev_table) / sizeof(struct device));
+    for (uint32_t i = 0; i < dev_table_size; ++i) {
+        if (dev_table[i].dev_id == dev_id) {
+            dev_table[i].bar0 = bar0;
+            return &dev_table[i];
+        }
+    }
+    return NULL;
+}
+
+static int read_temperature(const struct device *found_device) {
+    // Calculate the virtual address pointing to the exact physical offset
+    void *virt_addr = (uint8_t *)found_device->mapped_addr + (found_device->phys_addr - found_device->base_offset);
+    uint32_t read_result = *((volatile uint32_t *)virt_addr); // Add volatile
+    return ((read_result & 0x00000fff) / 0x20);
+}
+
+int main(int argc, char *argv[]) {
+    int fd = -1;
+    struct device *found_device = NULL;
+    void *mapped_addr = MAP_FAILED;
+    const char *mem_path = "/dev/mem";
+    long interval_ms = -1; // < 0: single reading
+    long override_dev_id = -1;
+    long long override_bar0 = -1;
+
+    // 0. Parse options
+    for (int i = 1; i < argc; ++i) {
+        if (strcmp(argv[i], "--interval-ms") == 0 && i + 1 < argc) {
+            interval_ms = strtol(argv[++i], NULL, 0);
+            if (interval_ms <= 0) {
+                PRINT_ERROR_STDERR("--interval-ms must be positive");
+                return 1;
+            }
+        } else if (strcmp(argv[i], "--mem-path") == 0 && i + 1 < argc) {
+            mem_path = argv[++i];
+        } else if (strcmp(argv[i], "--device-id") == 0 && i + 1 < argc) {
+            override_dev_id = strtol(argv[++i], NULL, 0);
+        } else if (strcmp(argv[i], "--bar0") == 0 && i + 1 < argc) {
+            override_bar0 = strtoll(argv[++i], NULL, 0);
+        } else {
+            print_usage(argv[0]);
+            return 1;
+        }
+    }
+    if ((override_dev_id < 0) != (override_bar0 < 0)) {
+        PRINT_ERROR_STDERR("--device-id and --bar0 must be given together");
+        return 1;
+    }
+
+    // 1. Check privileges early (doesn't guarantee /dev/mem access but is a hint)
+    if (strcmp(mem_path, "/dev/mem") == 0 && geteuid() != 0) {
+         PRINT_ERROR_STDERR("Root privileges required to access /dev/mem.");
+         return 1; // Exit with error
+    }
+
+    // 2. Open /dev/mem (or the override)
+    fd = open(mem_path, O_RDONLY | O_SYNC); // Added O_SYNC
+    if (fd == -1) {
+        fprintf(stderr, "Error: Could not open %s (at %s:%d)\n", mem_path, __FILE__, __LINE__);
+        perror("  Reason");
+        return 1;
+    }
+
+    // 3. Find the first compatible PCI device (once, also in streaming mode)
+    if (override_dev_id >= 0) {
+        found_device = lookup_device((uint16_t)override_dev_id, (pciaddr_t)override_bar0);
+    } else {
+        found_device = find_device();
+    }
 
     if (found_device == NULL) {
         // Optional: Print to stderr if needed, but Python will handle no output
@@ -120,7 +178,7 @@ device_found:
         return 1; // Exit, indicating no compatible device found
     }
 
-    // 4. Calculate addresses and Map Memory
+    // 4. Calculate addresses and Map Memory (kept mapped for the whole run)
     found_device->phys_addr = (found_device->bar0 + found_device->offset);
     found_device->base_offset = found_device->phys_addr & ~(PG_SZ - 1); // Align to page size
 
@@ -133,19 +191,32 @@ device_found:
         close(fd);
         return 1;
     }
-
-    // 5. Read Temperature
-    // Calculate the virtual address pointing to the exact physical offset
-    void *virt_addr = (uint8_t *)mapped_addr + (found_device->phys_addr - found_device->base_offset);
-    uint32_t read_result = *((volatile uint32_t *)virt_addr); // Add volatile
-    temp = ((read_result & 0x00000fff) / 0x20);
+    found_device->mapped_addr = mapped_addr;
+
+    if (interval_ms < 0) {
+        // 5. Read Temperature and print ONLY the value to stdout
+        printf("%d\n", read_temperature(found_device));
+    } else {
+        // 5. Streaming mode: one reading per line until stopped or stdout closes
+        struct sigaction sa;
+        memset(&sa, 0, sizeof(sa));
+        sa.sa_handler = handle_stop_signal;
+        sigaction(SIGTERM, &sa, NULL);
+        sigaction(SIGINT, &sa, NULL);
+        signal(SIGPIPE, SIG_IGN); // Detect a closed pipe through the write error instead
+
+        struct timespec delay = { .tv_sec = interval_ms / 1000, .tv_nsec = (interval_ms % 1000) * 1000000L };
+        while (keep_running) {
+            if (printf("%d\n", read_temperature(found_device)) < 0 || fflush(stdout) != 0) {
+                break; // Reader went away
+            }
+            nanosleep(&delay, NULL); // Interrupted early by SIGTERM, loop condition handles it
+        }
+    }
 
     // 6. Unmap and Close
     munmap(mapped_addr, PG_SZ);
     close(fd);
 
-    // 7. Print ONLY the temperature value to stdout
-    printf("%d\n", temp);
-
     return 0; // Success
-}
\ No newline at end of file
+}
@@ -0,0 +1,276 @@
+# src/history.py
+import math
+import threading
+
+import numpy as np
+
+from .metrics import ALL_METRIC_KEYS, GPU_METRIC_KEYS
+
+# Metrics recorded per GPU, in column order (the registry's GPU metrics, then
+# VRAM temperature). VRAM temperature is only known for the GPU the helper
+# reads (index 0), the column stays NaN for the others.
+HISTORY_METRICS = ALL_METRIC_KEYS
+
+# Default retention: 1 h of raw 1 s samples, 24 h of 10 s rollups, 7 days of 60 s rollups
+DEFAULT_RAW_CAPACITY = 3600
+DEFAULT_ROLLUP_TIERS = ((10, 8640), (60, 10080))
+
+
+class _Ring:
+    """
+    Fixed-capacity ring of rows sharing one timestamp column. All arrays are
+    allocated up front; appending writes in place and never allocates.
+    """
+
+    def __init__(self, capacity, shape, columns):
+        self.capacity = capacity
+        self.timestamps = np.full(capacity, np.nan, dtype=np.float64)
+        self.columns = {name: np.full((capacity,) + shape, np.nan, dtype=np.float32) for name in columns}
+        self.head = 0 # Next slot to write
+        self.size = 0
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + sum(a.nbytes for a in self.columns.values())
+
+    def append(self, timestamp, **rows):
+        slot = self.head
+        self.timestamps[slot] = timestamp
+        for name, row in rows.items():
+            self.columns[name][slot] = row
+        self.head = (slot + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def oldest_timestamp(self):
+        if self.size == 0:
+            return math.inf
+        return self.timestamps[(self.head - self.size) % self.capacity]
+
+    def covers(self, start):
+        """True if no data newer than start has been overwritten yet."""
+        return self.size < self.capacity or self.oldest_timestamp() <= start
+
+    def range_indices(self, start, end):
+        """
+        Returns the physical slot indices of rows with start <= t <= end in time
+        order. The ring holds at most two sorted runs, each searched with
+        np.searchsorted, so no rows outside the range are touched.
+        """
+        if self.size == 0:
+            return np.empty(0, dtype=np.intp)
+        if self.size < self.capacity:
+            runs = [(0, self.size)] # Not wrapped yet
+        else:
+            runs = [(self.head, self.capacity), (0, self.head)]
+        parts = []
+        for lo, hi in runs:
+            segment = self.timestamps[lo:hi]
+            i = np.searchsorted(segment, start, side="left")
+            j = np.searchsorted(segment, end, side="right")
+            if j > i:
+                parts.append(np.arange(lo + i, lo + j))
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+
+class _RollupAccumulator:
+    """Running min/sum/max/count of the samples in the current rollup bucket."""
+
+    def __init__(self, step, shape):
+        self.step = step
+        self.bucket = None
+        self.count = np.zeros(shape, dtype=np.int32)
+        self.total = np.zeros(shape, dtype=np.float64)
+        self.minimum = np.full(shape, np.nan, dtype=np.float64)
+        self.maximum = np.full(shape, np.nan, dtype=np.float64)
+        self.mean = np.full(shape, np.nan, dtype=np.float64)
+        self._valid = np.zeros(shape, dtype=bool)
+
+    def reset(self, bucket):
+        self.bucket = bucket
+        self.count.fill(0)
+        self.total.fill(0.0)
+        self.minimum.fill(np.nan)
+        self.maximum.fill(np.nan)
+
+    def add(self, values):
+        np.isfinite(values, out=self._valid)
+        np.add(self.count, self._valid, out=self.count, casting="unsafe")
+        np.add(self.total, values, out=self.total, where=self._valid)
+        np.fmin(self.minimum, values, out=self.minimum) # fmin/fmax skip NaN
+        np.fmax(self.maximum, values, out=self.maximum)
+
+    def compute_mean(self):
+        self.mean.fill(np.nan)
+        np.divide(self.total, self.count, out=self.mean, where=self.count > 0)
+        return self.mean
+
+
+class HistoryStore:
+    """
+    Bounded in-memory time series of GPU metrics.
+
+    Raw samples go into a preallocated ring of shape (capacity, gpus, metrics)
+    with a shared timestamp column. Each append is O(1) and writes in place.
+    Every rollup tier (e.g. 10 s, 60 s) keeps min/mean/max of the raw samples
+    per bucket in its own ring, so long-range queries read a few thousand
+    rollup rows instead of raw data. Total memory is fixed at construction
+    (see nbytes).
+
+    Thread-safe: the collector thread appends while the GUI thread queries.
+
+    Args:
+        gpu_count (int): Number of GPUs (indices 0..gpu_count-1) to record.
+        metrics (tuple): Metric names, one column each.
+        raw_capacity (int): Number of raw samples retained.
+        rollup_tiers (tuple): (step_seconds, capacity) pairs, finest first.
+    """
+
+    def __init__(self, gpu_count, metrics=HISTORY_METRICS, raw_capacity=DEFAULT_RAW_CAPACITY,
+                 rollup_tiers=DEFAULT_ROLLUP_TIERS):
+        self.gpu_count = gpu_count
+        self.metrics = tuple(metrics)
+        self.metric_index = {name: i for i, name in enumerate(self.metrics)}
+        shape = (gpu_count, len(self.metrics))
+        self._lock = threading.Lock()
+        self._raw = _Ring(raw_capacity, shape, ("value",))
+        self._tiers = [(step, _Ring(capacity, shape, ("min", "mean", "max")), _RollupAccumulator(step, shape))
+                       for step, capacity in sorted(rollup_tiers)]
+        # Reused buffer for converting snapshots, so appends don't allocate arrays
+        self._scratch = np.full(shape, np.nan, dtype=np.float64)
+
+    @property
+    def nbytes(self):
+        """Total bytes held by the preallocated arrays (constant for the store's lifetime)."""
+        total = self._raw.nbytes + self._scratch.nbytes
+        for _step, ring, acc in self._tiers:
+            total += ring.nbytes + acc.count.nbytes + acc.total.nbytes * 4 + acc._valid.nbytes
+        return total
+
+    @property
+    def tier_steps(self):
+        """Available resolutions in seconds; 0 is the raw tier."""
+        return (0,) + tuple(step for step, _ring, _acc in self._tiers)
+
+    def append(self, timestamp, values):
+        """
+        Appends one sample for all GPUs.
+
+        Args:
+            timestamp (float): Sample time in seconds (time.time()); must not go backwards.
+            values: Array-like of shape (gpu_count, len(metrics)), NaN for missing values.
+        """
+        with self._lock:
+            self._raw.append(timestamp, value=values)
+            for step, ring, acc in self._tiers:
+                bucket = math.floor(timestamp / step)
+                if acc.bucket is None:
+                    acc.reset(bucket)
+                elif bucket != acc.bucket:
+                    ring.append(acc.bucket * step, min=acc.minimum, mean=acc.compute_mean(), max=acc.maximum)
+                    acc.reset(bucket)
+                acc.add(values)
+
+    def append_snapshot(self, snapshot):
+        """Appends a collector Snapshot to the store."""
+        self.append(snapshot.timestamp, snapshot_to_values(snapshot, self.metric_index, self._scratch))
+
+    def select_tier(self, start):
+        """Returns the finest tier step (0 = raw) whose retained data reaches back to start."""
+        with self._lock:
+            if self._raw.covers(start):
+                return 0
+            for step, ring, _acc in self._tiers:
+                if ring.covers(start):
+                    return step
+            return self._tiers[-1][0] if self._tiers else 0
+
+    def query(self, metric, start=-math.inf, end=math.inf, gpu=None, step=None, stat="mean"):
+        """
+        Returns the samples of one metric between start and end (inclusive).
+
+        Args:
+            metric (str): Metric name from self.metrics.
+            gpu (int): GPU index, or None for all GPUs.
+            step (int): Tier to read (0 = raw, or a rollup step). By default the
+                        finest tier covering start is used (see select_tier).
+            stat (str): 'min', 'mean' or 'max' for rollup tiers (ignored for raw).
+
+        Returns:
+            tuple: (timestamps, values) NumPy arrays. values has shape (n,) for a
+                   single GPU or (n, gpu_count) otherwise.
+        """
+        timestamps, (values,) = self._read(metric, start, end, gpu, step, (stat,))
+        return timestamps, values
+
+    def query_envelope(self, metric, start=-math.inf, end=math.inf, gpu=None, step=None):
+        """
+        Like query(), but returns the per-bucket minimum and maximum of a
+        rollup tier (for raw data both are the samples themselves), read
+        together so they describe the same rows.
+
+        Returns:
+            tuple: (timestamps, mins, maxs) NumPy arrays, shaped as in query().
+        """
+        timestamps, (mins, maxs) = self._read(metric, start, end, gpu, step, ("min", "max"))
+        return timestamps, mins, maxs
+
+    def _read(self, metric, start, end, gpu, step, stats):
+        if step is None:
+            step = self.select_tier(start)
+        column = self.metric_index[metric]
+        with self._lock:
+            if step == 0:
+                ring = self._raw
+                columns = [ring.columns["value"]] * len(stats)
+            else:
+                ring = next(r for s, r, _a in self._tiers if s == step)
+                columns = [ring.columns[stat] for stat in stats]
+            rows = ring.range_indices(start, end)
+            timestamps = ring.timestamps[rows]
+            if gpu is None:
+                values = [data[rows, :, column] for data in columns]
+            else:
+                values = [data[rows, gpu, column] for data in columns]
+        return timestamps, values
+
+    def latest(self):
+        """Returns (timestamp, values) of the newest raw sample, or None if empty."""
+        with self._lock:
+            if self._raw.size == 0:
+                return None
+            slot = (self._raw.head - 1) % self._raw.capacity
+            return self._raw.timestamps[slot], self._raw.columns["value"][slot].copy()
+
+
+def snapshot_to_values(snapshot, metric_index, out):
+    """
+    Fills out (shape (gpus, metrics), float) from a collector Snapshot.
+    GPUs beyond out's first dimension are ignored; missing values become NaN.
+
+    Args:
+        snapshot (Snapshot): Collector snapshot.
+        metric_index (dict): Metric name -> column in out.
+        out (ndarray): Preallocated buffer, overwritten and returned.
+    """
+    out.fill(np.nan)
+    gpu_count = out.shape[0]
+    # Registry order: a sample's values are the leading columns and are copied in one go
+    leading = all(metric_index.get(name) == position for position, name in enumerate(GPU_METRIC_KEYS))
+    for gpu_index, sample in snapshot.gpus.items():
+        if gpu_index >= gpu_count:
+            continue
+        if leading:
+            out[gpu_index, :len(GPU_METRIC_KEYS)] = np.frombuffer(sample.values, dtype=np.float64)
+        else:
+            row = out[gpu_index]
+            for position, name in enumerate(GPU_METRIC_KEYS):
+                column = metric_index.get(name)
+                if column is not None:
+                    row[column] = sample.values[position]
+    column = metric_index.get("vram_temperature")
+    if isinstance(snapshot.vram_temperature, int) and gpu_count and column is not None:
+        out[0, column] = snapshot.vram_temperature
+    return out
@@ -0,0 +1,224 @@
+# src/instrumentation.py
+"""
+Self-instrumentation: how long each data source and GUI update takes, how
+often they fail (by category) and how many child processes were spawned.
+
+Sources report through the module-level functions (timed(), observe(),
+error(), spawned()), which feed one process-wide Instrumentation. stats()
+returns everything as plain dicts for the debug dialog and the exporter.
+
+A startup trace records when milestones of the launch (window created, first
+paint, first sample) were first reached, relative to the process start.
+
+Errors are also logged, but identical ones (same source, category and
+message) are collapsed: the first occurrence is logged immediately, repeats
+within ERROR_LOG_INTERVAL are only counted and summarized in the next entry.
+A source failing on every 1 s tick therefore logs about once a minute instead
+of flooding the log.
+
+Standard library only, so core and the headless entry points can use it.
+"""
+import bisect
+import contextlib
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger("gpu_mon")
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# Latencies kept per source for the percentiles
+RECENT_SAMPLES = 512
+# Seconds during which repeats of a logged error are only counted
+ERROR_LOG_INTERVAL = 60.0
+
+
+class LatencyHistogram:
+    """
+    Call latencies of one source: fixed buckets over the whole run (cheap to
+    export) plus the most recent RECENT_SAMPLES values for percentiles.
+    Not thread-safe on its own; Instrumentation serializes access.
+    """
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, seconds):
+        milliseconds = seconds * 1000.0
+        self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS_MS, milliseconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(milliseconds)
+
+    def summary(self):
+        """
+        Returns:
+            dict: count, total_s, mean/max and recent p50/p90/p99 in ms, and
+                  'buckets' as [upper bound ms (None = +inf), cumulative count] pairs.
+        """
+        recent = sorted(self.recent)
+        summary = {
+            "count": self.count,
+            "total_s": round(self.total, 6),
+            "mean_ms": round(self.total / self.count * 1000.0, 3) if self.count else None,
+            "max_ms": round(self.max * 1000.0, 3),
+        }
+        for percent in (50, 90, 99):
+            summary[f"p{percent}_ms"] = round(recent[min(len(recent) * percent // 100, len(recent) - 1)], 3) if recent else None
+        cumulative = 0
+        buckets = []
+        for bound, bucket_count in zip(LATENCY_BUCKETS_MS + (None,), self.bucket_counts):
+            cumulative += bucket_count
+            buckets.append([bound, cumulative])
+        summary["buckets"] = buckets
+        return summary
+
+
+class Instrumentation:
+    """
+    Thread-safe counters and histograms for all sources of one process.
+
+    Args:
+        log_interval (float): Seconds repeats of a logged error are only counted.
+        clock (callable): Monotonic time source (replaceable for testing).
+    """
+
+    def __init__(self, log_interval=ERROR_LOG_INTERVAL, clock=time.monotonic):
+        self.log_interval = log_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._started = self._clock()
+            self._latency = {} # source -> LatencyHistogram
+            self._errors = {}  # source -> {category: count}
+            self._spawns = {}  # tool -> count
+            self._log_state = {} # (source, category, message) -> [last logged time, suppressed count]
+            self._suppressed_total = 0
+
+    @contextlib.contextmanager
+    def timed(self, source):
+        """Times the with-block as one call of source; an escaping exception also counts as an error."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.error(source, "exception", type(e).__name__, detail=str(e))
+            raise
+        finally:
+            self.observe(source, time.perf_counter() - started)
+
+    def observe(self, source, seconds):
+        with self._lock:
+            histogram = self._latency.get(source)
+            if histogram is None:
+                histogram = self._latency[source] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def spawned(self, tool):
+        """Counts one child process start of tool."""
+        with self._lock:
+            self._spawns[tool] = self._spawns.get(tool, 0) + 1
+
+    def error(self, source, category, message, detail=None):
+        """
+        Counts an error and logs it, collapsing identical repeats.
+
+        Args:
+            source (str): Failing source, e.g. 'gpu_status'.
+            category (str): Short machine-readable kind, e.g. 'timeout', 'not_found'.
+            message (str): Human-readable text; part of the de-duplication key, so
+                           keep changing values (raw output, PIDs) out of it.
+            detail (str): Extra context logged with the entry but not compared.
+        """
+        now = self._clock()
+        key = (source, category, message)
+        with self._lock:
+            per_source = self._errors.setdefault(source, {})
+            per_source[category] = per_source.get(category, 0) + 1
+            state = self._log_state.get(key)
+            if state is not None and now - state[0] < self.log_interval:
+                state[1] += 1
+                self._suppressed_total += 1
+                return
+            repeats = state[1] if state is not None else 0
+            self._log_state[key] = [now, 0]
+            if len(self._log_state) > 256:
+                self._prune_log_state(now)
+        text = f"{source} [{category}]: {message}"
+        if repeats:
+            text += f" ({repeats} identical errors suppressed in the last {self.log_interval:.0f} s)"
+        if detail:
+            text += f"\n  {detail}"
+        logger.warning(text, extra={"source": source, "category": category, "repeats": repeats})
+
+    def _prune_log_state(self, now):
+        # Forget errors that have not occurred for a while (lock held)
+        for key, (last_logged, _suppressed) in list(self._log_state.items()):
+            if now - last_logged >= 2 * self.log_interval:
+                del self._log_state[key]
+
+    def stats(self):
+        """
+        Returns:
+            dict: {'uptime_s', 'latency': {source: LatencyHistogram.summary()},
+                   'errors': {source: {category: count}}, 'spawns': {tool: count},
+                   'suppressed_log_entries': int, 'startup': startup_trace()}
+        """
+        with self._lock:
+            return {
+                "uptime_s": round(self._clock() - self._started, 3),
+                "latency": {source: histogram.summary() for source, histogram in sorted(self._latency.items())},
+                "errors": {source: dict(categories) for source, categories in sorted(self._errors.items())},
+                "spawns": dict(sorted(self._spawns.items())),
+                "suppressed_log_entries": self._suppressed_total,
+                "startup": startup_trace(),
+            }
+
+
+# --- Startup trace ---
+# Not part of Instrumentation: a reset of the counters must not lose it
+_startup_lock = threading.Lock()
+_startup_origin = time.perf_counter() # Replaced by main.py with its own first timestamp
+_startup_marks = {} # milestone -> ms after the origin
+
+
+def set_startup_origin(origin):
+    """Measures the startup trace from origin (a time.perf_counter() value) instead of this module's import."""
+    global _startup_origin
+    with _startup_lock:
+        _startup_origin = origin
+
+
+def startup_mark(milestone):
+    """Records that milestone was reached now; later calls for the same milestone are ignored."""
+    now = time.perf_counter()
+    with _startup_lock:
+        if milestone not in _startup_marks:
+            _startup_marks[milestone] = round((now - _startup_origin) * 1000.0, 1)
+
+
+def startup_trace():
+    """Milestone -> milliseconds after the process start, in the order they were reached."""
+    with _startup_lock:
+        return dict(_startup_marks)
+
+
+# --- Process-wide instance ---
+_instrumentation = Instrumentation()
+
+timed = _instrumentation.timed
+observe = _instrumentation.observe
+spawned = _instrumentation.spawned
+error = _instrumentation.error
+stats = _instrumentation.stats
+reset = _instrumentation.reset
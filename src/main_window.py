@@ -1,239 +1,566 @@
 # src/main_window.py
 
+import logging
+import os
 import sys
+import threading
 from PySide6.QtWidgets import ( QMainWindow, QLabel, QApplication, QWidget,
-                              QVBoxLayout, QGridLayout, QGroupBox, QPushButton ) # Added QPushButton
-from PySide6.QtCore import QTimer, Slot, Qt
-from PySide6.QtGui import QFont
+                              QVBoxLayout, QGridLayout, QGroupBox, QPushButton,
+                              QScrollArea, QHBoxLayout, QComboBox, QTabWidget )
+from PySide6.QtCore import QObject, Signal, Slot, Qt, QEvent
+from PySide6.QtGui import QFont, QKeySequence, QShortcut
 
 # Import core module using RELATIVE import
 try:
-    from . import core
-    from .oc_window import OCWindow # Import the new OCWindow class
+    from . import core, instrumentation, static_cache
+    from .collector import SampleCollector
+    from .history import HistoryStore
+    from .metrics import GPU_METRICS
+    from .plot_widget import MetricPlotWidget
+    from .recording import HistoryRecorder, SessionReplayer
+    from .fan_control import FanController
+    from .alerts import AlertEngine
+    from .processes import ProcessMonitor
+    from .process_table import ProcessTable
 except ImportError as e:
      print(f"CRITICAL Error importing module: {e}")
      print("Ensure core.py and oc_window.py exist in the 'src' directory.")
      sys.exit(1)
 
 
-class MainWindow(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("GPU Monitor QT")
-        # self.resize(450, 500) # Optional: Adjust size for more content including button
+class SnapshotBridge(QObject):
+    """
+    Carries 'new snapshot available' notifications from the collector thread to
+    the GUI thread through a queued signal. While one notification is waiting to
+    be handled, further ones are dropped: the GUI always renders the latest
+    snapshot anyway, so bursts coalesce into a single repaint.
+    """
+    snapshot_ready = Signal()
 
-        # --- Instance variable to hold the OC window ---
-        self.oc_window_instance = None
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pending = threading.Event()
 
-        # --- Main Layout Setup ---
-        central_widget = QWidget(self)
-        self.setCentralWidget(central_widget)
-        main_layout = QVBoxLayout(central_widget) # Vertical layout
+    def notify(self, _snapshot=None):
+        # Called from the collector thread
+        if not self._pending.is_set():
+            self._pending.set()
+            self.snapshot_ready.emit()
+
+    def acknowledge(self):
+        # Called from the GUI thread before rendering
+        self._pending.clear()
+
+
+class GpuPanel(QGroupBox):
+    """
+    Hardware information and live status for a single GPU, plus a button to
+    open the OC settings window for that GPU.
+    """
+    STATIC_ROWS = [
+        ("name", "GPU Name:"),
+        ("vram", "Total VRAM:"),
+        ("driver", "Driver Version:"),
+        ("pcie_max_gen", "Max PCIe Gen:"),
+    ]
+    ALERT_STYLE = "color: #d32f2f;" # Value labels of metrics with an active alert
 
-        # --- Static GPU Info Section (remains the same) ---
+    def __init__(self, gpu_index, parent=None):
+        super().__init__(f"GPU {gpu_index}", parent)
+        self.gpu_index = gpu_index
+        layout = QVBoxLayout(self)
+        value_font = QFont(); value_font.setBold(True)
+
+        # --- Static GPU Info Section ---
         self.static_info_group = QGroupBox("GPU Hardware Information")
-        main_layout.addWidget(self.static_info_group)
+        layout.addWidget(self.static_info_group)
         static_info_layout = QGridLayout(self.static_info_group)
-        # (Static labels setup as before)
-        self.gpu_name_label = QLabel("GPU Name:")
-        self.gpu_name_value = QLabel("Loading...")
-        self.vram_label = QLabel("Total VRAM:")
-        self.vram_value = QLabel("Loading...")
-        self.driver_label = QLabel("Driver Version:")
-        self.driver_value = QLabel("Loading...")
-        self.pcie_label = QLabel("Max PCIe Gen:")
-        self.pcie_value = QLabel("Loading...")
-        value_font_static = QFont(); value_font_static.setBold(True)
-        self.gpu_name_value.setFont(value_font_static)
-        self.vram_value.setFont(value_font_static)
-        self.driver_value.setFont(value_font_static)
-        self.pcie_value.setFont(value_font_static)
-        static_info_layout.addWidget(self.gpu_name_label, 0, 0); static_info_layout.addWidget(self.gpu_name_value, 0, 1)
-        static_info_layout.addWidget(self.vram_label, 1, 0); static_info_layout.addWidget(self.vram_value, 1, 1)
-        static_info_layout.addWidget(self.driver_label, 2, 0); static_info_layout.addWidget(self.driver_value, 2, 1)
-        static_info_layout.addWidget(self.pcie_label, 3, 0); static_info_layout.addWidget(self.pcie_value, 3, 1)
-
-        # --- Dynamic GPU Status Section (remains the same) ---
+        self.static_values = {}
+        for row, (key, title) in enumerate(self.STATIC_ROWS):
+            value_label = QLabel("Loading..."); value_label.setFont(value_font)
+            static_info_layout.addWidget(QLabel(title), row, 0); static_info_layout.addWidget(value_label, row, 1)
+            self.static_values[key] = value_label
+
+        # --- Dynamic GPU Status Section ---
         self.dynamic_status_group = QGroupBox("GPU Device Status")
-        main_layout.addWidget(self.dynamic_status_group)
+        layout.addWidget(self.dynamic_status_group)
         dynamic_status_layout = QGridLayout(self.dynamic_status_group)
-        # (Dynamic labels setup as before, including VRAM temp)
-        self.temp_label_title = QLabel("Temperature:")
-        self.temp_value = QLabel("Loading...")
-        self.gpu_util_label_title = QLabel("GPU Utilization:")
-        self.gpu_util_value = QLabel("Loading...")
-        self.mem_util_label_title = QLabel("Memory Utilization:")
-        self.mem_util_value = QLabel("Loading...")
-        self.mem_free_label_title = QLabel("Memory Free:")
-        self.mem_free_value = QLabel("Loading...")
-        self.mem_used_label_title = QLabel("Memory Used:")
-        self.mem_used_value = QLabel("Loading...")
-        self.power_label_title = QLabel("Power Draw:")
-        self.power_value = QLabel("Loading...")
-        self.core_clock_label_title = QLabel("Core Clock:")
-        self.core_clock_value = QLabel("Loading...")
-        self.mem_clock_label_title = QLabel("Memory Clock:")
-        self.mem_clock_value = QLabel("Loading...")
-        self.fan_speed_label_title = QLabel("Fan Speed:")
-        self.fan_speed_value = QLabel("Loading...")
-        self.vram_temp_label_title = QLabel("VRAM Temperature:")
-        self.vram_temp_value = QLabel("Loading...")
-        value_font_dynamic = QFont(); value_font_dynamic.setBold(True)
-        # Apply font to all value labels
-        for label_val in [self.temp_value, self.gpu_util_value, self.mem_util_value,
-                          self.mem_free_value, self.mem_used_value, self.power_value,
-                          self.core_clock_value, self.mem_clock_value, self.fan_speed_value,
-                          self.vram_temp_value]:
-            label_val.setFont(value_font_dynamic)
+        self.status_values = {}
         row = 0
-        dynamic_status_layout.addWidget(self.temp_label_title, row, 0); dynamic_status_layout.addWidget(self.temp_value, row, 1); row += 1
-        dynamic_status_layout.addWidget(self.gpu_util_label_title, row, 0); dynamic_status_layout.addWidget(self.gpu_util_value, row, 1); row += 1
-        dynamic_status_layout.addWidget(self.mem_util_label_title, row, 0); dynamic_status_layout.addWidget(self.mem_util_value, row, 1); row += 1
-        dynamic_status_layout.addWidget(self.mem_free_label_title, row, 0); dynamic_status_layout.addWidget(self.mem_free_value, row, 1); row += 1
-        dynamic_status_layout.addWidget(self.mem_used_label_title, row, 0); dynamic_status_layout.addWidget(self.mem_used_value, row, 1); row += 1
-        dynamic_status_layout.addWidget(self.power_label_title, row, 0); dynamic_status_layout.addWidget(self.power_value, row, 1); row += 1
-        dynamic_status_layout.addWidget(self.core_clock_label_title, row, 0); dynamic_status_layout.addWidget(self.core_clock_value, row, 1); row += 1
-        dynamic_status_layout.addWidget(self.mem_clock_label_title, row, 0); dynamic_status_layout.addWidget(self.mem_clock_value, row, 1); row += 1
-        dynamic_status_layout.addWidget(self.fan_speed_label_title, row, 0); dynamic_status_layout.addWidget(self.fan_speed_value, row, 1); row += 1
+        for metric in GPU_METRICS: # One row per registry metric, in display order
+            value_label = QLabel("Loading..."); value_label.setFont(value_font)
+            dynamic_status_layout.addWidget(QLabel(metric.title), row, 0); dynamic_status_layout.addWidget(value_label, row, 1); row += 1
+            self.status_values[metric.key] = value_label
+        self._status_labels = [self.status_values[metric.key] for metric in GPU_METRICS]
+        self._status_texts = [None] * len(GPU_METRICS) # Last text set per row
+        # VRAM temperature comes from the helper, not the telemetry backend
+        self.vram_temp_label_title = QLabel("VRAM Temperature:")
+        self.vram_temp_value = QLabel("Loading..."); self.vram_temp_value.setFont(value_font)
         dynamic_status_layout.addWidget(self.vram_temp_label_title, row, 0); dynamic_status_layout.addWidget(self.vram_temp_value, row, 1); row += 1
-
+        self._alert_labels = dict(self.status_values, vram_temperature=self.vram_temp_value)
+        self._alerted = frozenset()
 
         # --- OC Settings Button ---
         self.oc_button = QPushButton("OC Settings")
-        self.oc_button.clicked.connect(self.open_oc_settings_window)
-        main_layout.addWidget(self.oc_button) # Add button at the bottom of the main layout
+        layout.addWidget(self.oc_button)
+
+    def set_static_info(self, info):
+        if info:
+            if info.get("host"):
+                # GPU of a remote node (see remote.Aggregator): overclocking only works locally
+                self.setTitle(f"{info['host']} GPU {info.get('remote_index', '?')}: {info.get('name', 'N/A')}")
+                self.oc_button.setEnabled(False)
+                self.oc_button.setToolTip("Overclocking is only available on the machine itself.")
+            else:
+                self.setTitle(f"GPU {self.gpu_index}: {info.get('name', 'N/A')}")
+            for key, value_label in self.static_values.items():
+                value_label.setText(info.get(key, "N/A"))
+        else:
+            for value_label in self.static_values.values():
+                value_label.setText("Error")
 
+    def set_status(self, sample):
+        """Shows a GpuSample (None = no data). Labels whose text did not change are not touched."""
+        texts = self._status_texts
+        for position, metric in enumerate(GPU_METRICS):
+            text = metric.format(sample.values[position]) if sample is not None else "N/A"
+            if text != texts[position]:
+                texts[position] = text
+                self._status_labels[position].setText(text)
 
-        # --- Load Initial Static Data & Start Timer ---
-        self.load_static_gpu_info()
+    def set_alerts(self, metrics):
+        """Highlights the value labels of metrics (set of metric keys) and resets the others."""
+        metrics = frozenset(metrics)
+        for key in metrics ^ self._alerted:
+            label = self._alert_labels.get(key)
+            if label is not None:
+                label.setStyleSheet(self.ALERT_STYLE if key in metrics else "")
+        self._alerted = metrics
+
+    def set_vram_row_visible(self, visible):
+        self.vram_temp_label_title.setVisible(visible)
+        self.vram_temp_value.setVisible(visible)
+
+
+class MainWindow(QMainWindow):
+    # Static info revalidated in the background (list of dicts or None; emitted from that thread)
+    static_info_fetched = Signal(object)
+    # Emitted once with instrumentation.startup_trace() when the first sample is on screen
+    startup_complete = Signal(dict)
+    # Panels per row before wrapping in the grid
+    PANEL_COLUMNS = 4
+    # (tab title, [(history metric, label), ...], unit)
+    GRAPH_TABS = [
+        ("Temperature", [("temperature", "Core"), ("vram_temperature", "VRAM")], "°C"),
+        ("Utilization", [("gpu_util", "GPU"), ("mem_util", "Memory")], "%"),
+        ("Power", [("power", "Power Draw"), ("power_limit", "Limit")], "W"),
+        ("Clocks", [("core_clock", "Core"), ("mem_clock", "Memory")], "MHz"),
+    ]
+    GRAPH_WINDOWS = [("5 min", 300), ("1 hour", 3600), ("24 hours", 86400)]
+
+    def __init__(self, record_path=None, replay_path=None, replay_speed=1.0, fan_curves=None, aggregate=None,
+                 alerts=None):
+        """
+        Args:
+            record_path (str): If set, every snapshot is appended to this recording file.
+            replay_path (str): If set, play this recording instead of sampling hardware.
+            replay_speed (float): Replay rate (1.0 = real time, 0 = as fast as possible).
+            fan_curves (dict): Parsed fan curve config (see fan_control.py); enables fan control.
+            aggregate (tuple): (host, port) to receive remote agents on instead of reading
+                               local GPUs (see remote.py). Raises OSError if it cannot be bound.
+            alerts (AlertEngine): Alert rules evaluated on every snapshot (default: alerts.DEFAULT_RULES).
+        """
+        super().__init__()
+        self.setWindowTitle("GPU Monitor QT")
+        # self.resize(450, 500) # Optional: Adjust size for more content including button
+
+        # --- OC windows, one per GPU index ---
+        self.oc_windows = {}
+        # --- Diagnostics dialog (F12) ---
+        self.debug_dialog = None
+        QShortcut(QKeySequence(Qt.Key.Key_F12), self, activated=self.open_debug_dialog)
+
+        # --- Main Layout Setup ---
+        central_widget = QWidget(self)
+        self.setCentralWidget(central_widget)
+        self.main_layout = QVBoxLayout(central_widget)
+        # Panels live in a scrollable grid so nodes with many GPUs stay usable
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        self.main_layout.addWidget(scroll_area, 1)
+        panels_widget = QWidget()
+        scroll_area.setWidget(panels_widget)
+        self.panel_layout = QGridLayout(panels_widget)
+        self.panels = {} # GPU index -> GpuPanel
+        self.static_info = {} # GPU index -> static info dict
+
+        # --- Load Initial Static Data & Start Background Sampling ---
         self._vram_helper_checked = False # For VRAM temp helper
         self._vram_helper_available = False
-        self.timer = QTimer(self)
-        self.timer.setInterval(1000)
-        self.timer.timeout.connect(self.update_dynamic_status)
-        self.timer.start()
-        self.update_dynamic_status() # Initial update
-
-    def load_static_gpu_info(self):
-        # ... (remains the same) ...
-        print("Fetching static GPU info...")
-        info = core.get_gpu_static_info()
-        if info:
-            self.gpu_name_value.setText(info.get("name", "N/A"))
-            self.vram_value.setText(info.get("vram", "N/A"))
-            self.driver_value.setText(info.get("driver", "N/A"))
-            self.pcie_value.setText(info.get("pcie_max_gen", "N/A"))
-            print("Static info loaded successfully.")
+        self._rendered_sequence = 0
+        self.recorder = None
+        self.fan_controller = None
+        self.alert_engine = alerts if alerts is not None else AlertEngine()
+        self._alerts_version = 0
+        self.process_monitor = None
+        self._processes_version = 0
+        self._aggregating = bool(aggregate) and not replay_path
+        self._static_info_pending = False # Placeholder panels wait for the background fetch
+        self._deferred_fan_curves = None # start_fan_control() before the static info arrived
+        self._startup_reported = False
+        # Sampling runs on the collector thread; the GUI only renders finished snapshots
+        self.snapshot_bridge = SnapshotBridge(self)
+        self.snapshot_bridge.snapshot_ready.connect(self._on_snapshot_ready, Qt.ConnectionType.QueuedConnection)
+        if replay_path:
+            # Replay feeds recorded snapshots through the same rendering path
+            replayer = SessionReplayer(replay_path, speed=replay_speed, on_snapshot=self._on_collector_snapshot)
+            self.setWindowTitle(f"GPU Monitor QT - Replay of {os.path.basename(replay_path)}")
+            self.load_static_gpu_info(replayer.static_info)
+            gpu_count = max(replayer.file.gpu_count, 1)
+        elif aggregate:
+            from .remote import REMOTE_HISTORY_GPUS # asyncio is only imported when aggregating
+            self.setWindowTitle(f"GPU Monitor QT - Agents on port {aggregate[1]}")
+            gpu_count = REMOTE_HISTORY_GPUS # Remote GPUs arrive later; graphs cover the first ones
+            self._vram_helper_checked = True # The helper reading is not forwarded by agents
+        else:
+            # Recordings and fan curves need the GPUs' static info before sampling starts
+            gpu_count = self._load_initial_static_info(blocking=bool(record_path or fan_curves is not None))
+        # Bounded time series of every metric, fed by the collector (for graphs)
+        self.history = HistoryStore(gpu_count=gpu_count)
+        self._build_graphs()
+        if replay_path:
+            replayer.history = self.history
+            self.collector = replayer
+        elif aggregate:
+            from .remote import Aggregator
+            self.collector = Aggregator(aggregate[0], aggregate[1], on_snapshot=self._on_collector_snapshot,
+                                        history=self.history)
         else:
-            error_text = "Error"
-            self.gpu_name_value.setText(error_text)
-            self.vram_value.setText(error_text)
-            self.driver_value.setText(error_text)
-            self.pcie_value.setText(error_text)
+            sinks = []
+            if record_path:
+                self.recorder = HistoryRecorder(record_path, gpu_count,
+                                                static_info=[self.static_info[i] for i in sorted(self.static_info)])
+                sinks.append(self.recorder)
+            if fan_curves is not None:
+                self.fan_controller = self._create_fan_controller(fan_curves)
+                if self.fan_controller is not None:
+                    sinks.append(self.fan_controller)
+            self.collector = SampleCollector(interval=1.0, on_snapshot=self._on_collector_snapshot,
+                                             history=self.history, sinks=sinks)
+            self._build_process_table()
+        self.collector.start()
+
+    def _load_initial_static_info(self, blocking=False):
+        """
+        Static info of the local GPUs: from the on-disk cache if it matches the
+        running driver and boot, otherwise placeholder panels ("Loading...")
+        for the GPUs the driver reports. Either way nvidia-smi then runs in the
+        background, and its result replaces the placeholders or a stale cache.
+
+        Args:
+            blocking (bool): On a cache miss, query right away instead.
+
+        Returns:
+            int: Number of GPUs to keep history for.
+        """
+        cached = static_cache.load()
+        if cached is None and (blocking or core.has_device_source()): # Simulated devices answer in-process
+            print("Fetching static GPU info...")
+            self.load_static_gpu_info(static_cache.fetch_and_store() or [])
+            return max(len(self.static_info), 1)
+        if cached is None:
+            print("Fetching static GPU info in the background...")
+            self._static_info_pending = True
+            for gpu_index in range(static_cache.gpu_count_hint() or 1):
+                self._get_panel(gpu_index)
+        else:
+            self.load_static_gpu_info(cached)
+        self._cached_static_info = cached
+        self.static_info_fetched.connect(self._on_static_info_fetched, Qt.ConnectionType.QueuedConnection)
+        threading.Thread(target=lambda: self.static_info_fetched.emit(static_cache.fetch_and_store()),
+                         name="static-info", daemon=True).start()
+        return max(len(self.static_info), len(self.panels), 1)
+
+    @Slot(object)
+    def _on_static_info_fetched(self, infos):
+        if self._static_info_pending:
+            self._static_info_pending = False
+            self.load_static_gpu_info(infos or [])
+            if self._deferred_fan_curves is not None:
+                fan_curves, self._deferred_fan_curves = self._deferred_fan_curves, None
+                self.start_fan_control(fan_curves)
+        elif infos and infos != self._cached_static_info:
+            logging.info("Static GPU info changed since it was cached; reloading it.")
+            self.load_static_gpu_info(infos)
+
+    def _create_fan_controller(self, fan_curves):
+        """FanController for the local GPUs, or None (logged) if the curves do not fit them."""
+        try:
+            return FanController.from_config(fan_curves, sorted(self.static_info),
+                                             uuids={index: info.get("uuid") for index, info in self.static_info.items()})
+        except (ValueError, KeyError, TypeError) as e:
+            logging.error(f"Fan curves not applied: {e}")
+            return None
+
+    def start_fan_control(self, fan_curves):
+        """
+        Starts fan control once the window is running (e.g. from the startup
+        profile). Only for local GPUs, and only if no curves are active yet;
+        waits for the static info if the GPUs' UUIDs are not known yet.
+        """
+        if self.fan_controller is not None or not isinstance(self.collector, SampleCollector):
+            return
+        if self._static_info_pending:
+            self._deferred_fan_curves = fan_curves
+            return
+        self.fan_controller = self._create_fan_controller(fan_curves)
+        if self.fan_controller is not None:
+            self.collector.sinks.append(self.fan_controller)
+            self._update_collector_visibility() # Full-rate sampling from now on
+
+    def _build_graphs(self):
+        """History graphs below the panels; only the visible tab ever repaints."""
+        self.graphs_group = QGroupBox("History")
+        graphs_layout = QVBoxLayout(self.graphs_group)
+        window_layout = QHBoxLayout()
+        window_layout.addStretch()
+        window_layout.addWidget(QLabel("Time window:"))
+        self.graph_window_combo = QComboBox()
+        for label, seconds in self.GRAPH_WINDOWS:
+            self.graph_window_combo.addItem(label, seconds)
+        self.graph_window_combo.currentIndexChanged.connect(self._on_graph_window_changed)
+        window_layout.addWidget(self.graph_window_combo)
+        graphs_layout.addLayout(window_layout)
+        self.graph_tabs = QTabWidget()
+        self.graphs = []
+        for title, metrics, unit in self.GRAPH_TABS:
+            graph = MetricPlotWidget(self.history, metrics, unit, window_seconds=self.GRAPH_WINDOWS[0][1])
+            self.graph_tabs.addTab(graph, title)
+            self.graphs.append(graph)
+        graphs_layout.addWidget(self.graph_tabs)
+        self.main_layout.addWidget(self.graphs_group)
+
+    def _build_process_table(self):
+        """Compute processes of the local GPUs, refreshed on their own slower cadence."""
+        self.processes_group = QGroupBox("Processes")
+        processes_layout = QVBoxLayout(self.processes_group)
+        self.process_table = ProcessTable()
+        processes_layout.addWidget(self.process_table)
+        self.main_layout.addWidget(self.processes_group)
+        # Same coalescing hand-over to the GUI thread as for snapshots
+        self.process_bridge = SnapshotBridge(self)
+        self.process_bridge.snapshot_ready.connect(self._on_processes_ready, Qt.ConnectionType.QueuedConnection)
+        self.process_monitor = ProcessMonitor(on_update=self.process_bridge.notify)
+        self.process_monitor.start()
+
+    @Slot()
+    def _on_processes_ready(self):
+        self.process_bridge.acknowledge()
+        version, rows = self.process_monitor.latest()
+        if version != self._processes_version:
+            self._processes_version = version
+            with instrumentation.timed("gui_processes"):
+                self.process_table.update_rows(rows)
+
+    @Slot(int)
+    def _on_graph_window_changed(self, _index):
+        seconds = self.graph_window_combo.currentData()
+        for graph in self.graphs:
+            graph.set_window_seconds(seconds)
+
+    def _get_panel(self, gpu_index):
+        """Returns the panel for a GPU, creating it (and its grid slot) on first sight."""
+        panel = self.panels.get(gpu_index)
+        if panel is None:
+            panel = GpuPanel(gpu_index)
+            panel.oc_button.clicked.connect(lambda checked=False, i=gpu_index: self.open_oc_settings_window(i))
+            if not self._static_info_pending:
+                panel.set_static_info(self.static_info.get(gpu_index))
+            # VRAM temperature is only known for the first GPU (see update_dynamic_status)
+            panel.set_vram_row_visible(gpu_index == 0 and (self._vram_helper_available or not self._vram_helper_checked))
+            position = len(self.panels)
+            self.panel_layout.addWidget(panel, position // self.PANEL_COLUMNS, position % self.PANEL_COLUMNS)
+            self.panels[gpu_index] = panel
+        return panel
+
+    def load_static_gpu_info(self, infos=None):
+        """Fills the panels' hardware info, querying nvidia-smi unless infos is given."""
+        if infos is None:
+            print("Fetching static GPU info...")
+            infos = core.get_all_gpu_static_info()
+        if infos:
+            for info in infos:
+                gpu_index = int(info["index"])
+                self.static_info[gpu_index] = info
+                self._get_panel(gpu_index).set_static_info(info)
+            instrumentation.startup_mark("static_info")
+            print(f"Static info loaded successfully ({len(infos)} GPU(s)).")
+        else:
+            for panel in self.panels.values():
+                panel.set_static_info(None)
             print("Failed to load static GPU info. Is nvidia-smi working?")
 
+    def _on_collector_snapshot(self, snapshot):
+        # Collector thread: every snapshot is evaluated, even those the GUI coalesces away
+        instrumentation.startup_mark("first_sample")
+        self.alert_engine.append_snapshot(snapshot)
+        self.snapshot_bridge.notify(snapshot)
+
     @Slot()
-    def update_dynamic_status(self):
-        # ... (remains mostly the same, including VRAM temp logic) ...
-        status = core.get_gpu_dynamic_status()
-        if status:
-            def format_value(key, unit, default_val="?"):
-                val = status.get(key, default_val)
-                if val == "N/A": return "N/A"
-                return f"{val} {unit}"
-            self.temp_value.setText(format_value("temperature", "°C"))
-            self.gpu_util_value.setText(format_value("gpu_util", "%"))
-            self.mem_util_value.setText(format_value("mem_util", "%"))
-            self.mem_free_value.setText(format_value("mem_free", "MiB"))
-            self.mem_used_value.setText(format_value("mem_used", "MiB"))
-            self.power_value.setText(format_value("power", "W"))
-            self.core_clock_value.setText(format_value("core_clock", "MHz"))
-            self.mem_clock_value.setText(format_value("mem_clock", "MHz"))
-            self.fan_speed_value.setText(format_value("fan_speed", "%"))
+    def _on_snapshot_ready(self):
+        self.snapshot_bridge.acknowledge()
+        self.update_dynamic_status()
+
+    def update_dynamic_status(self, snapshot=None):
+        """
+        Renders a sampling snapshot (the collector's latest one by default).
+        Never performs I/O; snapshots that were already rendered are skipped.
+        """
+        if snapshot is None:
+            snapshot = self.collector.latest()
+            if snapshot is None or snapshot.sequence == self._rendered_sequence:
+                return
+        self._rendered_sequence = snapshot.sequence
+        with instrumentation.timed("gui_update"):
+            self._render_snapshot(snapshot)
+        if not self._startup_reported:
+            instrumentation.startup_mark("first_sample_shown")
+            self._report_startup()
+
+    def _report_startup(self):
+        """Logs the startup trace once both the first paint and the first sample happened."""
+        trace = instrumentation.startup_trace()
+        if self._startup_reported or "first_paint" not in trace or "first_sample_shown" not in trace:
+            return
+        self._startup_reported = True
+        logging.info("Startup: " + ", ".join(f"{milestone} {ms:.0f} ms" for milestone, ms in trace.items()))
+        self.startup_complete.emit(trace)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._startup_reported:
+            instrumentation.startup_mark("first_paint")
+            self._report_startup()
+
+    def _render_snapshot(self, snapshot):
+        for graph in self.graphs:
+            graph.notify_new_data(snapshot.timestamp)
+
+        # One batched query for all GPUs; panels are created for new indices
+        statuses = snapshot.gpus
+        if self._aggregating and any(index not in self.panels for index in statuses):
+            self.load_static_gpu_info(self.collector.static_info) # Agents joined
+        if statuses:
+            for gpu_index in sorted(statuses):
+                self._get_panel(gpu_index).set_status(statuses[gpu_index])
+            for gpu_index, panel in self.panels.items():
+                if gpu_index not in statuses:
+                    panel.set_status(None)
         else:
-            error_text = "N/A"
-            self.temp_value.setText(error_text)
-            self.gpu_util_value.setText(error_text)
-            self.mem_util_value.setText(error_text)
-            self.mem_free_value.setText(error_text)
-            self.mem_used_value.setText(error_text)
-            self.power_value.setText(error_text)
-            self.core_clock_value.setText(error_text)
-            self.mem_clock_value.setText(error_text)
-            self.fan_speed_value.setText(error_text)
-
-        vram_temp_status = "N/A"
-        if not self._vram_helper_checked:
-             if core.HELPER_PATH:
-                 initial_vram_read = core.get_vram_temperature()
-                 if isinstance(initial_vram_read, int):
-                     self._vram_helper_available = True
-                     vram_temp_status = f"{initial_vram_read} °C"
-                 else:
-                     self._vram_helper_available = False
-                     vram_temp_status = initial_vram_read
-                     if vram_temp_status in ["No Helper", "Not Supported", "Error"]:
-                          self.vram_temp_label_title.setVisible(False)
-                          self.vram_temp_value.setVisible(False)
-                     elif vram_temp_status == "No Root?":
-                          self.vram_temp_value.setToolTip("Requires passwordless sudo for helper.")
-                          self.vram_temp_value.setText(vram_temp_status)
-                     else:
-                          self.vram_temp_value.setText(vram_temp_status)
-             else:
-                 self._vram_helper_available = False
-                 vram_temp_status = "No Helper"
-                 self.vram_temp_label_title.setVisible(False)
-                 self.vram_temp_value.setVisible(False)
-             self._vram_helper_checked = True
-        elif self._vram_helper_available:
-            vram_temp = core.get_vram_temperature()
-            if isinstance(vram_temp, int):
-                vram_temp_status = f"{vram_temp} °C"
-            else:
-                vram_temp_status = vram_temp
-        if self.vram_temp_label_title.isVisible():
-             self.vram_temp_value.setText(vram_temp_status)
+            for panel in self.panels.values():
+                panel.set_status(None)
+        version, alerted = self.alert_engine.alerted_metrics()
+        if version != self._alerts_version:
+            self._alerts_version = version
+            for gpu_index, panel in self.panels.items():
+                panel.set_alerts(alerted.get(gpu_index, ()))
+
+        # The helper reads the first compatible card it finds on the PCI bus,
+        # so its value is shown on the first GPU's panel only.
+        vram_panel = self.panels.get(0)
+        vram_temp = snapshot.vram_temperature
+        if vram_panel is None or vram_temp is None:
+            return # Helper not polled (unavailable after the initial probe)
+        if isinstance(vram_temp, int):
+            self._vram_helper_available = True
+            vram_temp_status = f"{vram_temp} °C"
+        else:
+            vram_temp_status = vram_temp
+            if not self._vram_helper_checked:
+                # First (probe) result decides whether the row is shown at all
+                if vram_temp_status in ["No Helper", "Not Supported", "Error"]:
+                    vram_panel.set_vram_row_visible(False)
+                elif vram_temp_status == "No Root?":
+                    vram_panel.vram_temp_value.setToolTip("Requires passwordless sudo for helper.")
+        self._vram_helper_checked = True
+        if vram_panel.vram_temp_label_title.isVisibleTo(vram_panel):
+             vram_panel.vram_temp_value.setText(vram_temp_status)
 
 
     # --- Slot to open the OC Settings window ---
-    @Slot()
-    def open_oc_settings_window(self):
+    @Slot(int)
+    def open_oc_settings_window(self, gpu_id=0):
         """
-        Opens the OC Settings window.
-        If an instance already exists and is visible, it brings it to the front.
+        Opens the OC Settings window for the given GPU.
+        If an instance already exists for that GPU, it brings it to the front.
         If not, it creates a new instance.
         """
-        
-        if self.oc_window_instance is None:
+        oc_window = self.oc_windows.get(gpu_id)
+        if oc_window is None:
             # Create a new instance if one doesn't exist (or was closed and deleted)
-            desired_gpu_id = 0
-            self.oc_window_instance = OCWindow(gpu_id=desired_gpu_id, parent=self)
-            # Connect the destroyed signal to a slot that nullifies our reference
-            # This is important so we know to recreate it if the user closes it and clicks again
-            self.oc_window_instance.destroyed.connect(self._on_oc_window_destroyed)
-            print(f"DEBUG: OCWindow instance created: {self.oc_window_instance}")
-            self.oc_window_instance.show()
-            print(f"DEBUG: OCWindow.show() called. IsVisible: {self.oc_window_instance.isVisible()}")
-            print(f"DEBUG: OCWindow geometry after show: {self.oc_window_instance.geometry()}")
-            print(f"DEBUG: OCWindow window flags: {self.oc_window_instance.windowFlags()}")
+            from .oc_window import OCWindow # Built (and imported) on first use only
+            oc_window = OCWindow(gpu_id=gpu_id, parent=self)
+            # Connect the destroyed signal so we know to recreate it if the user closes it
+            oc_window.destroyed.connect(lambda _obj=None, i=gpu_id: self._on_oc_window_destroyed(i))
+            self.oc_windows[gpu_id] = oc_window
+            oc_window.show()
             # Force it to the front again, just in case
-            self.oc_window_instance.raise_()
-            self.oc_window_instance.activateWindow()
+            oc_window.raise_()
+            oc_window.activateWindow()
         else:
             # If an instance exists, just show it (in case it was hidden) and activate
-            print(f"DEBUG: OCWindow instance already exists: {self.oc_window_instance}")
-            self.oc_window_instance.show()
-            print(f"DEBUG: Existing OCWindow.show() called. IsVisible: {self.oc_window_instance.isVisible()}")
-            self.oc_window_instance.activateWindow() # Bring to front
-            print(f"DEBUG: Existing OCWindow.activateWindow() called.")
+            oc_window.show()
+            oc_window.activateWindow() # Bring to front
 
     @Slot()
-    def _on_oc_window_destroyed(self):
+    def open_debug_dialog(self):
+        """Shows the diagnostics dialog (source latencies, errors, spawned processes)."""
+        if self.debug_dialog is None:
+            from .debug_dialog import InstrumentationDialog
+            self.debug_dialog = InstrumentationDialog(self)
+        self.debug_dialog.show()
+        self.debug_dialog.raise_()
+        self.debug_dialog.activateWindow()
+
+    # --- Visibility-aware sampling ---
+    def _update_collector_visibility(self):
+        # Hidden or minimized: the collector throttles (history still records at a low rate)
+        # Fan control keeps full-rate sampling: it must see temperature rises promptly
+        shown = self.isVisible() and not self.isMinimized()
+        self.collector.set_visible(shown or self.fan_controller is not None)
+        if self.process_monitor is not None:
+            self.process_monitor.set_visible(shown) # Nobody needs the process list while hidden
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._update_collector_visibility()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._update_collector_visibility()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            self._update_collector_visibility()
+
+    def closeEvent(self, event):
+        """Stops sampling and releases telemetry backend resources on exit."""
+        self.collector.stop()
+        if self.process_monitor is not None:
+            self.process_monitor.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.fan_controller is not None:
+            self.fan_controller.stop() # Back to automatic fan control
+        core.shutdown()
+        super().closeEvent(event)
+
+    def _on_oc_window_destroyed(self, gpu_id):
         """
-        Slot connected to the destroyed signal of the OCWindow.
-        Sets the instance reference to None so a new window can be created next time.
+        Called when an OCWindow is destroyed.
+        Drops the reference so a new window can be created next time.
         """
-        self.oc_window_instance = None
+        self.oc_windows.pop(gpu_id, None)
 
 # No __main__ block needed here
\ No newline at end of file
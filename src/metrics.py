@@ -0,0 +1,177 @@
+# src/metrics.py
+"""
+Registry of the per-GPU metrics and the numeric sample record that carries them.
+
+Every metric is declared once (status key, nvidia-smi field, NVML source,
+unit, display title, precision, CLI column, polling interval, exported
+name). Query construction, parsing, panel rows, CLI columns, the polling
+schedule, history columns and exporters are derived from this table instead
+of keeping parallel lists in sync.
+
+Values are parsed once, when a sample is read, into floats. NaN (MISSING) is
+the explicit missing-value marker, replacing nvidia-smi's "[N/A]" /
+"[Not Supported]" strings. Only the standard library is used, so the
+headless CLI can import this without NumPy.
+"""
+import math
+from array import array
+
+MISSING = math.nan
+MIB = 1024 * 1024
+
+
+def is_missing(value):
+    return value != value # NaN is the only value unequal to itself
+
+
+class Metric:
+    """
+    One per-GPU metric.
+
+    Attributes:
+        key (str): Status key used throughout the application.
+        title (str): Row label in the GPU panels.
+        unit (str): Display unit ('' for none).
+        smi_field (str): nvidia-smi --query-gpu field, or None if the metric
+                         does not come from the telemetry backend.
+        nvml (tuple): (reader, attribute, scale) for NvmlBackend: the named
+                      reader's result (or its attribute) is multiplied by scale.
+        precision (int): Decimals shown when formatting.
+        column (str): Short CLI column title; the unit is appended (see column_title).
+        interval (float): Seconds between reads for a 1 s base interval (see scheduler.py).
+        export (tuple): (name, help text, scale to base unit) of the exporter's gauge.
+    """
+    __slots__ = ("key", "title", "unit", "smi_field", "nvml", "precision", "column", "interval", "export")
+
+    def __init__(self, key, title, unit, smi_field=None, nvml=None, precision=0, column=None, interval=1.0,
+                 export=None):
+        self.key = key
+        self.title = title
+        self.unit = unit
+        self.smi_field = smi_field
+        self.nvml = nvml
+        self.precision = precision
+        self.column = column or key
+        self.interval = interval
+        self.export = export
+
+    @property
+    def column_title(self):
+        """CLI column title with unit, e.g. 'Temp °C'."""
+        return f"{self.column} {self.unit}".rstrip()
+
+    def parse(self, text):
+        """Parses one nvidia-smi 'nounits' CSV field; MISSING for placeholders."""
+        try:
+            return float(text)
+        except ValueError:
+            return MISSING # "[N/A]", "[Not Supported]", ...
+
+    def format_value(self, value):
+        """Number only (e.g. '55.12'), or 'N/A' if missing."""
+        if is_missing(value):
+            return "N/A"
+        return f"{value:.{self.precision}f}"
+
+    def format(self, value):
+        """Number with unit (e.g. '55.12 W'), or 'N/A' if missing."""
+        if is_missing(value):
+            return "N/A"
+        return f"{value:.{self.precision}f} {self.unit}".rstrip()
+
+    def __repr__(self):
+        return f"Metric({self.key!r})"
+
+
+# Telemetry backend metrics, in nvidia-smi query order
+GPU_METRICS = (
+    Metric("temperature", "Temperature:", "°C", "temperature.gpu", ("temperature", None, 1.0),
+           column="Temp", interval=2.0,
+           export=("gpu_mon_temperature_celsius", "GPU core temperature.", 1.0)),
+    Metric("gpu_util", "GPU Utilization:", "%", "utilization.gpu", ("utilization", "gpu", 1.0),
+           column="GPU", export=("gpu_mon_gpu_utilization_percent", "GPU utilization.", 1.0)),
+    Metric("mem_util", "Memory Utilization:", "%", "utilization.memory", ("utilization", "memory", 1.0),
+           column="Mem", export=("gpu_mon_memory_utilization_percent", "Memory controller utilization.", 1.0)),
+    Metric("mem_free", "Memory Free:", "MiB", "memory.free", ("memory", "free", 1.0 / MIB),
+           column="Free", interval=5.0, export=("gpu_mon_memory_free_bytes", "Free video memory.", float(MIB))),
+    Metric("mem_used", "Memory Used:", "MiB", "memory.used", ("memory", "used", 1.0 / MIB),
+           column="Used", interval=5.0, export=("gpu_mon_memory_used_bytes", "Used video memory.", float(MIB))),
+    Metric("power", "Power Draw:", "W", "power.draw", ("power", None, 0.001), precision=2,
+           column="Power", export=("gpu_mon_power_draw_watts", "Current power draw.", 1.0)),
+    Metric("power_limit", "Power Limit:", "W", "power.limit", ("power_limit", None, 0.001), precision=2,
+           column="Limit", interval=10.0, # Only changes when someone sets it
+           export=("gpu_mon_power_limit_watts", "Enforced power limit.", 1.0)),
+    Metric("core_clock", "Core Clock:", "MHz", "clocks.current.graphics", ("graphics_clock", None, 1.0),
+           column="Core", export=("gpu_mon_graphics_clock_hertz", "Current graphics (core) clock.", 1e6)),
+    Metric("mem_clock", "Memory Clock:", "MHz", "clocks.current.memory", ("memory_clock", None, 1.0),
+           column="Mem", export=("gpu_mon_memory_clock_hertz", "Current memory clock.", 1e6)),
+    Metric("fan_speed", "Fan Speed:", "%", "fan.speed", ("fan", None, 1.0),
+           column="Fan", interval=2.0, export=("gpu_mon_fan_speed_percent", "Current fan speed.", 1.0)),
+)
+# Read by gddr6_helper, for the GPU the helper finds (index 0)
+VRAM_TEMPERATURE = Metric("vram_temperature", "VRAM Temperature:", "°C", column="VRAM", interval=5.0,
+                          export=("gpu_mon_vram_temperature_celsius", "VRAM temperature (gddr6_helper).", 1.0))
+
+METRICS_BY_KEY = {metric.key: metric for metric in GPU_METRICS + (VRAM_TEMPERATURE,)}
+GPU_METRIC_KEYS = tuple(metric.key for metric in GPU_METRICS)
+# Column of each GPU metric in GpuSample.values
+METRIC_INDEX = {key: position for position, key in enumerate(GPU_METRIC_KEYS)}
+# Everything recorded per GPU (history, recordings), in column order
+ALL_METRIC_KEYS = GPU_METRIC_KEYS + (VRAM_TEMPERATURE.key,)
+
+_MISSING_ROW = array("d", [MISSING] * len(GPU_METRICS))
+
+
+class GpuSample:
+    """
+    Parsed values of every GPU metric for one GPU at one point in time.
+
+    Attributes:
+        index (int): GPU index.
+        values (array): Doubles in GPU_METRICS order; MISSING where unknown.
+    """
+    __slots__ = ("index", "values")
+
+    def __init__(self, index, values=None):
+        self.index = index
+        self.values = array("d", _MISSING_ROW) if values is None else values
+
+    def get(self, key):
+        """Value of metric key (MISSING if unknown)."""
+        return self.values[METRIC_INDEX[key]]
+
+    __getitem__ = get
+
+    def set(self, key, value):
+        self.values[METRIC_INDEX[key]] = value
+
+    def copy(self):
+        return GpuSample(self.index, array("d", self.values))
+
+    def update_from(self, other, positions):
+        """Copies the given columns (METRIC_INDEX positions) from another sample."""
+        values = self.values
+        other_values = other.values
+        for position in positions:
+            values[position] = other_values[position]
+
+    def format(self, key):
+        """Display string with unit, e.g. '60 °C' or 'N/A'."""
+        return METRICS_BY_KEY[key].format(self.get(key))
+
+    def to_status(self):
+        """Legacy dict of strings ('index' and one entry per metric, 'N/A' if missing)."""
+        status = {"index": str(self.index)}
+        for metric, value in zip(GPU_METRICS, self.values):
+            status[metric.key] = metric.format_value(value)
+        return status
+
+    def __repr__(self):
+        return f"GpuSample({self.index}, {dict(zip(GPU_METRIC_KEYS, self.values))})"
+
+
+def positions_for(keys):
+    """METRIC_INDEX positions of the GPU metrics among keys (None = all), in registry order."""
+    if keys is None:
+        return tuple(range(len(GPU_METRICS)))
+    return tuple(position for position, key in enumerate(GPU_METRIC_KEYS) if key in keys)
@@ -0,0 +1,467 @@
+#!/usr/bin/python3 -I
+# src/oc_broker.py
+"""
+Privileged helper for overclocking writes.
+
+Instead of one pkexec prompt (and one 'pkexec env ... nvidia-settings' or
+'pkexec nvidia-smi' chain) per applied setting, the GUI starts this file once
+per session through pkexec and sends it setting transactions as JSON lines
+on stdin:
+
+    {"id": 1, "items": [{"op": "clock_offset", "gpu": 0, "clock": "core", "value": 100},
+                        {"op": "clock_offset", "gpu": 0, "clock": "memory", "value": 500},
+                        {"op": "power_limit", "gpu": 0, "watts": 220}]}
+
+Fan writes are {"op": "fan_speed", "gpu": 0, "fan": 0, "value": 60} (manual
+control at 60 %) and {"op": "fan_auto", "gpu": 0} (back to driver control).
+Every clock offset and fan write of a transaction is applied with one
+nvidia-settings run, power limits with nvidia-smi, and the broker answers
+with one result per item:
+
+    {"id": 1, "results": [{"ok": true, "message": "..."}, ...]}
+
+The broker only accepts these validated operations (never command lines) and
+exits when its stdin closes, i.e. with the GUI. It uses the standard library
+only, because it runs as a plain script under pkexec.
+
+A copy in the source tree is writable by the user, so whatever runs as the
+user could change what pkexec later runs as root. The GUI therefore prefers
+a root-owned copy installed at INSTALLED_PATH, for which
+assets/org.gpu-mon-qt.oc-broker.policy declares a polkit action naming that
+path (see README). Without it, the in-tree file is run with 'python -I', so
+at least no module in src/ or the environment can shadow the standard library.
+
+'--dry-run' records the commands it would run instead of executing them, so
+the whole protocol can be exercised without root (see OcBroker(command=...)),
+and FakeOcBroker records transactions in-process.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+
+READY_MESSAGE = {"ready": True}
+# Waiting for the broker includes the user typing a password into the pkexec dialog
+START_TIMEOUT = 120.0
+COMMAND_TIMEOUT = 20.0
+
+CLOCK_ATTRIBUTES = {
+    "core": "GPUGraphicsClockOffsetAllPerformanceLevels",
+    "memory": "GPUMemoryTransferRateOffsetAllPerformanceLevels",
+}
+MAX_OFFSET_MHZ = 10000
+MAX_POWER_WATTS = 2000
+# Operations applied through nvidia-settings assignments (batched into one run)
+SETTINGS_OPS = ("clock_offset", "fan_speed", "fan_auto")
+# Root-owned broker copy (sudo install -D -o root -m 755 src/oc_broker.py <path>)
+INSTALLED_PATH = "/usr/local/libexec/gpu_mon_qt/oc_broker.py"
+# Session variables nvidia-settings needs, handed over as --env NAME=VALUE (pkexec clears the environment)
+FORWARDED_ENV = ("DISPLAY", "XAUTHORITY")
+
+
+# --- Broker side (runs privileged) ---
+def validate_item(item):
+    """Returns an error message for an unsupported or out-of-range item, else None."""
+    if not isinstance(item, dict):
+        return "Invalid item."
+    gpu = item.get("gpu")
+    if not isinstance(gpu, int) or isinstance(gpu, bool) or gpu < 0:
+        return "Invalid GPU index."
+    op = item.get("op")
+    if op == "clock_offset":
+        value = item.get("value")
+        if item.get("clock") not in CLOCK_ATTRIBUTES:
+            return "Invalid clock type specified."
+        if not isinstance(value, int) or isinstance(value, bool) or abs(value) > MAX_OFFSET_MHZ:
+            return "Invalid clock offset value."
+        return None
+    if op == "power_limit":
+        watts = item.get("watts")
+        if not isinstance(watts, (int, float)) or isinstance(watts, bool) or not 0 < watts <= MAX_POWER_WATTS:
+            return "Invalid power limit value."
+        return None
+    if op == "fan_speed":
+        fan = item.get("fan")
+        value = item.get("value")
+        if not isinstance(fan, int) or isinstance(fan, bool) or fan < 0:
+            return "Invalid fan index."
+        if not isinstance(value, int) or isinstance(value, bool) or not 0 <= value <= 100:
+            return "Invalid fan speed value."
+        return None
+    if op == "fan_auto":
+        return None
+    return f"Unsupported operation '{op}'."
+
+
+def _assignments(item):
+    """nvidia-settings assignments for one settings item."""
+    if item["op"] == "clock_offset":
+        return [f"[gpu:{item['gpu']}]/{CLOCK_ATTRIBUTES[item['clock']]}={item['value']}"]
+    if item["op"] == "fan_speed":
+        # Manual fan control must be enabled on the GPU for the target to take effect
+        return [f"[gpu:{item['gpu']}]/GPUFanControlState=1", f"[fan:{item['fan']}]/GPUTargetFanSpeed={item['value']}"]
+    return [f"[gpu:{item['gpu']}]/GPUFanControlState=0"] # fan_auto
+
+
+def _format_watts(watts):
+    return str(int(watts)) if float(watts).is_integer() else str(watts)
+
+
+def _clock_message(item, returncode, stderr):
+    clock_type = item["clock"]
+    offset = item["value"]
+    if returncode == 0:
+        stderr_lower = stderr.lower()
+        if "authorization required" in stderr_lower or "no authorization protocol specified" in stderr_lower:
+            return False, f"Error: X Authentication failed. Stderr: {stderr.strip()}"
+        if not stderr.strip():
+            return True, f"{clock_type.capitalize()} offset set to {offset} MHz."
+        return True, f"{clock_type.capitalize()} offset set {offset} MHz (warnings: {stderr.strip()})."
+    error_msg = stderr.strip()
+    stderr_lower = error_msg.lower()
+    if "authorization required" in stderr_lower or "cannot open display" in stderr_lower:
+        return False, f"Error: X Auth failed. Stderr: {error_msg}"
+    if "Attribute" in error_msg and "not available" in error_msg:
+        return False, f"Error: Attribute '{CLOCK_ATTRIBUTES[clock_type]}' not available?"
+    if "Valid values" in error_msg:
+        return False, f"Error: Invalid value. {error_msg}"
+    return False, f"Failed to set offset. Code: {returncode}. Stderr: {error_msg}"
+
+
+def _fan_message(item, returncode, stderr):
+    if item["op"] == "fan_auto":
+        target = f"GPU {item['gpu']} fans returned to automatic control"
+    else:
+        target = f"Fan {item['fan']} set to {item['value']}%"
+    error_msg = stderr.strip()
+    if returncode == 0:
+        return True, f"{target}." if not error_msg else f"{target} (warnings: {error_msg})."
+    if "Attribute" in error_msg and "not available" in error_msg:
+        return False, "Error: Fan control not available (Coolbits bit 2 not set?)"
+    return False, f"Failed fan write. Code: {returncode}. Stderr: {error_msg}"
+
+
+def _settings_message(item, returncode, stderr):
+    if item["op"] == "clock_offset":
+        return _clock_message(item, returncode, stderr)
+    return _fan_message(item, returncode, stderr)
+
+
+def _power_message(item, returncode, stdout, stderr):
+    watts = _format_watts(item["watts"])
+    if returncode == 0:
+        if "successfully" in stdout.lower():
+            return True, f"Power limit set to {watts}W."
+        if not stderr.strip():
+            return True, f"Power limit command executed for {watts}W."
+        return True, f"Power limit executed {watts}W (warnings: {stderr.strip()})."
+    error_msg = stderr.strip() or stdout.strip()
+    if "Persistence Mode is disabled" in error_msg:
+        return False, "Error: Persistence Mode required."
+    return False, f"Failed power limit. Code: {returncode}. Stderr: {error_msg}"
+
+
+class _Executor:
+    """Runs (or, in dry-run mode, records) the commands for one transaction."""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.commands = [] # Recorded in dry-run mode
+
+    def run(self, command):
+        """Returns (returncode, stdout, stderr)."""
+        if self.dry_run:
+            self.commands.append(command)
+            return 0, "", ""
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, timeout=COMMAND_TIMEOUT)
+            return result.returncode, result.stdout, result.stderr
+        except FileNotFoundError:
+            return 127, "", f"'{command[0]}' not found."
+        except subprocess.TimeoutExpired:
+            return -1, "", "Command timed out."
+
+    def apply(self, items):
+        """Applies a transaction in one pass; returns one {'ok', 'message'} dict per item."""
+        results = [None] * len(items)
+        settings = []
+        for position, item in enumerate(items):
+            error = validate_item(item)
+            if error:
+                results[position] = {"ok": False, "message": error}
+            elif item["op"] in SETTINGS_OPS:
+                settings.append(position)
+
+        if settings:
+            command = ["nvidia-settings"]
+            for position in settings:
+                for assignment in _assignments(items[position]):
+                    if assignment not in command: # e.g. fan control enabled once per GPU
+                        command += ["-a", assignment]
+            returncode, _stdout, stderr = self.run(command)
+            if returncode == 0 or len(settings) == 1:
+                for position in settings:
+                    ok, message = _settings_message(items[position], returncode, stderr)
+                    results[position] = {"ok": ok, "message": message}
+            else:
+                # The combined run failed: retry one by one to tell which assignment was rejected
+                for position in settings:
+                    command = ["nvidia-settings"]
+                    for assignment in _assignments(items[position]):
+                        command += ["-a", assignment]
+                    returncode, _stdout, stderr = self.run(command)
+                    ok, message = _settings_message(items[position], returncode, stderr)
+                    results[position] = {"ok": ok, "message": message}
+
+        for position, item in enumerate(items):
+            if results[position] is None: # Valid power limit item
+                command = ["nvidia-smi", "-i", str(item["gpu"]), "-pl", _format_watts(item["watts"])]
+                returncode, stdout, stderr = self.run(command)
+                ok, message = _power_message(item, returncode, stdout, stderr)
+                results[position] = {"ok": ok, "message": message}
+        return results
+
+
+def serve(stdin=None, stdout=None, dry_run=False):
+    """Broker main loop: one JSON request per line in, one JSON reply per line out."""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    executor = _Executor(dry_run)
+    stdout.write(json.dumps(READY_MESSAGE) + "\n")
+    stdout.flush()
+    for line in stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            items = request["items"]
+            if not isinstance(items, list):
+                raise ValueError("'items' must be a list")
+            reply = {"id": request.get("id"), "results": executor.apply(items)}
+        except (ValueError, KeyError, TypeError) as e:
+            reply = {"id": None, "error": f"Malformed request: {e}"}
+        if dry_run:
+            reply["commands"] = executor.commands
+            executor.commands = []
+        stdout.write(json.dumps(reply) + "\n")
+        stdout.flush()
+    return 0
+
+
+# --- GUI side ---
+def is_root_owned(path):
+    """True if path and every directory above it are owned by root and writable by nobody else."""
+    path = os.path.abspath(path)
+    while True:
+        try:
+            status = os.stat(path)
+        except OSError:
+            return False
+        if status.st_uid != 0 or status.st_mode & 0o022:
+            return False
+        parent = os.path.dirname(path)
+        if parent == path:
+            return True
+        path = parent
+
+
+class OcBroker:
+    """
+    Client for a broker process started once (one authentication) and reused
+    for every later apply.
+
+    Args:
+        command (list): Broker command line. Defaults to pkexec running the
+                        installed copy (or this file) with the current
+                        DISPLAY/XAUTHORITY; pass e.g.
+                        [sys.executable, __file__, '--serve', '--dry-run'] to
+                        test without privileges.
+        start_timeout (float): Seconds to wait for the broker to come up.
+    """
+
+    def __init__(self, command=None, start_timeout=START_TIMEOUT):
+        self.command = command
+        self.start_timeout = start_timeout
+        self.last_commands = [] # Commands reported by a dry-run broker for the last transaction
+        self._lock = threading.Lock()
+        self._process = None
+        self._lines = None
+        self._next_id = 1
+
+    @staticmethod
+    def default_command(installed_path=INSTALLED_PATH):
+        env = []
+        for name in FORWARDED_ENV:
+            value = os.environ.get(name)
+            if name == "XAUTHORITY" and not value:
+                default_xauth = os.path.expanduser("~/.Xauthority")
+                value = default_xauth if os.path.exists(default_xauth) else None
+            if value:
+                env += ["--env", f"{name}={value}"]
+        if is_root_owned(installed_path):
+            return ["pkexec", installed_path, "--serve"] + env
+        logging.warning(f"Overclocking helper not installed at {installed_path}; running the user-writable "
+                        f"{os.path.abspath(__file__)} as root (see README).")
+        # -I: neither src/ nor PYTHON* variables or user site-packages end up on the root interpreter's path
+        return ["pkexec", sys.executable, "-I", os.path.abspath(__file__), "--serve"] + env
+
+    def is_running(self):
+        return self._process is not None and self._process.poll() is None
+
+    def _start(self):
+        command = self.command or self.default_command()
+        try:
+            self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                             stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        except FileNotFoundError:
+            self._process = None
+            raise RuntimeError(f"Error: '{command[0]}' not found.")
+        self._lines = queue.Queue()
+        threading.Thread(target=self._read_lines, args=(self._process.stdout, self._lines),
+                         name="oc-broker-reader", daemon=True).start()
+        reply = self._read_reply(self.start_timeout)
+        if reply != READY_MESSAGE:
+            returncode = self._process.poll()
+            self.close()
+            if returncode in (126, 127):
+                raise RuntimeError("Error: pkexec auth failed.")
+            raise RuntimeError(f"Error: privileged helper did not start (exit code {returncode}).")
+
+    @staticmethod
+    def _read_lines(stream, lines):
+        for line in stream:
+            lines.put(line)
+        lines.put(None) # EOF
+
+    def _read_reply(self, timeout):
+        try:
+            line = self._lines.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if line is None:
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    def apply(self, items):
+        """
+        Sends one transaction and waits for its results.
+
+        Args:
+            items (list): Setting dicts ('op': 'clock_offset' with 'gpu',
+                          'clock', 'value', or 'power_limit' with 'gpu', 'watts').
+
+        Returns:
+            list: (success, message) per item, in order.
+        """
+        if not items:
+            return []
+        with self._lock:
+            try:
+                if not self.is_running():
+                    self._start()
+                request_id = self._next_id
+                self._next_id += 1
+                self._process.stdin.write(json.dumps({"id": request_id, "items": items}) + "\n")
+                self._process.stdin.flush()
+                reply = self._read_reply(COMMAND_TIMEOUT * (len(items) + 1))
+            except RuntimeError as e:
+                return [(False, str(e))] * len(items)
+            except (BrokenPipeError, OSError) as e:
+                self.close()
+                return [(False, f"Error: privileged helper stopped ({e}).")] * len(items)
+            if reply is None or reply.get("id") != request_id or "results" not in reply:
+                self.close() # Out of sync or dead; restart on the next transaction
+                message = reply.get("error") if isinstance(reply, dict) and reply.get("error") else "Error: no reply from privileged helper."
+                return [(False, message)] * len(items)
+            self.last_commands = reply.get("commands", [])
+            return [(result.get("ok", False), result.get("message", "")) for result in reply["results"]]
+
+    def close(self):
+        process = self._process
+        self._process = None
+        if process is None:
+            return
+        try:
+            process.stdin.close() # Broker exits on EOF
+            process.wait(timeout=2.0)
+        except (OSError, subprocess.TimeoutExpired):
+            # Root-owned under pkexec, so terminate() may be refused; EOF is the real shutdown path
+            try:
+                process.terminate()
+            except OSError:
+                pass
+
+
+class FakeOcBroker:
+    """In-process stand-in for OcBroker that records transactions and reports success."""
+
+    def __init__(self, results=None):
+        self.transactions = []
+        self.results = results # Optional callable(item) -> (success, message)
+
+    def apply(self, items):
+        self.transactions.append([dict(item) for item in items])
+        if self.results is not None:
+            return [self.results(item) for item in items]
+        return [(True, "Recorded.") for _item in items]
+
+    def is_running(self):
+        return True
+
+    def close(self):
+        pass
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Returns the session's broker client, creating it on first use (started lazily on the first apply)."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = OcBroker()
+            atexit.register(shutdown_broker)
+        return _broker
+
+
+def set_broker(broker):
+    """Replaces the session broker (e.g. with a FakeOcBroker); the previous one is closed."""
+    global _broker
+    with _broker_lock:
+        if _broker is not None and _broker is not broker:
+            _broker.close()
+        _broker = broker
+
+
+def shutdown_broker():
+    set_broker(None)
+
+
+def _apply_env_arguments(arguments):
+    """Sets the --env NAME=VALUE pairs among arguments (only FORWARDED_ENV names); False if malformed."""
+    for position, argument in enumerate(arguments):
+        if argument != "--env":
+            continue
+        name, _, value = (arguments[position + 1] if position + 1 < len(arguments) else "").partition("=")
+        if name not in FORWARDED_ENV or not value:
+            return False
+        os.environ[name] = value
+    return True
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    if "--serve" not in arguments or not _apply_env_arguments(arguments):
+        print(f"usage: {os.path.basename(sys.argv[0])} --serve [--dry-run] [--env DISPLAY=... --env XAUTHORITY=...]"
+              "  (started by the GPU monitor via pkexec)")
+        sys.exit(2)
+    sys.exit(serve(dry_run="--dry-run" in arguments))
@@ -1,11 +1,14 @@
 # oc_window.py
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from PySide6 import QtWidgets, QtCore, QtGui
 try:
     from .overclocking import (
         get_gpu_overclock_info,
         apply_power_limit,
-        apply_clock_offset
+        apply_clock_offset,
+        apply_settings
     )
 except ImportError:
     # Fallback for running oc_window.py directly (if overclocking.py is in the same dir)
@@ -15,7 +18,8 @@ except ImportError:
         from overclocking import (
             get_gpu_overclock_info,
             apply_power_limit,
-            apply_clock_offset
+            apply_clock_offset,
+            apply_settings
         )
     else:
         raise # Re-raise the import error if not running directly
@@ -49,6 +53,21 @@ Manual clock offsets and fan control require enabling 'Coolbits' in your system'
 After restarting your session, refresh this tool.
 """
 
+# Queries and applies run here so the window never blocks on nvidia-settings/nvidia-smi/pkexec
+_oc_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="oc-window")
+
+
+class _OcTaskBridge(QtCore.QObject):
+    """
+    Delivers worker-thread results to the GUI thread (queued signals).
+    Deliberately parentless: a running task keeps it alive after the window is
+    deleted, and its signals then simply have no receivers left.
+    """
+    section_ready = QtCore.Signal(int, str, object) # generation, 'power'/'clocks', info dict
+    populate_finished = QtCore.Signal(int, object)  # generation, full info dict (None if cancelled)
+    apply_finished = QtCore.Signal(bool, str)       # success, message
+
+
 class OCWindow(QtWidgets.QWidget):
     def __init__(self, gpu_id=0, parent=None):
         super().__init__(parent)
@@ -58,6 +77,13 @@ class OCWindow(QtWidgets.QWidget):
         self.setMinimumHeight(300)
         self.setWindowFlag(QtCore.Qt.WindowType.Window, True)
         self.current_oc_data = {}
+        self._generation = 0 # Incremented per populate, so results of superseded fetches are dropped
+        self._finished_generation = 0 # Last generation whose populate_finished was handled
+        self._cancelled = threading.Event()
+        self._bridge = _OcTaskBridge()
+        self._bridge.section_ready.connect(self._on_section_ready)
+        self._bridge.populate_finished.connect(self._on_populate_finished)
+        self._bridge.apply_finished.connect(self._handle_apply_result)
 
         self.layout = QtWidgets.QVBoxLayout() # Create layout without parent first
         self.setLayout(self.layout)           # Then apply it to this widget
@@ -72,6 +98,8 @@ class OCWindow(QtWidgets.QWidget):
         self.status_label = QtWidgets.QLabel("Initializing..."); self.status_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter); self.status_label.setWordWrap(True); self.layout.addWidget(self.status_label)
         self.coolbits_warning_widget = QtWidgets.QWidget(); self.coolbits_layout = QtWidgets.QHBoxLayout(self.coolbits_warning_widget); self.coolbits_icon = QtWidgets.QLabel(); self.coolbits_icon.setPixmap(QtGui.QIcon.fromTheme("dialog-warning", self.style().standardIcon(QtWidgets.QStyle.StandardPixmap.SP_MessageBoxWarning)).pixmap(32, 32)); self.coolbits_label = QtWidgets.QLabel("Coolbits not detected..."); self.coolbits_button = QtWidgets.QPushButton("Show Instructions"); self.coolbits_button.clicked.connect(self.show_coolbits_instructions); self.coolbits_layout.addWidget(self.coolbits_icon); self.coolbits_layout.addWidget(self.coolbits_label, 1); self.coolbits_layout.addWidget(self.coolbits_button); self.coolbits_warning_widget.setVisible(False); self.layout.addWidget(self.coolbits_warning_widget)
         self.refresh_button = QtWidgets.QPushButton("Refresh Values"); self.refresh_button.setIcon(QtGui.QIcon.fromTheme("view-refresh")); self.refresh_button.clicked.connect(self.populate_values); top_layout = QtWidgets.QHBoxLayout(); top_layout.addStretch(); top_layout.addWidget(self.refresh_button); self.layout.addLayout(top_layout)
+        # Applies every changed setting as one transaction (one authentication, one nvidia-settings run)
+        self.btn_apply_all = QtWidgets.QPushButton("Apply All Changes"); self.btn_apply_all.clicked.connect(self._apply_all_clicked); top_layout.addWidget(self.btn_apply_all)
 
 
         # --- Power Limit Section (MODIFIED: Added Default Label) ---
@@ -130,48 +158,87 @@ class OCWindow(QtWidgets.QWidget):
     def show_coolbits_instructions(self): QtWidgets.QMessageBox.information(self, "Enable Overclocking Features (Coolbits)", COOLBITS_INSTRUCTIONS)
     def set_controls_enabled(self, enabled, coolbits_ok=False):
         # (Implementation from previous version)
-        self.refresh_button.setEnabled(enabled); power_data_ok = self.current_oc_data.get('power_limit_min') is not None; self.spin_power_limit.setEnabled(enabled and power_data_ok); self.btn_apply_power.setEnabled(enabled and power_data_ok); core_data_ok = self.current_oc_data.get('core_offset_min') is not None; mem_data_ok = self.current_oc_data.get('memory_offset_min') is not None; self.spin_core_offset.setEnabled(enabled and core_data_ok and coolbits_ok); self.btn_apply_core.setEnabled(enabled and core_data_ok and coolbits_ok); self.spin_mem_offset.setEnabled(enabled and mem_data_ok and coolbits_ok); self.btn_apply_mem.setEnabled(enabled and mem_data_ok and coolbits_ok)
+        self.refresh_button.setEnabled(enabled); self.btn_apply_all.setEnabled(enabled); power_data_ok = self.current_oc_data.get('power_limit_min') is not None; self.spin_power_limit.setEnabled(enabled and power_data_ok); self.btn_apply_power.setEnabled(enabled and power_data_ok); core_data_ok = self.current_oc_data.get('core_offset_min') is not None; mem_data_ok = self.current_oc_data.get('memory_offset_min') is not None; self.spin_core_offset.setEnabled(enabled and core_data_ok and coolbits_ok); self.btn_apply_core.setEnabled(enabled and core_data_ok and coolbits_ok); self.spin_mem_offset.setEnabled(enabled and mem_data_ok and coolbits_ok); self.btn_apply_mem.setEnabled(enabled and mem_data_ok and coolbits_ok)
 
 
     def populate_values(self):
-        # (Fetch logic unchanged)
-        self.status_label.setText(f"Fetching data for GPU {self.gpu_id}..."); self.set_controls_enabled(False); QtWidgets.QApplication.processEvents()
-        self.current_oc_data = get_gpu_overclock_info(self.gpu_id)
-        if self.current_oc_data is None or not self.current_oc_data: self.status_label.setText(f"<font color='red'>Error fetching data for GPU {self.gpu_id}.</font>"); self.coolbits_warning_widget.setVisible(False); self.set_controls_enabled(False); self.refresh_button.setEnabled(True); return
-
+        """Starts fetching the current values; each group fills in when its own query returns."""
+        self._generation += 1; generation = self._generation; bridge = self._bridge; cancelled = self._cancelled
+        self.status_label.setText(f"Fetching data for GPU {self.gpu_id}..."); self.set_controls_enabled(False)
+        def fetch():
+            if cancelled.is_set(): return
+            info = get_gpu_overclock_info(self.gpu_id, on_partial=lambda section, data: bridge.section_ready.emit(generation, section, data), cancelled=cancelled)
+            bridge.populate_finished.emit(generation, info)
+        _oc_executor.submit(fetch)
+
+    def _on_section_ready(self, generation, section, data):
+        # The power section comes from a pool callback and may trail populate_finished: never let it reset edits
+        if generation != self._generation or generation == self._finished_generation: return
+        self.current_oc_data.update(data)
+        if section == 'power':
+            self._fill_power(data); power_data_ok = data.get('power_limit_min') is not None; self.spin_power_limit.setEnabled(power_data_ok); self.btn_apply_power.setEnabled(power_data_ok)
+        else:
+            self._fill_clocks(data); coolbits_ok = data.get('coolbits_enabled', False); self.coolbits_warning_widget.setVisible(not coolbits_ok)
+            for widget in (self.spin_core_offset, self.btn_apply_core, self.spin_mem_offset, self.btn_apply_mem): widget.setEnabled(coolbits_ok)
+
+    def _on_populate_finished(self, generation, info):
+        if generation != self._generation: return
+        self._finished_generation = generation
+        self.current_oc_data = info or {}
+        if not self.current_oc_data: self.status_label.setText(f"<font color='red'>Error fetching data for GPU {self.gpu_id}.</font>"); self.coolbits_warning_widget.setVisible(False); self.set_controls_enabled(False); self.refresh_button.setEnabled(True); return
         coolbits_enabled = self.current_oc_data.get('coolbits_enabled', False); self.coolbits_warning_widget.setVisible(not coolbits_enabled)
         self.status_label.setText(f"Current settings (GPU {self.gpu_id}). Ready.")
+        self._fill_power(self.current_oc_data); self._fill_clocks(self.current_oc_data)
+        self.set_controls_enabled(True, coolbits_ok=coolbits_enabled)
 
-        # Populate Power (MODIFIED: Added Default)
-        p_curr = self.current_oc_data.get('power_limit_current'); p_min = self.current_oc_data.get('power_limit_min'); p_max = self.current_oc_data.get('power_limit_max'); p_def = self.current_oc_data.get('power_limit_default') # Get default
+    def _fill_power(self, data):
+        p_curr = data.get('power_limit_current'); p_min = data.get('power_limit_min'); p_max = data.get('power_limit_max'); p_def = data.get('power_limit_default')
         self.lbl_power_current.setText(self.format_value(p_curr, "W"))
-        self.lbl_power_default.setText(self.format_value(p_def, "W")) # Set default label
+        self.lbl_power_default.setText(self.format_value(p_def, "W"))
         self.lbl_power_min.setText(self.format_value(p_min, "W")); self.lbl_power_max.setText(self.format_value(p_max, "W"))
         if p_min is not None and p_max is not None: self.spin_power_limit.setRange(int(p_min), int(p_max)); self.spin_power_limit.setValue(int(p_curr or p_min))
 
-        # Populate Core Clock Offset (Unchanged logic)
-        c_curr = self.current_oc_data.get('core_offset_current'); c_min = self.current_oc_data.get('core_offset_min'); c_max = self.current_oc_data.get('core_offset_max')
-        self.lbl_core_offset_current.setText(self.format_value(c_curr, "MHz", 0, True)); min_label = f"{self.format_value(c_min, 'MHz', 0, True)}"; max_label = f"{self.format_value(c_max, 'MHz', 0, True)}"
+    def _fill_clocks(self, data):
+        c_curr = data.get('core_offset_current'); c_min = data.get('core_offset_min'); c_max = data.get('core_offset_max')
+        self.lbl_core_offset_current.setText(self.format_value(c_curr, "MHz", 0, True))
         # Note: Placeholders are added based on defaults in overclocking.py now
-        self.lbl_core_offset_min.setText(min_label); self.lbl_core_offset_max.setText(max_label)
+        self.lbl_core_offset_min.setText(self.format_value(c_min, 'MHz', 0, True)); self.lbl_core_offset_max.setText(self.format_value(c_max, 'MHz', 0, True))
         if c_min is not None and c_max is not None: self.spin_core_offset.setRange(int(c_min), int(c_max)); self.spin_core_offset.setValue(int(c_curr or 0))
-
-        # Populate Memory Clock Offset (Unchanged logic)
-        m_curr = self.current_oc_data.get('memory_offset_current'); m_min = self.current_oc_data.get('memory_offset_min'); m_max = self.current_oc_data.get('memory_offset_max')
-        self.lbl_mem_offset_current.setText(self.format_value(m_curr, "MHz", 0, True)); min_label = f"{self.format_value(m_min, 'MHz', 0, True)}"; max_label = f"{self.format_value(m_max, 'MHz', 0, True)}"
-        self.lbl_mem_offset_min.setText(min_label); self.lbl_mem_offset_max.setText(max_label)
+        m_curr = data.get('memory_offset_current'); m_min = data.get('memory_offset_min'); m_max = data.get('memory_offset_max')
+        self.lbl_mem_offset_current.setText(self.format_value(m_curr, "MHz", 0, True))
+        self.lbl_mem_offset_min.setText(self.format_value(m_min, 'MHz', 0, True)); self.lbl_mem_offset_max.setText(self.format_value(m_max, 'MHz', 0, True))
         if m_min is not None and m_max is not None: self.spin_mem_offset.setRange(int(m_min), int(m_max)); self.spin_mem_offset.setValue(int(m_curr or 0))
 
-        self.set_controls_enabled(True, coolbits_ok=coolbits_enabled)
-
+    def _run_apply(self, status_text, apply):
+        """Runs apply() -> (success, message) on the worker pool; the result arrives via apply_finished."""
+        self.status_label.setText(status_text); self.set_controls_enabled(False, coolbits_ok=self.current_oc_data.get('coolbits_enabled'))
+        bridge = self._bridge; cancelled = self._cancelled
+        def run():
+            if cancelled.is_set(): return # Window closed before the apply started
+            success, message = apply(); bridge.apply_finished.emit(success, message)
+        _oc_executor.submit(run)
 
-    # (_apply_power_limit_clicked, _apply_core_offset_clicked, _apply_mem_offset_clicked, _handle_apply_result - unchanged)
     def _apply_power_limit_clicked(self):
-        desired_power = self.spin_power_limit.value(); self.status_label.setText(f"Applying power limit {desired_power}W..."); self.set_controls_enabled(False, coolbits_ok=self.current_oc_data.get('coolbits_enabled')); QtWidgets.QApplication.processEvents(); success, message = apply_power_limit(self.gpu_id, desired_power); self._handle_apply_result(success, message)
+        desired_power = self.spin_power_limit.value(); self._run_apply(f"Applying power limit {desired_power}W...", lambda: apply_power_limit(self.gpu_id, desired_power))
     def _apply_core_offset_clicked(self):
-        desired_offset = self.spin_core_offset.value(); self.status_label.setText(f"Applying core offset {desired_offset:+}MHz..."); self.set_controls_enabled(False, coolbits_ok=True); QtWidgets.QApplication.processEvents(); success, message = apply_clock_offset(self.gpu_id, 'core', desired_offset); self._handle_apply_result(success, message)
+        desired_offset = self.spin_core_offset.value(); self._run_apply(f"Applying core offset {desired_offset:+}MHz...", lambda: apply_clock_offset(self.gpu_id, 'core', desired_offset))
     def _apply_mem_offset_clicked(self):
-        desired_offset = self.spin_mem_offset.value(); self.status_label.setText(f"Applying memory offset {desired_offset:+}MHz..."); self.set_controls_enabled(False, coolbits_ok=True); QtWidgets.QApplication.processEvents(); success, message = apply_clock_offset(self.gpu_id, 'memory', desired_offset); self._handle_apply_result(success, message)
+        desired_offset = self.spin_mem_offset.value(); self._run_apply(f"Applying memory offset {desired_offset:+}MHz...", lambda: apply_clock_offset(self.gpu_id, 'memory', desired_offset))
+    def _apply_all_clicked(self):
+        changes = {}
+        if self.spin_power_limit.isEnabled() and self.spin_power_limit.value() != int(self.current_oc_data.get('power_limit_current') or 0): changes['power_limit'] = self.spin_power_limit.value()
+        if self.spin_core_offset.isEnabled() and self.spin_core_offset.value() != int(self.current_oc_data.get('core_offset_current') or 0): changes['core_offset'] = self.spin_core_offset.value()
+        if self.spin_mem_offset.isEnabled() and self.spin_mem_offset.value() != int(self.current_oc_data.get('memory_offset_current') or 0): changes['memory_offset'] = self.spin_mem_offset.value()
+        if not changes: self.status_label.setText("No changes to apply."); return
+        gpu_id = self.gpu_id
+        def apply():
+            results = apply_settings(gpu_id, **changes); failures = [message for success, message in results.values() if not success]
+            return not failures, "; ".join(failures) if failures else " ".join(message for _success, message in results.values())
+        self._run_apply(f"Applying {len(changes)} setting(s)...", apply)
+    def closeEvent(self, event):
+        # Pending fetches/applies are skipped and late results are ignored (the window is deleted on close)
+        self._cancelled.set(); self._generation += 1
+        super().closeEvent(event)
     def _handle_apply_result(self, success, message):
         if success: self.status_label.setText(f"<font color='green'>{message}</font>"); QtCore.QTimer.singleShot(500, self.populate_values)
         else: self.status_label.setText(f"<font color='red'>Error: {message}</font>"); self.set_controls_enabled(True, coolbits_ok=self.current_oc_data.get('coolbits_enabled')); QtWidgets.QMessageBox.critical(self, "Apply Failed", message)
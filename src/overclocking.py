@@ -5,8 +5,14 @@ import logging
 import shlex
 import os
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from . import instrumentation, oc_broker
+except ImportError:
+    import instrumentation, oc_broker # Running overclocking.py directly from src/
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Logging is configured by the application entry point (main.py), not on import.
 
 # (run_nv_settings_command, run_smi_command, parse_nvidia_smi_output, check_coolbits_features_enabled remain the same)
 # --- run_nv_settings_command ---
@@ -15,25 +21,29 @@ def run_nv_settings_command(command_list):
     try:
         env = os.environ.copy()
         if not env.get('DISPLAY'): logging.warning("DISPLAY not set. nvidia-settings might fail.")
+        instrumentation.spawned("nvidia-settings")
         result = subprocess.run(command_list, capture_output=True, text=True, timeout=10, env=env)
-        if result.returncode != 0:
-            stderr_lower = result.stderr.lower()
-            if "attribute" in stderr_lower and ("not available" in stderr_lower or "isn't available" in stderr_lower): return None, "Attribute not available"
-            elif "does not exist" in stderr_lower: return None, "Target does not exist"
-            elif "failed to connect" in stderr_lower or "unable to init server" in stderr_lower or "cannot open display" in stderr_lower: return None, "X Server connection failed"
-            elif "control display is undefined" in stderr_lower: return None, "Control display undefined"
-            else: return None, result.stderr.strip()
+        if result.returncode != 0: return None, _nv_settings_error(result.stderr)
         return result.stdout.strip(), None
     except FileNotFoundError: return None, "'nvidia-settings' not found"
     except subprocess.TimeoutExpired: return None, "Command timed out"
     except Exception as e: return None, f"Unexpected error: {e}"
 
+def _nv_settings_error(stderr):
+    stderr_lower = stderr.lower()
+    if "attribute" in stderr_lower and ("not available" in stderr_lower or "isn't available" in stderr_lower): return "Attribute not available"
+    elif "does not exist" in stderr_lower: return "Target does not exist"
+    elif "failed to connect" in stderr_lower or "unable to init server" in stderr_lower or "cannot open display" in stderr_lower: return "X Server connection failed"
+    elif "control display is undefined" in stderr_lower: return "Control display undefined"
+    else: return stderr.strip()
+
 # --- run_smi_command ---
 def run_smi_command(command):
     # (Implementation from previous version)
     try:
         if isinstance(command, str): command_list = shlex.split(command)
         else: command_list = command
+        instrumentation.spawned(os.path.basename(command_list[0]))
         result = subprocess.run(command_list, check=True, capture_output=True, text=True, timeout=10)
         return result.stdout.strip(), None
     except FileNotFoundError: return None, f"Command '{command_list[0]}' not found."
@@ -68,143 +78,266 @@ def check_coolbits_features_enabled(gpu_id=0, performance_level=3):
     elif output is not None: return True
     else: return False
 
-# --- get_gpu_overclock_info (MODIFIED: Added default power limit query) ---
-def get_gpu_overclock_info(gpu_id=0, performance_level=3):
-    logging.info(f"Querying overclock info for GPU {gpu_id}")
-    gpu_info = {}
-    coolbits_ok = check_coolbits_features_enabled(gpu_id, performance_level)
-    gpu_info['coolbits_enabled'] = coolbits_ok
-    # (Handle coolbits not ok case)
-    if not coolbits_ok:
-         logging.warning("Coolbits features check failed. Reporting defaults.")
-         DEFAULT_CORE_MIN, DEFAULT_CORE_MAX = -500, 2000; DEFAULT_MEM_MIN, DEFAULT_MEM_MAX = -500, 3000
-         gpu_info.update({ 'power_limit_current': None, 'power_limit_min': None, 'power_limit_max': None, 'power_limit_default': None, 'core_offset_current': 0, 'core_offset_min': DEFAULT_CORE_MIN, 'core_offset_max': DEFAULT_CORE_MAX, 'memory_offset_current': 0, 'memory_offset_min': DEFAULT_MEM_MIN, 'memory_offset_max': DEFAULT_MEM_MAX })
-         return gpu_info
-
-    # Power Limits (nvidia-smi)
-    power_output, error = run_smi_command(f"nvidia-smi -i {gpu_id} -q -d POWER")
-    if power_output:
-        power_patterns = {
-            'power_limit_current': r"Power Limit\s+:\s+([\d\.]+)\s+W",
-            'power_limit_min': r"Min Power Limit\s+:\s+([\d\.]+)\s+W",
-            'power_limit_max': r"Max Power Limit\s+:\s+([\d\.]+)\s+W",
-            # *** ADDED Default Power Limit ***
-            'power_limit_default': r"Default Power Limit\s+:\s+([\d\.]+)\s+W",
-        }
-        gpu_info.update(parse_nvidia_smi_output(power_output, power_patterns))
-    else:
-        logging.error(f"Failed to get power data via nvidia-smi: {error}")
-        gpu_info.update({'power_limit_current': None, 'power_limit_min': None, 'power_limit_max': None, 'power_limit_default': None}) # Ensure default is None on error
-
-    # (Rest of Clock Offset query logic remains the same as previous successful version)
-    # Defaults
-    DEFAULT_CORE_MIN, DEFAULT_CORE_MAX = -500, 2000; DEFAULT_MEM_MIN, DEFAULT_MEM_MAX = -500, 3000
-    gpu_info.setdefault('core_offset_current', 0); gpu_info.setdefault('core_offset_min', DEFAULT_CORE_MIN); gpu_info.setdefault('core_offset_max', DEFAULT_CORE_MAX)
-    gpu_info.setdefault('memory_offset_current', 0); gpu_info.setdefault('memory_offset_min', DEFAULT_MEM_MIN); gpu_info.setdefault('memory_offset_max', DEFAULT_MEM_MAX)
-    # ... Clock offset reading logic ...
-    core_attr = f"[gpu:{gpu_id}]/GPUGraphicsClockOffset[{performance_level}]"; mem_attr = f"[gpu:{gpu_id}]/GPUMemoryTransferRateOffset[{performance_level}]"
-    cmd_core_current = ["nvidia-settings", "-t", "-q", core_attr]; output_core_tq, err_core_tq = run_nv_settings_command(cmd_core_current)
-    if output_core_tq is not None and not err_core_tq:
-        try: gpu_info['core_offset_current'] = int(output_core_tq)
-        except ValueError: logging.error(f"Could not parse core offset '{output_core_tq}' to int.")
-    else: logging.warning(f"Failed query current core offset: {err_core_tq}")
-    cmd_core_limits = ["nvidia-settings", "-q", core_attr]; output_core_q, err_core_q = run_nv_settings_command(cmd_core_limits)
-    if output_core_q and not err_core_q:
-        pattern = r"Valid\s+values\s+for\s+'GPUGraphicsClockOffset'\s+are\s+in\s+the\s+range\s+(-?\d+)\s+-\s+(\d+)|Valid values range from\s+(-?\d+)\s+to\s+(\d+)"; match_limits = re.search(pattern, output_core_q, re.IGNORECASE | re.MULTILINE)
-        if match_limits:
-            try: g1, g2, g3, g4 = match_limits.groups(); gpu_info['core_offset_min'] = int(g1 if g1 else g3); gpu_info['core_offset_max'] = int(g2 if g2 else g4)
-            except Exception as e: logging.error(f"Error parsing regex groups for core limits: {e}")
-        else: logging.warning(f"Could not parse core offset limits using regex.")
-    else: logging.warning(f"Failed query core offset limits: {err_core_q}")
-    cmd_mem_current = ["nvidia-settings", "-t", "-q", mem_attr]; output_mem_tq, err_mem_tq = run_nv_settings_command(cmd_mem_current)
-    if output_mem_tq is not None and not err_mem_tq:
-        try: gpu_info['memory_offset_current'] = int(output_mem_tq)
-        except ValueError: logging.error(f"Could not parse memory offset '{output_mem_tq}' to int.")
-    else: logging.warning(f"Failed query current memory offset: {err_mem_tq}")
-    cmd_mem_limits = ["nvidia-settings", "-q", mem_attr]; output_mem_q, err_mem_q = run_nv_settings_command(cmd_mem_limits)
-    if output_mem_q and not err_mem_q:
-        pattern = r"Valid\s+values\s+for\s+'GPUMemoryTransferRateOffset'\s+are\s+in\s+the\s+range\s+(-?\d+)\s+-\s+(\d+)|Valid values range from\s+(-?\d+)\s+to\s+(\d+)"; match_limits = re.search(pattern, output_mem_q, re.IGNORECASE | re.MULTILINE)
-        if match_limits:
-            try: g1, g2, g3, g4 = match_limits.groups(); gpu_info['memory_offset_min'] = int(g1 if g1 else g3); gpu_info['memory_offset_max'] = int(g2 if g2 else g4)
-            except Exception as e: logging.error(f"Error parsing regex groups for memory limits: {e}")
-        else: logging.warning(f"Could not parse memory offset limits using regex.")
-    else: logging.warning(f"Failed query memory offset limits: {err_mem_q}")
-
-
-    # Final default assignment logic (Add power_limit_default)
-    essential_keys_with_defaults = {
-        'coolbits_enabled': False,
-        'power_limit_current': None, 'power_limit_min': None, 'power_limit_max': None, 'power_limit_default': None, # Added default
-        'core_offset_current': 0, 'core_offset_min': DEFAULT_CORE_MIN, 'core_offset_max': DEFAULT_CORE_MAX,
-        'memory_offset_current': 0, 'memory_offset_min': DEFAULT_MEM_MIN, 'memory_offset_max': DEFAULT_MEM_MAX
-    }
+# --- Batched overclock queries ---
+# nvidia-settings attribute per clock type, and the ranges reported when they can't be read
+OC_ATTRIBUTES = {'core': 'GPUGraphicsClockOffset', 'memory': 'GPUMemoryTransferRateOffset'}
+DEFAULT_OFFSET_RANGES = {'core': (-500, 2000), 'memory': (-500, 3000)}
+POWER_QUERY_FIELDS = ["uuid", "driver_version", "power.limit", "power.min_limit", "power.max_limit", "power.default_limit"]
+# Keys that only change with the GPU or driver; cached per (uuid, driver version, performance level)
+STATIC_OC_KEYS = ('core_offset_min', 'core_offset_max', 'memory_offset_min', 'memory_offset_max',
+                  'power_limit_min', 'power_limit_max', 'power_limit_default')
+
+_static_oc_cache = {} # (uuid, driver, performance_level) -> {STATIC_OC_KEYS: value}
+_static_oc_keys = {}  # (gpu_id, performance_level) -> cache key seen on the last query
+_static_oc_lock = threading.Lock()
+_query_pool = None
+
+def _get_query_pool():
+    global _query_pool
+    if _query_pool is None: _query_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="oc-query")
+    return _query_pool
+
+def clear_overclock_info_cache():
+    """Forgets cached offset ranges and power limits (e.g. after a driver reload)."""
+    with _static_oc_lock: _static_oc_cache.clear(); _static_oc_keys.clear()
+
+# Replaces nvidia-smi/nvidia-settings for reading OC info (simulated devices); applies go to the broker
+_info_source = None
+
+def set_overclock_info_source(source):
+    """source.get_overclock_info(gpu_id, performance_level) -> dict of info keys; None = real tools."""
+    global _info_source
+    _info_source = source; clear_overclock_info_cache()
+
+def _attribute_blocks(output):
+    """Splits verbose nvidia-settings output into {attribute name: its lines}, one block per 'Attribute' header."""
+    headers = list(re.finditer(r"Attribute\s+'(\w+)'", output))
+    return {match.group(1): output[match.start():headers[i + 1].start() if i + 1 < len(headers) else len(output)]
+            for i, match in enumerate(headers)}
+
+def run_nv_settings_queries(gpu_id, attributes, performance_level=3, terse=False):
+    """
+    Queries several nvidia-settings attributes with a single process.
+
+    Args:
+        attributes (list): Attribute names (e.g. 'GPUGraphicsClockOffset').
+        terse (bool): Only read current values ('-t'); otherwise the verbose
+                      output is parsed for the valid ranges as well.
+
+    Returns:
+        tuple: ({attribute: (current value or None, (min, max) or None)}, error message or None)
+    """
+    command = ["nvidia-settings"] + (["-t"] if terse else [])
+    for name in attributes: command += ["-q", f"[gpu:{gpu_id}]/{name}[{performance_level}]"]
+    results = {name: (None, None) for name in attributes}
+    try:
+        env = os.environ.copy()
+        if not env.get('DISPLAY'): logging.warning("DISPLAY not set. nvidia-settings might fail.")
+        instrumentation.spawned("nvidia-settings")
+        result = subprocess.run(command, capture_output=True, text=True, timeout=10, env=env)
+    except FileNotFoundError: return results, "'nvidia-settings' not found"
+    except subprocess.TimeoutExpired: return results, "Command timed out"
+    except Exception as e: return results, f"Unexpected error: {e}"
+    # A non-zero exit means at least one attribute failed; the others are still printed
+    error = _nv_settings_error(result.stderr) if result.returncode != 0 else None
+    if terse:
+        lines = [line.strip() for line in result.stdout.splitlines() if line.strip()]
+        if len(lines) == len(attributes): # Otherwise a failed query shifted the lines
+            for name, line in zip(attributes, lines):
+                try: results[name] = (int(line), None)
+                except ValueError: logging.error(f"Could not parse {name} '{line}' to int.")
+        return results, error
+    # Every attribute is matched within its own block: the unscoped range wording names no attribute
+    blocks = _attribute_blocks(result.stdout)
+    for name in attributes:
+        block = blocks.get(name, "")
+        escaped = re.escape(name)
+        current = re.search(rf"Attribute\s+'{escaped}'\s+\([^)]*\):\s+(-?\d+)", block)
+        pattern = rf"Valid\s+values\s+for\s+'{escaped}'\s+are\s+in\s+the\s+range\s+(-?\d+)\s+-\s+(-?\d+)|Valid values range from\s+(-?\d+)\s+to\s+(-?\d+)"
+        match_limits = re.search(pattern, block, re.IGNORECASE | re.MULTILINE)
+        limits = None
+        if match_limits: g1, g2, g3, g4 = match_limits.groups(); limits = (int(g1 if g1 else g3), int(g2 if g2 else g4))
+        results[name] = (int(current.group(1)) if current else None, limits)
+    return results, error
+
+def _query_power_info(gpu_id):
+    """Returns (uuid, driver, {power keys: float or None}) from one nvidia-smi CSV query, or None."""
+    output, error = run_smi_command(["nvidia-smi", "-i", str(gpu_id), f"--query-gpu={','.join(POWER_QUERY_FIELDS)}", "--format=csv,noheader,nounits"])
+    if not output:
+        logging.error(f"Failed to get power data via nvidia-smi: {error}"); return None
+    fields = [field.strip() for field in output.splitlines()[0].split(",")]
+    if len(fields) != len(POWER_QUERY_FIELDS):
+        logging.error(f"Unexpected power query output: '{output}'"); return None
+    power = {}
+    for key, value in zip(('power_limit_current', 'power_limit_min', 'power_limit_max', 'power_limit_default'), fields[2:]):
+        try: power[key] = float(value)
+        except ValueError: power[key] = None # "[N/A]" / "[Not Supported]"
+    return fields[0], fields[1], power
+
+# Keys of get_gpu_overclock_info() results and their fallbacks, grouped as delivered to on_partial
+POWER_INFO_DEFAULTS = {'power_limit_current': None, 'power_limit_min': None, 'power_limit_max': None, 'power_limit_default': None}
+CLOCK_INFO_DEFAULTS = {
+    'coolbits_enabled': False,
+    'core_offset_current': 0, 'core_offset_min': DEFAULT_OFFSET_RANGES['core'][0], 'core_offset_max': DEFAULT_OFFSET_RANGES['core'][1],
+    'memory_offset_current': 0, 'memory_offset_min': DEFAULT_OFFSET_RANGES['memory'][0], 'memory_offset_max': DEFAULT_OFFSET_RANGES['memory'][1]
+}
+
+def _with_defaults(gpu_info, defaults):
     final_gpu_info = {}
-    for k, default_val in essential_keys_with_defaults.items():
+    for k, default_val in defaults.items():
         final_gpu_info[k] = gpu_info.get(k, default_val)
         if final_gpu_info[k] is None and default_val is not None:
              # Apply numeric defaults if value ended up None
-             if k in ['core_offset_current', 'memory_offset_current', 'core_offset_min', 'core_offset_max', 'memory_offset_min', 'memory_offset_max']:
-                 final_gpu_info[k] = default_val
+             final_gpu_info[k] = default_val
+    return final_gpu_info
+
+def _clock_section(settings, static):
+    gpu_info = {}
+    # The core offset attribute is only readable with Coolbits enabled
+    gpu_info['coolbits_enabled'] = settings[OC_ATTRIBUTES['core']][0] is not None
+    for clock_type, name in OC_ATTRIBUTES.items():
+        current, limits = settings[name]
+        if current is not None: gpu_info[f'{clock_type}_offset_current'] = current
+        if limits is not None: gpu_info[f'{clock_type}_offset_min'], gpu_info[f'{clock_type}_offset_max'] = limits
+        elif static is None and gpu_info['coolbits_enabled']: logging.warning(f"Could not parse {clock_type} offset limits.")
+    if static is not None: gpu_info.update({k: v for k, v in static.items() if k in CLOCK_INFO_DEFAULTS})
+    return gpu_info
+
+# --- get_gpu_overclock_info ---
+def get_gpu_overclock_info(gpu_id=0, performance_level=3, on_partial=None, cancelled=None):
+    """
+    Reads power limits and clock offsets for one GPU.
+
+    The nvidia-settings attributes are read with one process, concurrently with
+    one nvidia-smi power query. Offset ranges and power limits are cached per
+    GPU UUID and driver version, so later calls (window refreshes) only run a
+    terse nvidia-settings query for the current offsets.
+
+    Args:
+        on_partial (callable): Optional on_partial(section, info) called as soon as
+                               one query finishes ('power' or 'clocks', with that
+                               section's keys), possibly from a worker thread.
+                               'clocks' may be reported twice if cached ranges
+                               turn out to be stale.
+        cancelled (threading.Event): If set, a pending follow-up query is skipped
+                                     and None is returned.
+    """
+    with instrumentation.timed("oc_info"):
+        if _info_source is not None: return _read_source_info(gpu_id, performance_level, on_partial)
+        return _read_overclock_info(gpu_id, performance_level, on_partial, cancelled)
+
+def _read_source_info(gpu_id, performance_level, on_partial):
+    gpu_info = _info_source.get_overclock_info(gpu_id, performance_level)
+    if on_partial is not None:
+        on_partial('power', _with_defaults(gpu_info, POWER_INFO_DEFAULTS)); on_partial('clocks', _with_defaults(gpu_info, CLOCK_INFO_DEFAULTS))
+    return _with_defaults(gpu_info, {**CLOCK_INFO_DEFAULTS, **POWER_INFO_DEFAULTS})
+
+def _read_overclock_info(gpu_id, performance_level, on_partial, cancelled):
+    logging.info(f"Querying overclock info for GPU {gpu_id}")
+    attributes = list(OC_ATTRIBUTES.values())
+    with _static_oc_lock:
+        cache_key = _static_oc_keys.get((gpu_id, performance_level))
+        static = _static_oc_cache.get(cache_key)
+    power_future = _get_query_pool().submit(_query_power_info, gpu_id)
+    if on_partial is not None:
+        power_future.add_done_callback(
+            lambda future: on_partial('power', _with_defaults(future.result()[2] if future.result() else {}, POWER_INFO_DEFAULTS)))
+    settings, settings_error = run_nv_settings_queries(gpu_id, attributes, performance_level, terse=static is not None)
+    # A failed terse read gets a full retry
+    retry = static is not None and any(current is None for current, _limits in settings.values())
+    if on_partial is not None and not retry: on_partial('clocks', _with_defaults(_clock_section(settings, static), CLOCK_INFO_DEFAULTS))
+    power_info = power_future.result()
+
+    # Cached ranges are only valid for the same board and driver
+    if static is not None and (retry or power_info is None or (power_info[0], power_info[1], performance_level) != cache_key):
+        if cancelled is not None and cancelled.is_set(): return None
+        static = None
+        settings, settings_error = run_nv_settings_queries(gpu_id, attributes, performance_level)
+        if on_partial is not None: on_partial('clocks', _with_defaults(_clock_section(settings, None), CLOCK_INFO_DEFAULTS))
+    if settings_error: logging.warning(f"nvidia-settings query reported: {settings_error}")
+
+    gpu_info = _clock_section(settings, static)
+    if power_info is not None: gpu_info.update(power_info[2])
+    if static is None and power_info is not None and all(gpu_info.get(key) is not None for key in STATIC_OC_KEYS):
+        key = (power_info[0], power_info[1], performance_level)
+        with _static_oc_lock:
+            _static_oc_cache[key] = {k: gpu_info[k] for k in STATIC_OC_KEYS}
+            _static_oc_keys[(gpu_id, performance_level)] = key
+    if not gpu_info['coolbits_enabled']: logging.warning("Coolbits features check failed. Reporting default offsets.")
+
+    final_gpu_info = _with_defaults(gpu_info, {**CLOCK_INFO_DEFAULTS, **POWER_INFO_DEFAULTS})
     logging.info(f"Final GPU Info: {final_gpu_info}")
     return final_gpu_info
 
-# --- apply_clock_offset ---
-def apply_clock_offset(gpu_id, clock_type, offset_mhz):
-    # (Implementation from previous version)
-    if clock_type == 'core': attribute = f"[gpu:{gpu_id}]/GPUGraphicsClockOffsetAllPerformanceLevels"
-    elif clock_type == 'memory': attribute = f"[gpu:{gpu_id}]/GPUMemoryTransferRateOffsetAllPerformanceLevels"
-    else: return False, "Invalid clock type specified."
+# --- Applying settings (through the privileged broker, see oc_broker.py) ---
+def _display_error():
+    """Returns an error message if nvidia-settings can't reach the X server, else None."""
     display = os.environ.get('DISPLAY'); xauthority = os.environ.get('XAUTHORITY')
-    if not display: return False, "Error: DISPLAY not found."
+    if not display: return "Error: DISPLAY not found."
     if not xauthority: default_xauth = os.path.expanduser("~/.Xauthority"); xauthority = default_xauth if os.path.exists(default_xauth) else None
-    if not xauthority: return False, "Error: XAUTHORITY not found and default missing."
-    command = [ "pkexec", "env", f"DISPLAY={display}", f"XAUTHORITY={xauthority}", "nvidia-settings", "-a", f"{attribute}={offset_mhz}" ]
-    logging.info(f"Attempting to run: {' '.join(shlex.quote(arg) for arg in command)}")
-    try:
-        result = subprocess.run(command, capture_output=True, text=True, timeout=20)
-        if result.returncode == 0:
-            stderr_lower = result.stderr.lower()
-            if "authorization required" in stderr_lower or "no authorization protocol specified" in stderr_lower: return False, f"Error: X Authentication failed. Stderr: {result.stderr.strip()}" # Treat as error
-            elif not result.stderr.strip(): msg = f"{clock_type.capitalize()} offset set to {offset_mhz} MHz."; return True, msg
-            else: msg = f"{clock_type.capitalize()} offset set {offset_mhz} MHz (warnings: {result.stderr.strip()})."; logging.warning(msg); return True, msg
-        else: # Failure
-            error_msg = result.stderr.strip(); stderr_lower = error_msg.lower()
-            if result.returncode == 126: msg = "Error: pkexec auth failed."
-            elif "authorization required" in stderr_lower or "cannot open display" in stderr_lower: msg = f"Error: X Auth failed. Stderr: {error_msg}"
-            elif "Attribute" in error_msg and "not available" in error_msg: msg = f"Error: Attribute '{attribute}' not available?"
-            elif "Valid values" in error_msg: msg = f"Error: Invalid value. {error_msg}"
-            else: msg = f"Failed to set offset. Code: {result.returncode}. Stderr: {error_msg}"
-            logging.error(msg); return False, msg
-    except FileNotFoundError: msg = "Error: pkexec/env/nvidia-settings not found." ; logging.error(msg); return False, msg
-    except subprocess.TimeoutExpired: msg = "Error: Command timed out."; logging.error(msg); return False, msg
-    except Exception as e: msg = f"An unexpected error occurred: {e}"; logging.error(msg); return False, msg
+    if not xauthority: return "Error: XAUTHORITY not found and default missing."
+    return None
+
+def apply_settings(gpu_id, power_limit=None, core_offset=None, memory_offset=None):
+    """
+    Applies several settings as one broker transaction, i.e. at most one
+    authentication prompt per session and one nvidia-settings run for both offsets.
+
+    Args:
+        power_limit (float): Watts, or None to leave unchanged.
+        core_offset, memory_offset (int): MHz, or None to leave unchanged.
+
+    Returns:
+        dict: 'power_limit' / 'core' / 'memory' -> (success, message) for each requested setting.
+    """
+    return apply_gpu_settings({gpu_id: {'power_limit': power_limit, 'core_offset': core_offset, 'memory_offset': memory_offset}})[gpu_id]
+
+def apply_gpu_settings(settings_by_gpu):
+    """
+    Applies settings for several GPUs as a single broker transaction (one
+    nvidia-settings run for all offsets), e.g. when switching profiles.
+
+    Args:
+        settings_by_gpu (dict): GPU index -> {'power_limit', 'core_offset', 'memory_offset'};
+                                missing or None values are left unchanged.
+
+    Returns:
+        dict: GPU index -> {'power_limit' / 'core' / 'memory' -> (success, message)}.
+    """
+    items = []; names = []; results = {gpu_id: {} for gpu_id in settings_by_gpu}
+    for gpu_id, settings in settings_by_gpu.items():
+        power_limit = settings.get('power_limit')
+        if power_limit is not None:
+            if not isinstance(power_limit, (int, float)) or power_limit <= 0: results[gpu_id]['power_limit'] = (False, "Invalid power limit value.")
+            else: items.append({'op': 'power_limit', 'gpu': gpu_id, 'watts': power_limit}); names.append((gpu_id, 'power_limit'))
+        for clock_type in ('core', 'memory'):
+            offset = settings.get(f'{clock_type}_offset')
+            if offset is None: continue
+            error = _display_error() if _info_source is None else None # Simulated devices need no X server
+            if error: results[gpu_id][clock_type] = (False, error)
+            else: items.append({'op': 'clock_offset', 'gpu': gpu_id, 'clock': clock_type, 'value': int(offset)}); names.append((gpu_id, clock_type))
+    if items:
+        logging.info(f"Applying via privileged broker: {items}")
+        with instrumentation.timed("oc_apply"): replies = oc_broker.get_broker().apply(items)
+        for (gpu_id, name), (success, message) in zip(names, replies):
+            if success: logging.info(message)
+            else: logging.error(message)
+            results[gpu_id][name] = (success, message)
+    return results
+
+# --- apply_clock_offset ---
+def apply_clock_offset(gpu_id, clock_type, offset_mhz):
+    if clock_type not in ('core', 'memory'): return False, "Invalid clock type specified."
+    if clock_type == 'core': return apply_settings(gpu_id, core_offset=offset_mhz)['core']
+    return apply_settings(gpu_id, memory_offset=offset_mhz)['memory']
 
 # --- apply_power_limit ---
 def apply_power_limit(gpu_id, power_limit_watts):
-    # (Implementation from previous version)
-    if not isinstance(power_limit_watts, (int, float)) or power_limit_watts <= 0: return False, "Invalid power limit value."
-    command = [ "pkexec", "nvidia-smi", "-i", str(gpu_id), "-pl", str(power_limit_watts) ]
-    logging.info(f"Attempting to run: {' '.join(command)}")
-    try:
-        result = subprocess.run(command, capture_output=True, text=True, timeout=20)
-        if result.returncode == 0:
-            if "successfully" in result.stdout.lower(): msg = f"Power limit set to {power_limit_watts}W."; return True, msg
-            elif not result.stderr.strip(): msg = f"Power limit command executed for {power_limit_watts}W."; return True, msg
-            else: msg = f"Power limit executed {power_limit_watts}W (warnings: {result.stderr.strip()})."; logging.warning(msg); return True, msg
-        else:
-            error_msg = result.stderr.strip()
-            if result.returncode == 127: msg = f"Error: pkexec/nvidia-smi not found."
-            elif result.returncode == 126: msg = "Error: Auth failed."
-            elif "Persistence Mode is disabled" in error_msg: msg = "Error: Persistence Mode required."
-            else: msg = f"Failed power limit. Code: {result.returncode}. Stderr: {error_msg}"
-            logging.error(msg); return False, msg
-    except FileNotFoundError: msg = "Error: 'pkexec' not found."; logging.error(msg); return False, msg
-    except subprocess.TimeoutExpired: msg = "Error: Command timed out."; logging.error(msg); return False, msg
-    except Exception as e: msg = f"An unexpected error occurred: {e}"; logging.error(msg); return False, msg
+    return apply_settings(gpu_id, power_limit=power_limit_watts)['power_limit']
 
 # --- Example Usage ---
 if __name__ == "__main__":
-    logging.getLogger().setLevel(logging.DEBUG) # Set debug for testing
+    logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s') # Set debug for testing
     # (System info printout remains the same)
     print("\nTesting overclocking.py with Coolbits check (DEBUG level)...")
     info = get_gpu_overclock_info(gpu_id=0)
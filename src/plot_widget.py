@@ -0,0 +1,192 @@
+# src/plot_widget.py
+import math
+import time
+
+import numpy as np
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QPointF, QRectF, QSize
+from PySide6.QtGui import QColor, QImage, QPainter, QPen, QPolygonF
+
+from . import instrumentation
+
+# One color per GPU (cycled); further metrics in the same plot use lighter shades.
+# (Dashed pens would be clearer but cost several times more to rasterize.)
+SERIES_COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b", "#e377c2", "#17becf"]
+METRIC_LIGHTNESS = [100, 160, 200]
+
+
+def series_color(gpu, metric_position):
+    color = QColor(SERIES_COLORS[gpu % len(SERIES_COLORS)])
+    return color.lighter(METRIC_LIGHTNESS[metric_position % len(METRIC_LIGHTNESS)])
+
+
+def minmax_decimate(timestamps, values, t_start, t_end, columns, maxima=None):
+    """
+    Reduces a time series to at most one (min, max) pair per pixel column.
+
+    Drawing the min/max envelope of each column keeps every spike visible while
+    the number of points drawn depends only on the widget width, not on how
+    many samples fall into the time window.
+
+    Args:
+        timestamps (ndarray): Sample times, ascending.
+        values (ndarray): Sample values (NaN = missing, skipped).
+        t_start, t_end (float): Time range mapped onto the columns.
+        columns (int): Number of pixel columns.
+        maxima (ndarray): For rollup data, the per-bucket maxima; values are
+                          then the per-bucket minima.
+
+    Returns:
+        tuple: (column_indices, mins, maxs) arrays, one entry per non-empty column.
+    """
+    valid = np.isfinite(values)
+    if maxima is not None:
+        valid &= np.isfinite(maxima)
+    if not valid.any() or columns <= 0 or t_end <= t_start:
+        empty = np.empty(0)
+        return empty.astype(np.intp), empty, empty
+    ts = timestamps[valid]
+    vs = values[valid].astype(np.float64, copy=False)
+    highs = vs if maxima is None else maxima[valid].astype(np.float64, copy=False)
+    cols = ((ts - t_start) * (columns / (t_end - t_start))).astype(np.intp)
+    np.clip(cols, 0, columns - 1, out=cols)
+    # Samples are time-ordered, so equal columns form contiguous runs
+    starts = np.flatnonzero(np.concatenate(([True], cols[1:] != cols[:-1])))
+    return cols[starts], np.minimum.reduceat(vs, starts), np.maximum.reduceat(highs, starts)
+
+
+class MetricPlotWidget(QWidget):
+    """
+    Line plot of one or more history metrics for every GPU.
+
+    The widget reads from a HistoryStore, decimates each series to its pixel
+    width (see minmax_decimate) and caches the resulting polygons. The cache is
+    only rebuilt when new data arrives or the size/time window changes, and
+    repaints are only requested while the widget is visible.
+
+    Args:
+        history (HistoryStore): Source of the time series.
+        metrics (list): (metric key, label) pairs drawn in this plot.
+        unit (str): Unit shown on the value axis.
+        window_seconds (float): Time span shown, ending at the newest sample.
+    """
+    MARGIN_LEFT = 48
+    MARGIN_OTHER = 6
+
+    def __init__(self, history, metrics, unit="", window_seconds=300, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.metrics = list(metrics)
+        self.unit = unit
+        self.window_seconds = window_seconds
+        self.setMinimumHeight(140)
+        self._data_time = None # Newest sample time announced via notify_new_data()
+        self._cache_key = None
+        self._cache = ([], math.nan, math.nan) # (series polygons, y_min, y_max)
+        self._background = QColor("#ffffff")
+        self._grid_pen = QPen(QColor("#d0d0d0"))
+
+    def sizeHint(self):
+        return QSize(480, 180)
+
+    def set_window_seconds(self, seconds):
+        self.window_seconds = seconds
+        self.update()
+
+    def notify_new_data(self, timestamp):
+        """Records that a new sample exists; repaints only if the plot is visible."""
+        self._data_time = timestamp
+        if self.isVisible():
+            self.update()
+
+    def _plot_rect(self):
+        return QRectF(self.MARGIN_LEFT, self.MARGIN_OTHER,
+                      max(self.width() - self.MARGIN_LEFT - self.MARGIN_OTHER, 1),
+                      max(self.height() - 2 * self.MARGIN_OTHER, 1))
+
+    def _rebuild_cache(self, rect):
+        t_end = self._data_time if self._data_time is not None else time.time()
+        t_start = t_end - self.window_seconds
+        columns = int(rect.width())
+        decimated = [] # (gpu, metric position, cols, mins, maxs)
+        y_min, y_max = math.inf, -math.inf
+        # Rollup tiers (longer windows) are drawn from their bucket extremes, so spikes survive
+        step = self.history.select_tier(t_start)
+        for m_pos, (metric, _label) in enumerate(self.metrics):
+            if step:
+                timestamps, lows, highs = self.history.query_envelope(metric, t_start, t_end, step=step)
+            else:
+                timestamps, lows = self.history.query(metric, t_start, t_end, step=0)
+                highs = None
+            if lows.ndim == 1:
+                lows = lows[:, None]
+                highs = None if highs is None else highs[:, None]
+            for gpu in range(lows.shape[1]):
+                cols, mins, maxs = minmax_decimate(timestamps, lows[:, gpu], t_start, t_end, columns,
+                                                   None if highs is None else highs[:, gpu])
+                if cols.size == 0:
+                    continue
+                y_min = min(y_min, float(mins.min())); y_max = max(y_max, float(maxs.max()))
+                decimated.append((gpu, m_pos, cols, mins, maxs))
+        if not decimated:
+            return [], math.nan, math.nan
+        if y_max - y_min < 1e-9:
+            y_min, y_max = y_min - 1.0, y_max + 1.0
+        pad = (y_max - y_min) * 0.05
+        y_min, y_max = y_min - pad, y_max + pad
+
+        # Envelope as a zig-zag polygon: (x, min), (x, max) per column
+        scale_y = rect.height() / (y_max - y_min)
+        series = []
+        for gpu, m_pos, cols, mins, maxs in decimated:
+            xs = rect.left() + cols + 0.5
+            lows = rect.bottom() - (mins - y_min) * scale_y
+            highs = rect.bottom() - (maxs - y_min) * scale_y
+            points = np.empty((cols.size * 2, 2))
+            points[0::2, 0] = xs; points[0::2, 1] = lows
+            points[1::2, 0] = xs; points[1::2, 1] = highs
+            polygon = QPolygonF([QPointF(x, y) for x, y in points.tolist()])
+            pen = QPen(series_color(gpu, m_pos))
+            pen.setCosmetic(True) # 1px lines take the raster fast path
+            series.append((pen, polygon))
+        return series, y_min, y_max
+
+    def paintEvent(self, event):
+        rect = self._plot_rect()
+        key = (self._data_time, self.window_seconds, rect.width(), rect.height())
+        if key != self._cache_key:
+            with instrumentation.timed("graph_rebuild"):
+                self._cache = self._rebuild_cache(rect)
+            self._cache_key = key
+        series, y_min, y_max = self._cache
+
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self._background)
+        painter.setPen(self._grid_pen)
+        painter.drawRect(rect)
+        if series:
+            painter.setPen(QColor("#404040"))
+            label_rect = QRectF(0, rect.top(), self.MARGIN_LEFT - 4, 14)
+            painter.drawText(label_rect, Qt.AlignmentFlag.AlignRight, f"{y_max:.0f} {self.unit}")
+            label_rect.moveBottom(rect.bottom())
+            painter.drawText(label_rect, Qt.AlignmentFlag.AlignRight, f"{y_min:.0f} {self.unit}")
+            for pen, polygon in series:
+                painter.setPen(pen)
+                painter.drawPolyline(polygon)
+            # Legend: metric shades (shown in GPU 0's color); colors follow the GPU panels
+            x = rect.left() + 6
+            for m_pos, (_metric, label) in enumerate(self.metrics):
+                painter.setPen(series_color(0, m_pos))
+                painter.drawText(QPointF(x, rect.top() + 14), f"— {label}")
+                x += painter.fontMetrics().horizontalAdvance(f"— {label}") + 12
+        else:
+            painter.setPen(QColor("#808080"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, "No data")
+        painter.end()
+
+    def render_to_image(self, width, height):
+        """Renders the plot into a QImage (works offscreen, used for benchmarking)."""
+        self.resize(width, height)
+        image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+        self.render(image)
+        return image
@@ -0,0 +1,100 @@
+# src/process_table.py
+"""
+Table of the GPU compute processes (processes.ProcessMonitor).
+
+Rows are keyed by (GPU, PID) and updated in place: a refresh removes the
+rows of processes that ended, appends new ones and only sets the text of
+cells whose value changed, instead of rebuilding the table. The user's
+sort order and scroll position survive refreshes.
+"""
+from PySide6.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView
+from PySide6.QtCore import Qt
+
+
+def _number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return -1.0 # 'N/A' sorts below every value
+
+
+class _NumericItem(QTableWidgetItem):
+    """Sorts by value rather than by text ('9' < '10')."""
+
+    def __lt__(self, other):
+        return _number(self.text()) < _number(other.text())
+
+
+class ProcessTable(QTableWidget):
+    HEADERS = ["GPU", "PID", "User", "Name", "Memory MiB", "SM %", "Command"]
+    NUMERIC_COLUMNS = frozenset((0, 1, 4, 5))
+
+    def __init__(self, parent=None):
+        super().__init__(0, len(self.HEADERS), parent)
+        self.setHorizontalHeaderLabels(self.HEADERS)
+        self.verticalHeader().setVisible(False)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.horizontalHeader().setStretchLastSection(True)
+        self.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.setSortingEnabled(True)
+        self.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        self._items = {} # (gpu, pid) -> [QTableWidgetItem per column]
+        self._texts = {} # (gpu, pid) -> texts shown
+
+    def _new_items(self, texts):
+        items = []
+        for column, text in enumerate(texts):
+            if column in self.NUMERIC_COLUMNS:
+                item = _NumericItem(text)
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            else:
+                item = QTableWidgetItem(text)
+            items.append(item)
+        items[-1].setToolTip(texts[-1])
+        return items
+
+    def update_rows(self, rows):
+        """
+        Shows rows ({(gpu, pid): processes.GpuProcess}), touching only what changed.
+
+        Returns:
+            tuple: (rows added, rows removed, cells changed).
+        """
+        sorting = self.isSortingEnabled()
+        self.setSortingEnabled(False) # Rows must not move while they are being edited
+        self.setUpdatesEnabled(False)
+        # ResizeToContents would measure every row again for each changed cell: size once at the end
+        header = self.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        added = changed = 0
+        try:
+            removed = [key for key in self._items if key not in rows]
+            for row_index in sorted((self.row(self._items[key][0]) for key in removed), reverse=True):
+                self.removeRow(row_index)
+            for key in removed:
+                del self._items[key], self._texts[key]
+            for key, process in rows.items():
+                texts = process.cells()
+                items = self._items.get(key)
+                if items is None:
+                    row_index = self.rowCount()
+                    self.insertRow(row_index)
+                    items = self._new_items(texts)
+                    for column, item in enumerate(items):
+                        self.setItem(row_index, column, item)
+                    self._items[key] = items
+                    added += 1
+                else:
+                    previous = self._texts[key]
+                    if texts != previous:
+                        for column, (old, new) in enumerate(zip(previous, texts)):
+                            if old != new:
+                                items[column].setText(new)
+                                changed += 1
+                        items[-1].setToolTip(texts[-1])
+                self._texts[key] = texts
+        finally:
+            self.setSortingEnabled(sorting) # Re-sorts once
+            header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+            self.setUpdatesEnabled(True)
+        return added, len(removed), changed
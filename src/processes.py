@@ -0,0 +1,238 @@
+# src/processes.py
+"""
+Per-GPU compute processes (core.get_all_gpu_processes()) joined with their
+name, command line and user from /proc.
+
+The table refreshes on its own, slower cadence (REFRESH_INTERVAL) on a
+ProcessMonitor thread, and only while somebody looks at it. On shared
+compute nodes hundreds of short-lived processes may come and go, so the
+/proc metadata is cached by (PID, start time): a process that was already
+seen costs one read of /proc/<pid>/stat per refresh, which also detects a
+PID reused by a new process. Entries of processes that are gone are
+dropped on every refresh, and user names are cached per UID.
+
+Standard library only; the GUI table is process_table.ProcessTable.
+"""
+import os
+import pwd
+import threading
+import time
+
+try:
+    from . import core, instrumentation
+    from .metrics import is_missing
+except ImportError:
+    import core, instrumentation # Running processes.py directly from src/
+    from metrics import is_missing
+
+REFRESH_INTERVAL = 5.0
+# Longest command line kept per process (characters)
+MAX_CMDLINE = 512
+
+
+class ProcessInfo:
+    """/proc metadata of one process; fields are None if it could not be read."""
+    __slots__ = ("name", "cmdline", "user")
+
+    def __init__(self, name=None, cmdline=None, user=None):
+        self.name = name
+        self.cmdline = cmdline
+        self.user = user
+
+
+class GpuProcess:
+    """One process on one GPU, as shown in a table row."""
+    __slots__ = ("gpu", "pid", "used_memory", "sm_util", "name", "user", "cmdline")
+
+    def __init__(self, gpu, pid, used_memory, sm_util, name, user, cmdline):
+        self.gpu = gpu
+        self.pid = pid
+        self.used_memory = used_memory # MiB, NaN if unknown
+        self.sm_util = sm_util         # %, NaN if unknown
+        self.name = name
+        self.user = user
+        self.cmdline = cmdline
+
+    @property
+    def key(self):
+        return (self.gpu, self.pid)
+
+    def cells(self):
+        """Display texts in process_table column order."""
+        return (str(self.gpu), str(self.pid), self.user or "?", self.name or "?",
+                "N/A" if is_missing(self.used_memory) else f"{self.used_memory:.0f}",
+                "N/A" if is_missing(self.sm_util) else f"{self.sm_util:.0f}",
+                self.cmdline or "")
+
+
+class ProcessInfoCache:
+    """
+    /proc lookups cached by (PID, start time).
+
+    Args:
+        proc_root (str): procfs mount point (another one for containers or tests).
+    """
+
+    def __init__(self, proc_root="/proc"):
+        self.proc_root = proc_root
+        self._entries = {} # pid -> (start time, ProcessInfo)
+        self._users = {}   # uid -> user name
+        self.misses = 0    # Full lookups so far (for diagnostics)
+
+    def _read(self, pid, name):
+        with open(os.path.join(self.proc_root, str(pid), name), "rb") as proc_file:
+            return proc_file.read()
+
+    def _start_time(self, pid):
+        """Start time (clock ticks since boot, field 22 of stat), or None if the process is gone."""
+        try:
+            stat = self._read(pid, "stat")
+        except OSError:
+            return None
+        # The command name (field 2) may contain spaces and parentheses: split after the last ')'
+        fields = stat[stat.rfind(b")") + 2:].split()
+        return int(fields[19]) if len(fields) > 19 else None
+
+    def _user(self, uid):
+        user = self._users.get(uid)
+        if user is None:
+            try:
+                user = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                user = str(uid)
+            self._users[uid] = user
+        return user
+
+    def _lookup(self, pid):
+        self.misses += 1
+        info = ProcessInfo()
+        try:
+            info.name = self._read(pid, "comm").decode(errors="replace").strip()
+            cmdline = self._read(pid, "cmdline")[:MAX_CMDLINE * 4]
+            info.cmdline = cmdline.replace(b"\0", b" ").decode(errors="replace").strip()[:MAX_CMDLINE]
+            info.user = self._user(os.stat(os.path.join(self.proc_root, str(pid))).st_uid)
+        except OSError:
+            pass # Exited meanwhile, or hidden (hidepid, another PID namespace)
+        return info
+
+    def get(self, pid):
+        """ProcessInfo of pid; None if no such process is visible in proc_root."""
+        start_time = self._start_time(pid)
+        if start_time is None:
+            return None
+        entry = self._entries.get(pid)
+        if entry is None or entry[0] != start_time: # New, or the PID was reused
+            entry = (start_time, self._lookup(pid))
+            self._entries[pid] = entry
+        return entry[1]
+
+    def retain(self, pids):
+        """Drops the entries of all PIDs not in pids."""
+        for pid in [pid for pid in self._entries if pid not in pids]:
+            del self._entries[pid]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ProcessMonitor:
+    """
+    Refreshes the process list every interval seconds on a background thread
+    while visible (set_visible()); hidden, it does nothing at all.
+
+    Args:
+        interval (float): Seconds between refreshes.
+        on_update (callable): Called (monitor thread) after each refresh that changed the list.
+        reader (callable): Returns core.get_all_gpu_processes()-shaped data.
+        proc_root (str): procfs mount point for the metadata.
+    """
+
+    def __init__(self, interval=REFRESH_INTERVAL, on_update=None, reader=None, proc_root="/proc"):
+        self.interval = interval
+        self.on_update = on_update
+        self._reader = reader or core.get_all_gpu_processes
+        self.cache = ProcessInfoCache(proc_root)
+        self._lock = threading.Lock()
+        self._rows = {} # (gpu, pid) -> GpuProcess
+        self._version = 0
+        self._visible = threading.Event()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """
+        Reads the processes once and publishes them.
+
+        Returns:
+            bool: True if the list changed, False if not or if the read failed.
+        """
+        with instrumentation.timed("processes"):
+            processes = self._reader()
+            if processes is None:
+                return False
+            rows = {}
+            for gpu, entries in processes.items():
+                for pid, used_memory, sm_util, reported_name in entries:
+                    info = self.cache.get(pid)
+                    if info is None:
+                        # Not visible here (e.g. a container showing host PIDs): what the driver says
+                        row = GpuProcess(gpu, pid, used_memory, sm_util, reported_name, None, reported_name)
+                    else:
+                        row = GpuProcess(gpu, pid, used_memory, sm_util, info.name or reported_name,
+                                         info.user, info.cmdline or reported_name)
+                    rows[row.key] = row
+            self.cache.retain({pid for _gpu, pid in rows})
+        with self._lock:
+            if rows.keys() == self._rows.keys() and all(
+                    row.cells() == self._rows[key].cells() for key, row in rows.items()):
+                return False
+            self._rows = rows
+            self._version += 1
+        if self.on_update is not None:
+            self.on_update()
+        return True
+
+    def latest(self):
+        """
+        Returns:
+            tuple: (version, {(gpu, pid): GpuProcess}); the version changes with the list.
+        """
+        with self._lock:
+            return self._version, self._rows
+
+    # --- Background refresh ---
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="gpu-mon-processes", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        self._visible.set() # Wakes a paused thread so it can exit
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def set_visible(self, visible):
+        """Refreshes (immediately, then every interval) only while the table is shown."""
+        if visible and not self._visible.is_set():
+            self._visible.set()
+            self._wake.set()
+        elif not visible:
+            self._visible.clear()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._visible.wait()
+            if self._stop_event.is_set():
+                return
+            self._wake.clear()
+            started = time.monotonic()
+            try:
+                self.refresh()
+            except Exception as e:
+                instrumentation.error("processes", "exception", type(e).__name__, detail=str(e))
+            self._wake.wait(max(self.interval - (time.monotonic() - started), 0.0))
@@ -0,0 +1,250 @@
+# src/profiles.py
+"""
+Named overclocking profiles (power limit, clock offsets, optional fan curve)
+stored per GPU UUID, so a profile follows a board even if the GPU indices
+change between boots.
+
+Applying a profile reads the current state of the GPUs it names, works out
+the settings that differ and sends all of them as one broker transaction:
+switching 8 GPUs between two profiles is one privileged round-trip (and at
+most one nvidia-settings run), and GPUs already in the profile's state are
+not touched at all.
+
+Profiles live in one JSON file (DEFAULT_PATH):
+
+    {"version": 1, "autostart": "quiet",
+     "profiles": {"quiet": {"GPU-6a1f...": {"power_limit": 250, "core_offset": 0, "memory_offset": 0,
+                                             "fan_curve": [[40, 30], [70, 60], [85, 100]]}}}}
+
+The autostart profile is applied when the GUI starts (main.py --profile
+overrides it for one run). Standard library only; overclocking is imported
+when a profile is captured or applied.
+"""
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from . import core
+
+DEFAULT_PATH = os.path.join(os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config"),
+                            "gpu_mon_qt", "profiles.json")
+# Profile setting -> get_gpu_overclock_info() key holding its current value
+SETTING_KEYS = {
+    "power_limit": "power_limit_current",
+    "core_offset": "core_offset_current",
+    "memory_offset": "memory_offset_current",
+}
+# Power limits closer than this (W) to the current one count as unchanged
+POWER_LIMIT_TOLERANCE = 0.5
+# Concurrent get_gpu_overclock_info() reads while comparing against the current state
+READ_WORKERS = 8
+
+
+class ProfileError(Exception):
+    """Unknown profile or unreadable profile file."""
+
+
+class ProfileStore:
+    """
+    The profile file. Every change is written immediately (atomically, via a
+    temporary file in the same directory).
+
+    Args:
+        path (str): Profile file; created on the first save (default DEFAULT_PATH).
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_PATH
+        self._data = {"version": 1, "autostart": None, "profiles": {}}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as profile_file:
+                    self._data.update(json.load(profile_file))
+            except (OSError, ValueError) as e:
+                raise ProfileError(f"Cannot read profiles from {self.path}: {e}") from e
+
+    def names(self):
+        return sorted(self._data["profiles"])
+
+    def get(self, name):
+        """Returns the profile as {uuid: settings}; raises ProfileError if it does not exist."""
+        try:
+            return self._data["profiles"][name]
+        except KeyError:
+            raise ProfileError(f"No profile named '{name}'.") from None
+
+    def save(self, name, profile):
+        self._data["profiles"][name] = profile
+        self._write()
+
+    def delete(self, name):
+        self.get(name)
+        del self._data["profiles"][name]
+        if self._data["autostart"] == name:
+            self._data["autostart"] = None
+        self._write()
+
+    @property
+    def autostart(self):
+        return self._data["autostart"]
+
+    def set_autostart(self, name):
+        """Applies profile name at startup from now on (None: no autostart profile)."""
+        if name is not None:
+            self.get(name)
+        self._data["autostart"] = name
+        self._write()
+
+    def _write(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(prefix=".profiles-", dir=directory)
+        try:
+            with os.fdopen(handle, "w") as profile_file:
+                json.dump(self._data, profile_file, indent=2)
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+# --- Capture and apply ---
+def _gpu_indices_by_uuid(static_infos):
+    return {info["uuid"]: int(info["index"]) for info in static_infos or ()}
+
+
+def _read_current(gpu_indices):
+    """GPU index -> get_gpu_overclock_info() result, read concurrently."""
+    from . import overclocking
+    gpu_indices = list(gpu_indices)
+    if not gpu_indices:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(READ_WORKERS, len(gpu_indices)), thread_name_prefix="profile-read") as pool:
+        return dict(zip(gpu_indices, pool.map(overclocking.get_gpu_overclock_info, gpu_indices)))
+
+
+def capture(static_infos=None, gpu_indices=None):
+    """
+    Builds a profile from the current state of the GPUs.
+
+    Args:
+        static_infos (list): core.get_all_gpu_static_info() result (queried if None).
+        gpu_indices (iterable): GPUs to include (default: all).
+
+    Returns:
+        dict: {uuid: {'power_limit', 'core_offset', 'memory_offset'}}; offsets are
+              left out for GPUs without Coolbits, unreadable values are skipped.
+    """
+    if static_infos is None:
+        static_infos = core.get_all_gpu_static_info() or []
+    uuids = {index: uuid for uuid, index in _gpu_indices_by_uuid(static_infos).items()}
+    if gpu_indices is not None:
+        uuids = {index: uuids[index] for index in gpu_indices if index in uuids}
+    profile = {}
+    for index, info in _read_current(uuids).items():
+        if not info:
+            continue
+        settings = {}
+        for setting, key in SETTING_KEYS.items():
+            if setting != "power_limit" and not info.get("coolbits_enabled"):
+                continue
+            if info.get(key) is not None:
+                settings[setting] = info[key]
+        profile[uuids[index]] = settings
+    return profile
+
+
+def plan(profile, static_infos, current):
+    """
+    Settings that have to change to reach profile.
+
+    Args:
+        profile (dict): {uuid: settings}.
+        static_infos (list): Maps UUIDs to GPU indices.
+        current (dict): GPU index -> get_gpu_overclock_info() result (None if unreadable).
+
+    Returns:
+        tuple: ({GPU index: {setting: value}} for overclocking.apply_gpu_settings(),
+                [UUIDs of the profile not present in this system]).
+    """
+    indices = _gpu_indices_by_uuid(static_infos)
+    changes = {}
+    missing = []
+    for uuid, settings in profile.items():
+        index = indices.get(uuid)
+        if index is None:
+            missing.append(uuid)
+            continue
+        info = current.get(index) or {}
+        differing = {}
+        for setting, key in SETTING_KEYS.items():
+            wanted = settings.get(setting)
+            if wanted is None:
+                continue
+            present = info.get(key)
+            if setting != "power_limit" and not info.get("coolbits_enabled"):
+                present = None # Offsets reported without Coolbits are defaults, not readings
+            if present is None:
+                differing[setting] = wanted
+            elif setting == "power_limit":
+                if abs(present - wanted) >= POWER_LIMIT_TOLERANCE:
+                    differing[setting] = wanted
+            elif int(present) != int(wanted):
+                differing[setting] = int(wanted)
+        if differing:
+            changes[index] = differing
+    return changes, missing
+
+
+def pending_changes(profile, static_infos=None):
+    """plan() against the GPUs' current state (read concurrently); static info is queried if None."""
+    if static_infos is None:
+        static_infos = core.get_all_gpu_static_info() or []
+    indices = _gpu_indices_by_uuid(static_infos)
+    current = _read_current(sorted(indices[uuid] for uuid in profile if uuid in indices))
+    return plan(profile, static_infos, current)
+
+
+def apply_profile(profile, static_infos=None):
+    """
+    Brings the GPUs named by profile to its settings with one broker
+    transaction, skipping settings that already match.
+
+    Returns:
+        dict: GPU index -> {'power_limit' / 'core' / 'memory' -> (success, message)}
+              for the settings that were sent (empty if nothing differed).
+    """
+    from . import overclocking
+    changes, missing = pending_changes(profile, static_infos)
+    for uuid in missing:
+        logging.warning(f"Profile GPU {uuid} is not present; skipped.")
+    if not changes:
+        logging.info("All GPUs already match the profile.")
+        return {}
+    return overclocking.apply_gpu_settings(changes)
+
+
+def fan_curves(profile):
+    """
+    The profile's fan curves as a fan_control config keyed by UUID, or None
+    if the profile has none.
+    """
+    curves = {uuid: {"points": settings["fan_curve"]} for uuid, settings in profile.items() if settings.get("fan_curve")}
+    return {"gpus": curves} if curves else None
+
+
+def startup_profile(name=None, path=None):
+    """
+    The profile to apply at startup: name if given, else the store's autostart
+    profile. Returns (name, profile), or (None, None) if there is none.
+
+    Raises:
+        ProfileError: If the named profile does not exist or the file is unreadable.
+    """
+    store = ProfileStore(path)
+    name = name or store.autostart
+    if name is None:
+        return None, None
+    return name, store.get(name)
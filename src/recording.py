@@ -0,0 +1,334 @@
+# src/recording.py
+"""
+Append-only binary recording of monitoring sessions, and replay.
+
+File layout:
+    Header (padded to a multiple of HEADER_ALIGN bytes):
+        8s   magic b"GPUMONR1"
+        u32  header size in bytes
+        u32  record size in bytes
+        u64  record count (updated after every append)
+        u32  length of the JSON metadata that follows
+        ...  JSON metadata: {"gpu_count", "metrics", "static_info"}
+    Records (fixed width, little endian):
+        f8   timestamp (time.time())
+        f4   values[gpu_count][len(metrics)], NaN = missing
+
+The file is memory-mapped and grown in chunks, so an append is a handful of
+stores into the mapping, with no per-sample text formatting or write() call.
+"""
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from .collector import Snapshot
+from .history import HISTORY_METRICS, snapshot_to_values
+from .metrics import METRIC_INDEX, GpuSample
+
+MAGIC = b"GPUMONR1"
+HEADER_ALIGN = 4096
+_HEADER_FIXED = struct.Struct("<8sIIQI")
+_COUNT_OFFSET = 16 # Offset of the u64 record count in the header
+# Every INDEX_STRIDE-th record timestamp goes into the sparse time index
+INDEX_STRIDE = 256
+
+
+def _record_dtype(gpu_count, metric_count):
+    return np.dtype([("t", "<f8"), ("v", "<f4", (gpu_count, metric_count))])
+
+
+class HistoryRecorder:
+    """
+    Appends collector snapshots to a memory-mapped recording file.
+
+    Args:
+        path (str): Output file. An existing file is appended to if its layout
+                    (GPU count, metrics) matches, otherwise ValueError is raised.
+        gpu_count (int): Number of GPUs per record.
+        metrics (tuple): Metric names per GPU (column order).
+        static_info (list): Static GPU info dicts stored in the header, so a
+                            replay can label panels without querying hardware.
+        chunk_records (int): Records the file grows by when the mapping is full.
+    """
+
+    def __init__(self, path, gpu_count, metrics=HISTORY_METRICS, static_info=None, chunk_records=4096):
+        self.path = path
+        self.metrics = tuple(metrics)
+        self.metric_index = {name: i for i, name in enumerate(self.metrics)}
+        self.gpu_count = gpu_count
+        self.dtype = _record_dtype(gpu_count, len(self.metrics))
+        self.chunk_records = chunk_records
+        self._lock = threading.Lock()
+        self._scratch = np.full((gpu_count, len(self.metrics)), np.nan, dtype=np.float64)
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if exists:
+            header = read_header(path)
+            if header["gpu_count"] != gpu_count or tuple(header["metrics"]) != self.metrics:
+                os.close(self._fd)
+                raise ValueError(f"Recording '{path}' has a different layout; choose another file.")
+            self.header_size = header["header_size"]
+            self.count = header["record_count"]
+        else:
+            meta = json.dumps({"gpu_count": gpu_count, "metrics": list(self.metrics),
+                               "static_info": static_info or []}).encode("utf-8")
+            fixed_size = _HEADER_FIXED.size + len(meta)
+            self.header_size = -(-fixed_size // HEADER_ALIGN) * HEADER_ALIGN
+            header = _HEADER_FIXED.pack(MAGIC, self.header_size, self.dtype.itemsize, 0, len(meta)) + meta
+            os.ftruncate(self._fd, self.header_size)
+            os.pwrite(self._fd, header, 0)
+            self.count = 0
+        self._mm = None
+        self._records = None
+        self._count_view = None
+        self._map(max(self.count + chunk_records, chunk_records))
+
+    def _map(self, capacity):
+        # Views into the old mapping must be released before it can be closed
+        self._records = None
+        self._count_view = None
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+        os.ftruncate(self._fd, self.header_size + capacity * self.dtype.itemsize)
+        self._mm = mmap.mmap(self._fd, self.header_size + capacity * self.dtype.itemsize)
+        self.capacity = capacity
+        self._records = np.ndarray((capacity,), dtype=self.dtype, buffer=self._mm, offset=self.header_size)
+        self._count_view = np.ndarray((1,), dtype="<u8", buffer=self._mm, offset=_COUNT_OFFSET)
+
+    def append(self, timestamp, values):
+        """Appends one record; values has shape (gpu_count, len(metrics))."""
+        with self._lock:
+            if self._mm is None:
+                return
+            if self.count >= self.capacity:
+                self._map(self.capacity + self.chunk_records)
+            record = self._records[self.count]
+            record["t"] = timestamp
+            record["v"] = values
+            self.count += 1
+            self._count_view[0] = self.count # Published last: readers never see a half-written record
+
+    def append_snapshot(self, snapshot):
+        """Collector sink interface: records a Snapshot."""
+        self.append(snapshot.timestamp, snapshot_to_values(snapshot, self.metric_index, self._scratch))
+
+    def close(self):
+        """Flushes and trims the file to the records actually written."""
+        with self._lock:
+            if self._mm is None:
+                return
+            self._records = None
+            self._count_view = None
+            self._mm.flush()
+            self._mm.close()
+            self._mm = None
+            os.ftruncate(self._fd, self.header_size + self.count * self.dtype.itemsize)
+            os.close(self._fd)
+
+
+def read_header(path):
+    """
+    Reads a recording's header.
+
+    Returns:
+        dict: 'header_size', 'record_size', 'record_count' plus the JSON metadata
+              ('gpu_count', 'metrics', 'static_info').
+
+    Raises:
+        ValueError: If the file is not a recording.
+    """
+    with open(path, "rb") as f:
+        fixed = f.read(_HEADER_FIXED.size)
+        if len(fixed) < _HEADER_FIXED.size:
+            raise ValueError(f"'{path}' is too short to be a recording.")
+        magic, header_size, record_size, record_count, meta_len = _HEADER_FIXED.unpack(fixed)
+        if magic != MAGIC:
+            raise ValueError(f"'{path}' is not a GPU monitor recording.")
+        meta = json.loads(f.read(meta_len).decode("utf-8"))
+    meta.update(header_size=header_size, record_size=record_size, record_count=record_count)
+    return meta
+
+
+class HistoryFile:
+    """
+    Read-only view of a recording. Range queries binary-search a sparse index
+    (every INDEX_STRIDE-th timestamp) and then only the one block the range
+    starts in, so the whole file never has to be read.
+
+    The file may still be growing; call refresh() to pick up new records.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        header = read_header(path)
+        self.gpu_count = header["gpu_count"]
+        self.metrics = tuple(header["metrics"])
+        self.metric_index = {name: i for i, name in enumerate(self.metrics)}
+        self.static_info = header.get("static_info", [])
+        self.header_size = header["header_size"]
+        self.dtype = _record_dtype(self.gpu_count, len(self.metrics))
+        if header["record_size"] != self.dtype.itemsize:
+            raise ValueError(f"'{path}' has an unexpected record size.")
+        self._file = open(path, "rb")
+        self._mm = None
+        self.records = None
+        self.count = 0
+        self._index = np.empty(0)
+        self.refresh()
+
+    def refresh(self):
+        """Remaps the file and extends the sparse index with newly written records."""
+        size = os.fstat(self._file.fileno()).st_size
+        count = struct.unpack_from("<Q", os.pread(self._file.fileno(), 8, _COUNT_OFFSET))[0]
+        count = min(count, (size - self.header_size) // self.dtype.itemsize)
+        if count == self.count and self._mm is not None:
+            return
+        self.records = None
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        self.records = np.ndarray((count,), dtype=self.dtype, buffer=self._mm, offset=self.header_size)
+        known = len(self._index)
+        new_index = self.records["t"][known * INDEX_STRIDE::INDEX_STRIDE]
+        self._index = np.concatenate((self._index, new_index))
+        self.count = count
+
+    def time_range(self):
+        if self.count == 0:
+            return None
+        return float(self.records["t"][0]), float(self.records["t"][self.count - 1])
+
+    def find(self, timestamp, side="left"):
+        """Returns the record position of timestamp (like np.searchsorted on all timestamps)."""
+        if self.count == 0:
+            return 0
+        block = max(int(np.searchsorted(self._index, timestamp, side=side)) - 1, 0)
+        lo = block * INDEX_STRIDE
+        hi = min(lo + 2 * INDEX_STRIDE, self.count)
+        return lo + int(np.searchsorted(self.records["t"][lo:hi], timestamp, side=side))
+
+    def range(self, start=-math.inf, end=math.inf):
+        """
+        Returns:
+            tuple: (timestamps, values) copies for records with start <= t <= end;
+                   values has shape (n, gpu_count, len(metrics)).
+        """
+        i = self.find(start, "left")
+        j = self.find(end, "right")
+        rows = self.records[i:j]
+        return rows["t"].copy(), rows["v"].copy()
+
+    def close(self):
+        self.records = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+
+def values_to_sample(gpu_index, values, metrics):
+    """Rebuilds a GpuSample from one GPU's recorded values (columns named by metrics)."""
+    sample = GpuSample(gpu_index)
+    row = sample.values
+    for key, value in zip(metrics, values.tolist()):
+        position = METRIC_INDEX.get(key)
+        if position is not None:
+            row[position] = value
+    return sample
+
+
+class SessionReplayer:
+    """
+    Plays a recording back as collector Snapshots, so MainWindow renders it
+    through the same update_dynamic_status() path as live data. Exposes the
+    same start()/stop()/latest() interface as SampleCollector.
+
+    Args:
+        path (str): Recording to play.
+        speed (float): Playback rate (1.0 = real time, 10.0 = ten times faster,
+                       0 = as fast as possible).
+        on_snapshot (callable): Called with each Snapshot (replay thread).
+        history (HistoryStore): Optional store fed with the replayed snapshots.
+        start, end (float): Optional time range to play.
+    """
+
+    def __init__(self, path, speed=1.0, on_snapshot=None, history=None, start=-math.inf, end=math.inf):
+        self.file = HistoryFile(path)
+        self.speed = speed
+        self.on_snapshot = on_snapshot
+        self.history = history
+        self.range = (start, end)
+        self.finished = threading.Event()
+        self._lock = threading.Lock()
+        self._latest = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def static_info(self):
+        return self.file.static_info
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="gpu-mon-replay", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.file.close()
+
+    def latest(self):
+        with self._lock:
+            return self._latest
+
+    def set_visible(self, visible):
+        """Collector interface; a replay keeps its pace whether or not it is shown."""
+
+    def _build_snapshot(self, sequence, timestamp, values):
+        metrics = self.file.metrics
+        gpus = {gpu: values_to_sample(gpu, values[gpu], metrics) for gpu in range(values.shape[0])
+                if not np.isnan(values[gpu]).all()}
+        vram_temperature = None
+        column = self.file.metric_index.get("vram_temperature")
+        if column is not None and values.shape[0] and not math.isnan(values[0, column]):
+            vram_temperature = int(values[0, column])
+        return Snapshot(sequence, timestamp, gpus, vram_temperature)
+
+    def _run(self):
+        first = self.file.find(self.range[0], "left")
+        last = self.file.find(self.range[1], "right")
+        wall_start = time.monotonic()
+        t0 = None
+        sequence = 0
+        for position in range(first, last):
+            if self._stop_event.is_set():
+                return
+            record = self.file.records[position]
+            timestamp = float(record["t"])
+            if t0 is None:
+                t0 = timestamp
+            if self.speed > 0:
+                delay = wall_start + (timestamp - t0) / self.speed - time.monotonic()
+                if delay > 0 and self._stop_event.wait(delay):
+                    return
+            sequence += 1
+            snapshot = self._build_snapshot(sequence, timestamp, record["v"])
+            with self._lock:
+                self._latest = snapshot
+            if self.history is not None:
+                self.history.append_snapshot(snapshot)
+            if self.on_snapshot is not None:
+                self.on_snapshot(snapshot)
+        self.finished.set()
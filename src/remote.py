@@ -0,0 +1,750 @@
+# src/remote.py
+"""
+Multi-node monitoring: an agent on every workstation streams its collector
+snapshots over TCP to one aggregator, which presents the GPUs of all
+connected nodes as a single collector (MainWindow panels, graphs, history).
+
+    python -m src.remote agent --connect monitor-host:7450   # on every node
+    python main.py --aggregate 7450                          # the window
+    python -m src.remote aggregate --listen 7450             # headless summary
+
+Protocol (version 1). Every message is varint(length) + type byte + payload.
+Integers are unsigned LEB128 varints, signed ones zigzag-encoded first;
+strings are varint(length) + UTF-8.
+
+    HELLO    agent -> aggregator, once per connection: magic 'GPUM',
+             version, node name, sample interval (ms), field count, then
+             per field its metric key and decimals, static info (JSON)
+    WELCOME  aggregator -> agent: version, bitmask of the offered fields it
+             wants; the agent encodes only those from then on
+    FRAME    agent -> aggregator, one per snapshot: timestamp delta (ms),
+             GPU count, then per GPU a changed-field mask, a missing-field
+             mask (subset of changed) and, for every changed field with a
+             value, the delta of round(value * 10**decimals) to its previous
+             value
+
+Values travel as scaled integers, so deltas are exact; a GPU whose readings
+did not change costs two bytes per frame. Both sides start a connection
+from 'everything missing' and TCP delivers every frame in order, so there is
+no resynchronisation inside a stream: a reconnect starts over with HELLO.
+
+The aggregator serves all connections from one asyncio loop on a
+background thread and publishes a merged Snapshot once per interval, so the
+GUI and history see one sample per tick however many agents report.
+Standard library only.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import sys
+import threading
+import time
+
+from . import core, instrumentation
+from .collector import SampleCollector, Snapshot
+from .metrics import GPU_METRICS, METRIC_INDEX, GpuSample, is_missing
+
+PROTOCOL_VERSION = 1
+DEFAULT_PORT = 7450
+MAGIC = b"GPUM"
+MSG_HELLO, MSG_WELCOME, MSG_FRAME = 1, 2, 3
+# Larger messages are rejected as corrupt (a FRAME of 64 GPUs is well under 4 KiB)
+MAX_MESSAGE_BYTES = 1 << 20
+# Seconds an agent waits before reconnecting after consecutive failures
+RECONNECT_DELAYS = (1.0, 2.0, 5.0, 10.0, 30.0)
+# GPUs the aggregating window keeps graph history for (memory is preallocated per GPU)
+REMOTE_HISTORY_GPUS = 32
+# Most GPUs one agent may report; larger FRAME counts are rejected as corrupt
+MAX_NODE_GPUS = 256
+# A connected node whose last FRAME is older than this many sample intervals is shown as missing
+STALE_INTERVALS = 3
+
+
+class ProtocolError(Exception):
+    """Malformed or unexpected message."""
+
+
+# --- Encoding ---
+def encode_varint(value, out):
+    """Appends unsigned value to bytearray out."""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data, position):
+    """Returns (value, next position)."""
+    result = 0
+    shift = 0
+    while True:
+        try:
+            byte = data[position]
+        except IndexError:
+            raise ProtocolError("Truncated varint.") from None
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, position
+        shift += 7
+        if shift > 63:
+            raise ProtocolError("Varint too long.")
+
+
+def zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def _encode_str(text, out):
+    raw = text.encode("utf-8")
+    encode_varint(len(raw), out)
+    out += raw
+
+
+def _decode_str(data, position):
+    length, position = decode_varint(data, position)
+    end = position + length
+    if end > len(data):
+        raise ProtocolError("Truncated string.")
+    return bytes(data[position:end]).decode("utf-8"), end
+
+
+def pack_message(message_type, payload):
+    out = bytearray()
+    encode_varint(len(payload) + 1, out)
+    out.append(message_type)
+    out += payload
+    return bytes(out)
+
+
+def encode_hello(name, interval_ms, fields, static_info):
+    """fields: [(metric key, decimals)] offered by the agent."""
+    out = bytearray(MAGIC)
+    encode_varint(PROTOCOL_VERSION, out)
+    _encode_str(name, out)
+    encode_varint(interval_ms, out)
+    encode_varint(len(fields), out)
+    for key, decimals in fields:
+        _encode_str(key, out)
+        encode_varint(decimals, out)
+    _encode_str(json.dumps(static_info or []), out)
+    return bytes(out)
+
+
+def decode_hello(payload):
+    if bytes(payload[:4]) != MAGIC:
+        raise ProtocolError("Not a gpu_mon agent.")
+    version, position = decode_varint(payload, 4)
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"Unsupported protocol version {version}.")
+    name, position = _decode_str(payload, position)
+    interval_ms, position = decode_varint(payload, position)
+    count, position = decode_varint(payload, position)
+    fields = []
+    for _ in range(count):
+        key, position = _decode_str(payload, position)
+        decimals, position = decode_varint(payload, position)
+        fields.append((key, decimals))
+    static_json, position = _decode_str(payload, position)
+    try:
+        static_info = json.loads(static_json)
+    except ValueError as e:
+        raise ProtocolError(f"Bad static info: {e}") from None
+    return {"name": name, "interval_ms": interval_ms, "fields": fields, "static_info": static_info}
+
+
+def encode_welcome(accepted_mask):
+    out = bytearray()
+    encode_varint(PROTOCOL_VERSION, out)
+    encode_varint(accepted_mask, out)
+    return bytes(out)
+
+
+def decode_welcome(payload):
+    version, position = decode_varint(payload, 0)
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"Unsupported protocol version {version}.")
+    accepted_mask, _position = decode_varint(payload, position)
+    return accepted_mask
+
+
+def offered_fields():
+    """Every GPU metric with the decimals it is displayed with."""
+    return [(metric.key, metric.precision) for metric in GPU_METRICS]
+
+
+class FrameEncoder:
+    """
+    Agent side: Snapshot -> FRAME payload with the changes since the previous one.
+
+    Args:
+        fields (list): Negotiated (metric key, decimals) pairs, in wire order.
+    """
+
+    def __init__(self, fields):
+        self._columns = [(METRIC_INDEX[key], 10 ** decimals) for key, decimals in fields]
+        self._previous_ms = 0
+        self._state = [] # Per GPU: scaled int or None (missing) per field
+
+    def encode(self, snapshot):
+        out = bytearray()
+        timestamp_ms = int(round(snapshot.timestamp * 1000.0))
+        encode_varint(zigzag(timestamp_ms - self._previous_ms), out)
+        self._previous_ms = timestamp_ms
+        gpus = snapshot.gpus
+        count = max(gpus) + 1 if gpus else 0
+        del self._state[count:] # GPUs that disappear start over when they return
+        while len(self._state) < count:
+            self._state.append([None] * len(self._columns))
+        encode_varint(count, out)
+        deltas = bytearray()
+        for index in range(count):
+            sample = gpus.get(index)
+            state = self._state[index]
+            changed = missing = 0
+            deltas.clear()
+            for bit, (position, scale) in enumerate(self._columns):
+                value = sample.values[position] if sample is not None else None
+                new = None if value is None or is_missing(value) else int(round(value * scale))
+                old = state[bit]
+                if new == old:
+                    continue
+                changed |= 1 << bit
+                if new is None:
+                    missing |= 1 << bit
+                else:
+                    encode_varint(zigzag(new - (old or 0)), deltas)
+                state[bit] = new
+            encode_varint(changed, out)
+            encode_varint(missing, out)
+            out += deltas
+        return bytes(out)
+
+
+class FrameDecoder:
+    """
+    Aggregator side: applies FRAME payloads to the current samples of a node.
+
+    Changed GPUs get new GpuSample objects; unchanged ones keep theirs, so
+    samples handed out earlier are never modified.
+
+    Args:
+        fields (list): Negotiated (metric key, decimals) pairs, in wire order.
+        index_for (callable): Local GPU index -> index of the produced GpuSample.
+    """
+
+    def __init__(self, fields, index_for=lambda index: index):
+        self._columns = [(METRIC_INDEX[key], 10 ** decimals) for key, decimals in fields]
+        self._index_for = index_for
+        self._previous_ms = 0
+        self._state = []
+        self.samples = []   # Current GpuSample per local GPU index
+        self.timestamp = None
+
+    def decode(self, payload):
+        """Returns the local indices of the GPUs that changed."""
+        delta, position = decode_varint(payload, 0)
+        self._previous_ms += unzigzag(delta)
+        self.timestamp = self._previous_ms / 1000.0
+        count, position = decode_varint(payload, position)
+        # Every GPU costs at least its two mask bytes: a larger count cannot be genuine
+        if count > MAX_NODE_GPUS or count > (len(payload) - position) // 2:
+            raise ProtocolError(f"Bad GPU count {count} in frame.")
+        del self._state[count:]
+        del self.samples[count:]
+        while len(self._state) < count:
+            self._state.append([None] * len(self._columns))
+            self.samples.append(GpuSample(self._index_for(len(self.samples))))
+        changed_gpus = []
+        for index in range(count):
+            changed, position = decode_varint(payload, position)
+            missing, position = decode_varint(payload, position)
+            if not changed:
+                continue
+            state = self._state[index]
+            sample = self.samples[index].copy()
+            values = sample.values
+            for bit, (column, scale) in enumerate(self._columns):
+                mask = 1 << bit
+                if not changed & mask:
+                    continue
+                if missing & mask:
+                    state[bit] = None
+                    values[column] = float("nan")
+                else:
+                    delta, position = decode_varint(payload, position)
+                    state[bit] = (state[bit] or 0) + unzigzag(delta)
+                    values[column] = state[bit] / scale
+            if changed >> len(self._columns):
+                raise ProtocolError("Frame names a field that was not negotiated.")
+            self.samples[index] = sample
+            changed_gpus.append(index)
+        if position != len(payload):
+            raise ProtocolError("Trailing bytes in frame.")
+        return changed_gpus
+
+
+# --- Agent ---
+def _read_message_blocking(sock):
+    header = bytearray()
+    while True:
+        byte = sock.recv(1)
+        if not byte:
+            raise ConnectionError("Connection closed.")
+        header += byte
+        if byte[0] < 0x80:
+            break
+    length, _position = decode_varint(header, 0)
+    if not 0 < length <= MAX_MESSAGE_BYTES:
+        raise ProtocolError(f"Bad message length {length}.")
+    body = bytearray()
+    while len(body) < length:
+        chunk = sock.recv(length - len(body))
+        if not chunk:
+            raise ConnectionError("Connection closed.")
+        body += chunk
+    return body[0], body[1:]
+
+
+class RemoteAgent:
+    """
+    Collector sink that streams every snapshot to an aggregator. Connects
+    lazily on the first snapshot and reconnects with back-off after errors;
+    snapshots taken while disconnected are dropped.
+
+    Args:
+        host (str): Aggregator address.
+        port (int): Aggregator port.
+        name (str): Node name shown in the aggregator (default: host name).
+        interval (float): Sampling interval, announced to the aggregator.
+        static_info (list): core.get_all_gpu_static_info() of this node.
+        timeout (float): Seconds for connecting and for each send.
+        clock (callable): Monotonic time source (replaceable for testing).
+    """
+
+    def __init__(self, host, port=DEFAULT_PORT, name=None, interval=1.0, static_info=None, timeout=5.0,
+                 clock=time.monotonic):
+        self.address = (host, port)
+        self.name = name or socket.gethostname()
+        self.interval = interval
+        self.static_info = static_info or []
+        self.timeout = timeout
+        self._clock = clock
+        self._socket = None
+        self._encoder = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self.bytes_sent = 0
+        self.frames_sent = 0
+
+    @property
+    def connected(self):
+        return self._socket is not None
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            fields = offered_fields()
+            hello = pack_message(MSG_HELLO, encode_hello(self.name, int(self.interval * 1000), fields, self.static_info))
+            sock.sendall(hello)
+            message_type, payload = _read_message_blocking(sock)
+            if message_type != MSG_WELCOME:
+                raise ProtocolError(f"Expected WELCOME, got message type {message_type}.")
+            accepted = decode_welcome(payload)
+        except BaseException:
+            sock.close()
+            raise
+        self._encoder = FrameEncoder([field for bit, field in enumerate(fields) if accepted >> bit & 1])
+        self._socket = sock
+        self.bytes_sent += len(hello)
+        logging.info(f"Connected to aggregator {self.address[0]}:{self.address[1]}")
+
+    def _disconnect(self, category, message):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        self._retry_at = self._clock() + RECONNECT_DELAYS[min(self._failures, len(RECONNECT_DELAYS) - 1)]
+        self._failures += 1
+        instrumentation.error("remote_agent", category, message)
+
+    def append_snapshot(self, snapshot):
+        """Collector sink interface: sends snapshot (connecting first if needed)."""
+        if self._socket is None:
+            if self._clock() < self._retry_at:
+                return
+            try:
+                self._connect()
+            except (OSError, ProtocolError) as e:
+                self._disconnect("connect", f"Cannot connect to {self.address[0]}:{self.address[1]}: {e}")
+                return
+        message = pack_message(MSG_FRAME, self._encoder.encode(snapshot))
+        try:
+            self._socket.sendall(message)
+        except OSError as e:
+            self._disconnect("send", f"Connection to aggregator lost: {e}")
+            return
+        self._failures = 0
+        self.bytes_sent += len(message)
+        self.frames_sent += 1
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+# --- Aggregator ---
+class _Node:
+    """One agent connection as seen by the aggregator."""
+
+    def __init__(self, name, peer, interval_ms):
+        self.name = name
+        self.peer = peer
+        self.interval_ms = interval_ms
+        self.decoder = None
+        self.connected = True
+        self.stale = False      # Connected, but no FRAME for STALE_INTERVALS intervals
+        self.last_frame = time.monotonic()
+        self.frames = 0
+        self.bytes_received = 0
+
+
+class Aggregator:
+    """
+    TCP server for agents that behaves like a SampleCollector (start(),
+    stop(), latest(), set_visible(), on_snapshot, history), so MainWindow
+    renders remote GPUs through its usual path.
+
+    Each (node name, local GPU index) gets a stable global GPU index the
+    first time it is seen; static_info describes it with the node's own
+    static info plus 'host' and 'remote_index'. GPUs of disconnected nodes
+    are left out of the snapshots; those of a node that stays connected but
+    stops sending frames are reported with every value missing.
+
+    Args:
+        host (str): Listen address ('' = all interfaces).
+        port (int): Listen port (0 = any free port, see .port after start()).
+        interval (float): Seconds between published snapshots.
+        on_snapshot (callable): Called with each Snapshot (aggregator thread).
+        history (HistoryStore): Optional store every snapshot is appended to.
+        fields (iterable): Metric keys requested from agents (default: all).
+    """
+
+    def __init__(self, host="", port=DEFAULT_PORT, interval=1.0, on_snapshot=None, history=None, fields=None):
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.on_snapshot = on_snapshot
+        self.history = history
+        self.fields = set(fields) if fields is not None else {metric.key for metric in GPU_METRICS}
+        self._lock = threading.Lock()
+        self._latest = None
+        self._sequence = 0
+        self._nodes = {}      # name -> _Node (connected or not)
+        self._gpu_ids = {}    # (node name, local index) -> global index
+        self._static = {}     # global index -> static info dict
+        self._dirty = False   # New data since the last published snapshot
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._start_error = None
+        self._handlers = set() # Connection handler tasks (loop thread only)
+        self._writers = set()
+
+    # --- Collector interface ---
+    def start(self):
+        """Starts the server thread; raises OSError if the port cannot be bound."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="gpu-mon-aggregator", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._start_error is not None:
+            self._thread = None
+            raise self._start_error
+
+    def stop(self, timeout=2.0):
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._stop_future.cancel)
+            self._thread.join(timeout)
+        self._thread = None
+
+    def latest(self):
+        with self._lock:
+            return self._latest
+
+    def set_visible(self, visible):
+        """Collector interface; agents keep their own pace."""
+
+    @property
+    def static_info(self):
+        """Static info of every GPU seen so far, ordered by global index."""
+        with self._lock:
+            return [self._static[index] for index in sorted(self._static)]
+
+    def nodes(self):
+        """Per node: name, peer, connected, stale, GPU count, frames and bytes received."""
+        with self._lock:
+            return [{"name": node.name, "peer": node.peer, "connected": node.connected, "stale": node.stale,
+                     "gpus": len(node.decoder.samples) if node.decoder else 0,
+                     "frames": node.frames, "bytes_received": node.bytes_received}
+                    for node in self._nodes.values()]
+
+    # --- Server ---
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    async def _serve(self):
+        self._stop_future = self._loop.create_future()
+        try:
+            server = await asyncio.start_server(self._handle, self.host or None, self.port)
+        except OSError as e:
+            self._start_error = e
+            self._ready.set()
+            return
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        publisher = self._loop.create_task(self._publish_loop())
+        try:
+            await self._stop_future
+        except asyncio.CancelledError:
+            pass
+        publisher.cancel()
+        server.close()
+        # Closing the connections ends their handlers through the normal disconnect path
+        handlers = list(self._handlers)
+        for writer in list(self._writers):
+            writer.close()
+        await asyncio.gather(publisher, *handlers, return_exceptions=True)
+
+    async def _publish_loop(self):
+        next_tick = self._loop.time()
+        while True:
+            next_tick += self.interval
+            await asyncio.sleep(max(next_tick - self._loop.time(), 0.0))
+            self._check_stale()
+            if self._dirty:
+                self._publish()
+
+    def _check_stale(self):
+        """Flags connected nodes that stopped sending frames (and those that resumed)."""
+        now = time.monotonic()
+        for node in list(self._nodes.values()):
+            if not node.connected:
+                continue
+            timeout = STALE_INTERVALS * max(node.interval_ms / 1000.0, self.interval)
+            stale = now - node.last_frame > timeout
+            if stale != node.stale:
+                with self._lock:
+                    node.stale = stale
+                self._dirty = True
+                if stale:
+                    logging.warning(f"Agent '{node.name}' sent no frame for {timeout:g} s; its GPUs are shown as missing")
+
+    def _publish(self):
+        gpus = {}
+        with self._lock:
+            self._dirty = False
+            for node in self._nodes.values():
+                if node.connected and node.decoder is not None:
+                    for sample in node.decoder.samples:
+                        # Decoded samples are never modified; a stale node's GPUs get empty ones
+                        gpus[sample.index] = GpuSample(sample.index) if node.stale else sample
+            self._sequence += 1
+            snapshot = Snapshot(self._sequence, time.time(), gpus)
+            self._latest = snapshot
+        if self.history is not None:
+            self.history.append_snapshot(snapshot)
+        if self.on_snapshot is not None:
+            self.on_snapshot(snapshot)
+
+    def _register(self, hello, peer):
+        """Creates the node for a HELLO (lock held); returns it."""
+        name = hello["name"]
+        existing = self._nodes.get(name)
+        if existing is not None and existing.connected:
+            name = f"{name} ({peer})" # Same name twice at once: keep both apart
+        node = _Node(name, peer, hello["interval_ms"])
+        self._nodes[name] = node
+        static_by_index = {}
+        for info in hello["static_info"]:
+            try:
+                static_by_index[int(info["index"])] = info
+            except (KeyError, TypeError, ValueError):
+                pass
+
+        def index_for(local_index):
+            key = (name, local_index)
+            with self._lock:
+                global_index = self._gpu_ids.get(key)
+                if global_index is None:
+                    global_index = self._gpu_ids[key] = len(self._gpu_ids)
+                info = dict(static_by_index.get(local_index, {}))
+                info.update(index=str(global_index), host=node.name, remote_index=str(local_index))
+                self._static[global_index] = info
+            return global_index
+
+        accepted = [field for field in hello["fields"] if field[0] in self.fields and field[0] in METRIC_INDEX]
+        node.decoder = FrameDecoder(accepted, index_for)
+        mask = 0
+        for bit, field in enumerate(hello["fields"]):
+            if field in accepted:
+                mask |= 1 << bit
+        return node, mask
+
+    async def _handle(self, reader, writer):
+        self._handlers.add(asyncio.current_task())
+        self._writers.add(writer)
+        peer = writer.get_extra_info("peername")
+        peer = f"{peer[0]}:{peer[1]}" if isinstance(peer, tuple) else str(peer)
+        node = None
+        try:
+            message_type, payload, _size = await _read_message(reader)
+            if message_type != MSG_HELLO:
+                raise ProtocolError(f"Expected HELLO, got message type {message_type}.")
+            hello = decode_hello(payload)
+            with self._lock:
+                node, mask = self._register(hello, peer)
+            writer.write(pack_message(MSG_WELCOME, encode_welcome(mask)))
+            await writer.drain()
+            logging.info(f"Agent '{node.name}' connected from {peer}")
+            while True:
+                message_type, payload, size = await _read_message(reader)
+                if message_type != MSG_FRAME:
+                    raise ProtocolError(f"Unexpected message type {message_type}.")
+                with instrumentation.timed("remote_decode"):
+                    node.decoder.decode(payload)
+                node.last_frame = time.monotonic()
+                node.frames += 1
+                node.bytes_received += size
+                self._dirty = True
+        except asyncio.IncompleteReadError:
+            pass # Agent went away
+        except ProtocolError as e:
+            instrumentation.error("aggregator", "protocol", str(e), detail=peer)
+        except (ConnectionError, OSError) as e:
+            instrumentation.error("aggregator", "connection", type(e).__name__, detail=f"{peer}: {e}")
+        finally:
+            if node is not None:
+                with self._lock:
+                    node.connected = False
+                self._dirty = True
+                logging.info(f"Agent '{node.name}' disconnected")
+            writer.close()
+            self._writers.discard(writer)
+            self._handlers.discard(asyncio.current_task())
+
+
+async def _read_message(reader):
+    """Returns (message type, payload, bytes on the wire)."""
+    length = 0
+    shift = 0
+    header = 0
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        header += 1
+        length |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+        if shift > 28:
+            raise ProtocolError("Bad message length.")
+    if not 0 < length <= MAX_MESSAGE_BYTES:
+        raise ProtocolError(f"Bad message length {length}.")
+    body = await reader.readexactly(length)
+    return body[0], body[1:], header + length
+
+
+# --- Command line ---
+def parse_address(text, default_host=""):
+    """'host:port', 'host' or 'port' -> (host, port)."""
+    host, _, port = text.rpartition(":")
+    if not host and not text.isdigit() and ":" not in text:
+        return text, DEFAULT_PORT
+    try:
+        return host or default_host, int(port)
+    except ValueError:
+        raise ValueError(f"Invalid address '{text}'.") from None
+
+
+def run_agent(args):
+    host, port = parse_address(args.connect)
+    static_info = core.get_all_gpu_static_info() or []
+    agent = RemoteAgent(host, port, name=args.name, interval=args.interval, static_info=static_info)
+    collector = SampleCollector(interval=args.interval, sinks=[agent])
+    collector.start()
+    try:
+        while True:
+            time.sleep(3600)
+    finally:
+        collector.stop()
+        agent.close()
+
+
+def run_aggregator(args):
+    host, port = parse_address(args.listen)
+    aggregator = Aggregator(host, port, interval=args.interval)
+    aggregator.start()
+    print(f"Listening on {host or '*'}:{aggregator.port}", file=sys.stderr)
+    received = 0
+    try:
+        while True:
+            time.sleep(args.interval)
+            nodes = aggregator.nodes()
+            total = sum(node["bytes_received"] for node in nodes)
+            connected = [node for node in nodes if node["connected"]]
+            print(f"{len(connected)} node(s), {sum(node['gpus'] for node in connected)} GPU(s), "
+                  f"{(total - received) / args.interval:.0f} B/s", flush=True)
+            received = total
+    finally:
+        aggregator.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.remote", description="Stream GPU samples between nodes.")
+    parser.add_argument("--simulate", metavar="SPEC", help="report simulated GPUs (agent), e.g. '8,seed=2'")
+    commands = parser.add_subparsers(dest="command", required=True)
+    agent = commands.add_parser("agent", help="sample this node and send to an aggregator")
+    agent.add_argument("--connect", required=True, metavar="HOST[:PORT]", help=f"aggregator (default port {DEFAULT_PORT})")
+    agent.add_argument("--name", help="node name shown by the aggregator (default: host name)")
+    agent.add_argument("--interval", type=float, default=1.0, help="seconds between samples (default 1.0)")
+    agent.set_defaults(handler=run_agent)
+    aggregate = commands.add_parser("aggregate", help="receive from agents and print a summary line per interval")
+    aggregate.add_argument("--listen", default=str(DEFAULT_PORT), metavar="[HOST:]PORT",
+                           help=f"listen address (default {DEFAULT_PORT} on all interfaces)")
+    aggregate.add_argument("--interval", type=float, default=1.0, help="seconds between summaries (default 1.0)")
+    aggregate.set_defaults(handler=run_aggregator)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.simulate:
+        from . import simulated
+        try:
+            simulated.install(simulated.from_spec(args.simulate))
+        except ValueError as e:
+            parser.error(str(e))
+    try:
+        return args.handler(args)
+    except KeyboardInterrupt:
+        return 0
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        core.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+# src/scheduler.py
+"""
+Per-metric polling schedule for the SampleCollector.
+
+Each metric has its own interval (fast-moving power/utilization every tick,
+memory usage and VRAM temperature less often). Static GPU info is read once
+at startup and never scheduled. Deadlines advance on a fixed grid from the
+start time, so the schedule does not drift with sampling latency, and
+metrics falling due at (nearly) the same time are handed out together so the
+collector reads them with a single backend call.
+"""
+import math
+import time
+
+from .metrics import GPU_METRICS, VRAM_TEMPERATURE
+
+# Seconds between reads of each metric for a 1 s base interval (metrics.Metric.interval);
+# SampleCollector scales them with its own interval.
+DEFAULT_METRIC_INTERVALS = {metric.key: metric.interval for metric in GPU_METRICS + (VRAM_TEMPERATURE,)}
+
+
+class MetricScheduler:
+    """
+    Deadline-based schedule of independent per-metric intervals.
+
+    Args:
+        intervals (dict): Metric name -> seconds between reads.
+        coalesce_window (float): Metrics due within this many seconds of the
+                                 earliest one are returned in the same batch.
+        clock (callable): Monotonic time source (replaceable for testing).
+    """
+
+    def __init__(self, intervals, coalesce_window=0.05, clock=time.monotonic):
+        self.intervals = dict(intervals)
+        self.coalesce_window = coalesce_window
+        self.rate_factor = 1.0 # Multiplies every interval (see set_rate_factor)
+        self.paused = False
+        self._clock = clock
+        now = clock()
+        self._deadlines = {metric: now for metric in self.intervals} # Everything is due at start
+
+    def interval(self, metric):
+        """Effective interval of metric, including the current rate factor."""
+        return self.intervals[metric] * self.rate_factor
+
+    def next_deadline(self):
+        """Monotonic time the next batch is due (math.inf while paused or empty)."""
+        if self.paused or not self._deadlines:
+            return math.inf
+        return min(self._deadlines.values())
+
+    def pop_due(self, now=None):
+        """
+        Returns the metrics due at now and schedules their next reads.
+
+        A metric that missed several ticks (slow backend, suspended machine) is
+        read once and its deadline moves to the next grid point after now, so
+        missed ticks are dropped instead of being fired back to back.
+
+        Returns:
+            frozenset: Due metric names (empty while paused).
+        """
+        if self.paused:
+            return frozenset()
+        if now is None:
+            now = self._clock()
+        due = []
+        for metric, deadline in self._deadlines.items():
+            if deadline <= now + self.coalesce_window:
+                step = self.interval(metric)
+                missed = max(math.floor((now - deadline) / step), 0)
+                self._deadlines[metric] = deadline + (missed + 1) * step
+                due.append(metric)
+        return frozenset(due)
+
+    def set_rate_factor(self, factor):
+        """
+        Scales every interval by factor (e.g. 10 while no view is visible).
+        Slowing down restarts all metrics on a common grid from now, so they
+        keep being read together; speeding up pulls pending deadlines in so the
+        new rate applies at once.
+        """
+        now = self._clock()
+        previous = self.rate_factor
+        self.rate_factor = factor
+        for metric, deadline in self._deadlines.items():
+            if factor > previous:
+                self._deadlines[metric] = now + self.interval(metric)
+            elif factor < previous:
+                self._deadlines[metric] = min(deadline, now + self.interval(metric))
+
+    def wake_all(self, delay=0.0):
+        """
+        Makes every metric due after delay seconds: immediately when a view
+        becomes visible again, or one tick later to retry after a failed read.
+        """
+        due = self._clock() + delay
+        for metric in self._deadlines:
+            self._deadlines[metric] = due
@@ -0,0 +1,366 @@
+# src/simulated.py
+"""
+Simulated GPUs for development and scale testing without Nvidia hardware.
+
+SimulatedDevices generates any number of devices with seeded, smoothly
+time-varying readings (utilization cycles, power following utilization up to
+the power limit, lagging temperature and fan curve, clocks reacting to the
+offsets), plus injected latency and failure modes. install() routes core
+(static info, dynamic status, VRAM temperature), overclocking (OC info) and
+the OC broker (applies change the simulated limits and offsets) to it, so the
+GUI, exporter, CLI and history store run unchanged:
+
+    python main.py --simulate 32
+    python exporter.py --simulate "64,seed=3,latency_ms=40,timeout_rate=0.01"
+    python -m src.cli --simulate "16,na=fan_speed" snapshot
+
+Readings are a pure function of (seed, GPU index, seconds since start), so
+runs driven by a fixed clock (see the clock argument) are reproducible.
+"""
+import math
+import random
+import threading
+import time
+
+from . import core, instrumentation, oc_broker, overclocking
+from .metrics import GPU_METRICS, METRIC_INDEX, GpuSample, positions_for
+
+# (name, VRAM MiB, idle W, board power W, boost MHz, memory MHz); a node uses one model
+GPU_MODELS = [
+    ("NVIDIA GeForce RTX 4090", 24564, 22.0, 450.0, 2520, 10501),
+    ("NVIDIA RTX A6000", 49140, 25.0, 300.0, 1800, 8001),
+    ("NVIDIA GeForce RTX 4080", 16376, 14.0, 320.0, 2505, 11201),
+    ("NVIDIA GeForce RTX 3090", 24576, 25.0, 350.0, 1695, 9751),
+]
+DRIVER_VERSION = "570.86.16"
+IDLE_CORE_CLOCK = 210
+IDLE_MEMORY_CLOCK = 405
+OFFSET_RANGES = {"core": (-1000, 1000), "memory": (-2000, 6000)}
+PROCESS_NAMES = ["python3", "pt_main_thread", "ollama_llama_server", "blender", "hashcat", "ffmpeg"]
+
+SPEC_HELP = ("simulate GPUs instead of reading the hardware: a GPU count, optionally followed by "
+             "comma-separated options, e.g. '32,seed=1,latency_ms=20,timeout_rate=0.01,na=fan_speed,missing_helper'")
+
+_MASK64 = (1 << 64) - 1
+
+
+def _noise(*keys):
+    """Deterministic pseudo-random value in [-1, 1) for integer keys (splitmix64 mixing)."""
+    state = 0
+    for key in keys:
+        state = (state ^ (key & _MASK64)) + 0x9E3779B97F4A7C15 & _MASK64
+        state = (state ^ (state >> 30)) * 0xBF58476D1CE4E5B9 & _MASK64
+        state = (state ^ (state >> 27)) * 0x94D049BB133111EB & _MASK64
+        state ^= state >> 31
+    return state / float(1 << 63) - 1.0
+
+
+def _smooth_noise(seed, index, channel, t):
+    """_noise interpolated linearly between integer steps of t, so signals wander instead of jumping."""
+    step = math.floor(t)
+    fraction = t - step
+    return (1.0 - fraction) * _noise(seed, index, channel, step) + fraction * _noise(seed, index, channel, step + 1)
+
+
+def _clamp(value, low, high):
+    return low if value < low else high if value > high else value
+
+
+class _Device:
+    """Parameters and OC state of one simulated GPU."""
+
+    def __init__(self, seed, index, model):
+        rng = random.Random(seed * 1000003 + index)
+        self.index = index
+        self.name, self.vram_mib, self.idle_power, self.board_power, self.boost_clock, self.memory_clock = model
+        self.uuid = f"GPU-{seed & 0xFFFFFFFF:08x}-{index:04x}-4000-8000-{index:012x}"
+        # Workload: utilization cycling around a base level
+        self.util_base = rng.uniform(20.0, 70.0)
+        self.util_amplitude = rng.uniform(10.0, 35.0)
+        self.omega = 2.0 * math.pi / rng.uniform(30.0, 300.0)
+        self.phase = rng.uniform(0.0, 2.0 * math.pi)
+        self.memory_fraction = rng.uniform(0.1, 0.8)
+        # Thermals: first-order lag towards ambient + resistance * power
+        self.ambient = rng.uniform(28.0, 36.0)
+        self.thermal_resistance = rng.uniform(42.0, 52.0) / self.board_power
+        self.thermal_tau = rng.uniform(20.0, 60.0)
+        # OC state, changed through apply_item()
+        self.power_limit_min = round(self.board_power * 0.33)
+        self.power_limit_max = round(self.board_power * 1.1)
+        self.power_limit = self.board_power
+        self.offsets = {"core": 0, "memory": 0}
+        self.fan_target = None # Manual fan speed (%), None = automatic
+
+
+class SimulatedDevices:
+    """
+    Synthetic GPUs usable as core device source, telemetry backend and OC info source.
+
+    Args:
+        gpu_count (int): Number of devices.
+        seed (int): Seeds device parameters and noise; equal seeds give equal readings.
+        latency_ms (float): Delay of every dynamic status read.
+        jitter_ms (float): Uniform random extra delay (seeded) on top of latency_ms.
+        vram_latency_ms (float): Delay of every VRAM temperature read.
+        oc_latency_ms (float): Delay of every OC info read.
+        timeout_rate (float): Probability that a status read times out (returns None
+                              after timeout_s, like a hung nvidia-smi).
+        timeout_s (float): Duration of a simulated timeout.
+        na_fields (iterable): Metric keys always reported as missing ('[N/A]').
+        na_rate (float): Probability of any other single value being missing.
+        missing_helper (bool): Behave as if gddr6_helper were not installed.
+        no_coolbits (bool): Report clock offsets as unavailable.
+        processes (int): Compute processes per GPU (see get_all_processes()).
+        process_lifetime_s (float): Seconds each simulated process runs before it is
+                                    replaced by a new one (with a new PID).
+        clock (callable): Time source for the signals (seconds); time.monotonic by default.
+        sleep (callable): Used for injected delays (replaceable to run without waiting).
+    """
+    name = "simulated"
+
+    def __init__(self, gpu_count=8, seed=0, latency_ms=0.0, jitter_ms=0.0, vram_latency_ms=0.0,
+                 oc_latency_ms=0.0, timeout_rate=0.0, timeout_s=5.0, na_fields=(), na_rate=0.0,
+                 missing_helper=False, no_coolbits=False, processes=2, process_lifetime_s=60.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        unknown = [key for key in na_fields if key not in METRIC_INDEX]
+        if unknown:
+            raise ValueError(f"Unknown metric(s) for na_fields: {', '.join(unknown)}")
+        self.seed = seed
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.vram_latency = vram_latency_ms / 1000.0
+        self.oc_latency = oc_latency_ms / 1000.0
+        self.timeout_rate = timeout_rate
+        self.timeout = timeout_s
+        self.na_positions = frozenset(METRIC_INDEX[key] for key in na_fields)
+        self.na_rate = na_rate
+        self.has_vram_helper = not missing_helper
+        self.no_coolbits = no_coolbits
+        self.processes = processes
+        self.process_lifetime = process_lifetime_s
+        self._clock = clock
+        self._sleep = sleep
+        self._started = clock()
+        self._rng = random.Random(seed) # Latency jitter and failure draws
+        self._lock = threading.Lock()
+        model = GPU_MODELS[seed % len(GPU_MODELS)]
+        self.devices = [_Device(seed, index, model) for index in range(gpu_count)]
+
+    def _elapsed(self):
+        return self._clock() - self._started
+
+    def _draw(self):
+        with self._lock:
+            return self._rng.random()
+
+    # --- Signals ---
+    def readings(self, index, t):
+        """All GPU metric values (GPU_METRICS order) of device index at t seconds after start."""
+        device = self.devices[index]
+        seed = self.seed
+        wave = math.sin(device.omega * t + device.phase)
+        util = _clamp(device.util_base + device.util_amplitude * wave + 12.0 * _smooth_noise(seed, index, 1, t / 2.0),
+                      0.0, 100.0)
+        active = util >= 3.0
+        # Power follows utilization (and the core offset) until the power limit caps it
+        demand = device.idle_power + (device.board_power - device.idle_power) * util / 100.0 * (1.0 + device.offsets["core"] / 10000.0)
+        power = min(demand, device.power_limit) + 1.5 * _smooth_noise(seed, index, 2, t)
+        throttle = min(device.power_limit / demand, 1.0)
+        # Temperature: first-order lag of the mean and cyclic power (closed form, so no state)
+        swing = (device.board_power - device.idle_power) * device.util_amplitude / 100.0
+        lag = device.omega * device.thermal_tau
+        mean_power = min(device.idle_power + (device.board_power - device.idle_power) * device.util_base / 100.0, device.power_limit)
+        temperature = (device.ambient + device.thermal_resistance * mean_power
+                       + device.thermal_resistance * swing / math.sqrt(1.0 + lag * lag)
+                       * math.sin(device.omega * t + device.phase - math.atan(lag))
+                       + 0.8 * _smooth_noise(seed, index, 3, t / 5.0))
+        temperature = round(temperature)
+        fan = _clamp(round(30.0 + (temperature - 40.0) * 1.6), 30, 100) if device.fan_target is None else device.fan_target
+        memory_used = round(device.vram_mib * _clamp(device.memory_fraction + 0.08 * _smooth_noise(seed, index, 4, t / 30.0), 0.01, 0.95))
+        memory_free = device.vram_mib - memory_used - 310 # Reserved by the driver
+        memory_util = _clamp(round(util * 0.45 + 4.0 * _smooth_noise(seed, index, 5, t)), 0, 100)
+        if active:
+            core_clock = round((device.boost_clock + device.offsets["core"]) * (0.85 + 0.15 * throttle) / 15.0) * 15
+            memory_clock = device.memory_clock + device.offsets["memory"] // 2
+        else:
+            core_clock, memory_clock = IDLE_CORE_CLOCK, IDLE_MEMORY_CLOCK
+        values = {
+            "temperature": temperature, "gpu_util": round(util), "mem_util": memory_util,
+            "mem_free": memory_free, "mem_used": memory_used, "power": round(power, 2),
+            "power_limit": device.power_limit,
+            "core_clock": core_clock, "mem_clock": memory_clock, "fan_speed": fan,
+        }
+        return [float(values[metric.key]) for metric in GPU_METRICS]
+
+    # --- Device source interface (core.set_device_source) ---
+    def get_all_static_info(self):
+        return [{
+            "index": str(device.index),
+            "uuid": device.uuid,
+            "name": device.name,
+            "vram": f"{device.vram_mib} MiB",
+            "driver": DRIVER_VERSION,
+            "pcie_max_gen": "4",
+        } for device in self.devices]
+
+    def get_all_dynamic_status(self, fields=None):
+        """Same contract as core.SmiBackend.get_all_dynamic_status(), including its failures."""
+        if self.latency or self.jitter:
+            self._sleep(self.latency + self.jitter * self._draw())
+        if self.timeout_rate and self._draw() < self.timeout_rate:
+            self._sleep(self.timeout)
+            instrumentation.error("gpu_status", "timeout", "nvidia-smi timed out (simulated)")
+            return None
+        if not self.devices:
+            return None
+        positions = positions_for(fields)
+        t = self._elapsed()
+        samples = {}
+        for device in self.devices:
+            readings = self.readings(device.index, t)
+            sample = GpuSample(device.index)
+            row = sample.values
+            for position in positions:
+                if position in self.na_positions or (self.na_rate and self._draw() < self.na_rate):
+                    continue # Stays MISSING, like '[N/A]'
+                row[position] = readings[position]
+            samples[device.index] = sample
+        return samples
+
+    def get_all_processes(self):
+        """
+        Same contract as core.get_all_gpu_processes(). Each GPU runs `processes`
+        processes sharing its used memory and utilization; every process slot
+        restarts with a new PID each process_lifetime_s (staggered per slot).
+        """
+        t = self._elapsed()
+        processes = {}
+        for device in self.devices:
+            readings = self.readings(device.index, t)
+            memory_used = readings[METRIC_INDEX["mem_used"]] / max(self.processes, 1)
+            util = readings[METRIC_INDEX["gpu_util"]] / max(self.processes, 1)
+            rows = []
+            for slot in range(self.processes):
+                slot_id = device.index * self.processes + slot
+                offset = (_noise(self.seed, slot_id, 7) + 1.0) / 2.0 * self.process_lifetime
+                generation = int((t + offset) // self.process_lifetime)
+                pid = 100000 + slot_id * 1000 + generation % 1000
+                name = PROCESS_NAMES[int((_noise(self.seed, slot_id, generation) + 1.0) / 2.0 * len(PROCESS_NAMES))]
+                rows.append((pid, float(round(memory_used)), float(round(util)), name))
+            processes[device.index] = rows
+        return processes
+
+    def get_vram_temperature(self):
+        if not self.has_vram_helper:
+            return "No Helper"
+        if not self.devices:
+            return "Not Supported"
+        if self.vram_latency:
+            self._sleep(self.vram_latency)
+        t = self._elapsed()
+        core_temperature = self.readings(0, t)[METRIC_INDEX["temperature"]]
+        return int(core_temperature + 8 + round(2.0 * _smooth_noise(self.seed, 0, 6, t / 3.0)))
+
+    def close(self):
+        pass
+
+    # --- OC info source (overclocking.set_overclock_info_source) and broker results ---
+    def get_overclock_info(self, gpu_id, performance_level=3):
+        if self.oc_latency:
+            self._sleep(self.oc_latency)
+        if not 0 <= gpu_id < len(self.devices):
+            return {}
+        device = self.devices[gpu_id]
+        info = {
+            "power_limit_current": float(device.power_limit),
+            "power_limit_min": float(device.power_limit_min),
+            "power_limit_max": float(device.power_limit_max),
+            "power_limit_default": float(device.board_power),
+            "coolbits_enabled": not self.no_coolbits,
+        }
+        if not self.no_coolbits:
+            for clock_type, (low, high) in OFFSET_RANGES.items():
+                info[f"{clock_type}_offset_current"] = device.offsets[clock_type]
+                info[f"{clock_type}_offset_min"] = low
+                info[f"{clock_type}_offset_max"] = high
+        return info
+
+    def apply_item(self, item):
+        """Applies one broker item (see oc_broker.validate_item) to the simulated state."""
+        error = oc_broker.validate_item(item)
+        if error:
+            return False, error
+        if item["gpu"] >= len(self.devices):
+            return False, f"GPU {item['gpu']} does not exist."
+        device = self.devices[item["gpu"]]
+        if item["op"] == "power_limit":
+            watts = item["watts"]
+            if not device.power_limit_min <= watts <= device.power_limit_max:
+                return False, f"Power limit must be between {device.power_limit_min} W and {device.power_limit_max} W."
+            device.power_limit = float(watts)
+            return True, f"Power limit set to {watts:.2f} W on GPU {device.index}."
+        if self.no_coolbits:
+            return False, "Attribute not available"
+        if item["op"] == "fan_speed":
+            device.fan_target = item["value"]
+            return True, f"Fan {item['fan']} set to {item['value']}%."
+        if item["op"] == "fan_auto":
+            device.fan_target = None
+            return True, f"GPU {device.index} fans returned to automatic control."
+        low, high = OFFSET_RANGES[item["clock"]]
+        if not low <= item["value"] <= high:
+            return False, f"Offset must be between {low} and {high} MHz."
+        device.offsets[item["clock"]] = item["value"]
+        return True, f"{item['clock'].capitalize()} clock offset set to {item['value']} MHz on GPU {device.index}."
+
+
+# --- Installation ---
+_FLAG_OPTIONS = ("missing_helper", "no_coolbits")
+_VALUE_OPTIONS = {
+    "gpus": ("gpu_count", int), "seed": ("seed", int),
+    "latency_ms": ("latency_ms", float), "jitter_ms": ("jitter_ms", float),
+    "vram_latency_ms": ("vram_latency_ms", float), "oc_latency_ms": ("oc_latency_ms", float),
+    "timeout_rate": ("timeout_rate", float), "timeout_s": ("timeout_s", float),
+    "na_rate": ("na_rate", float), "na": ("na_fields", lambda value: value.split("+")),
+    "processes": ("processes", int), "process_lifetime_s": ("process_lifetime_s", float),
+}
+
+
+def from_spec(spec):
+    """
+    Creates SimulatedDevices from a command line spec: a GPU count and/or
+    comma-separated options (see SPEC_HELP); 'na' takes '+'-separated metric keys.
+
+    Raises:
+        ValueError: For unknown options or malformed values.
+    """
+    options = {}
+    for part in str(spec).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, has_value, value = part.partition("=")
+        if not has_value and name.isdigit():
+            options["gpu_count"] = int(name)
+        elif not has_value and name in _FLAG_OPTIONS:
+            options[name] = True
+        elif has_value and name in _VALUE_OPTIONS:
+            argument, convert = _VALUE_OPTIONS[name]
+            options[argument] = convert(value)
+        else:
+            raise ValueError(f"Unknown simulation option '{part}'")
+    return SimulatedDevices(**options)
+
+
+def install(devices):
+    """Routes all hardware readings and OC applies of this process to devices."""
+    core.set_device_source(devices)
+    overclocking.set_overclock_info_source(devices)
+    oc_broker.set_broker(oc_broker.FakeOcBroker(results=devices.apply_item))
+
+
+def uninstall():
+    """Returns to real hardware readings."""
+    core.set_device_source(None)
+    overclocking.set_overclock_info_source(None)
+    oc_broker.set_broker(None)
@@ -0,0 +1,129 @@
+# src/static_cache.py
+"""
+On-disk cache of core.get_all_gpu_static_info(), so the main window can
+show its panels without waiting for an nvidia-smi run.
+
+Static info only changes when the driver is reloaded (updated) or the
+machine reboots (hardware changes), so the cache is keyed by the driver
+version and the kernel's boot ID. Both are read from procfs/sysfs, which
+costs no process spawn. A cache whose key does not match is ignored; a
+matching one is still revalidated by the caller in the background.
+
+Standard library only.
+"""
+import json
+import os
+import re
+import tempfile
+
+try:
+    from . import core
+except ImportError:
+    import core # Running static_cache.py directly from src/
+
+DEFAULT_PATH = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                            "gpu_mon_qt", "static_info.json")
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+# Kernel module version: plain in sysfs, inside a banner line in procfs
+DRIVER_VERSION_PATHS = ("/sys/module/nvidia/version", "/proc/driver/nvidia/version")
+# One directory per GPU the driver has bound (named by PCI bus ID)
+PROC_GPUS_PATH = "/proc/driver/nvidia/gpus"
+_DRIVER_BANNER = re.compile(r"Kernel Module\s+(?:for \S+\s+)?(\d+(?:\.\d+)+)")
+
+
+def _read_text(path):
+    try:
+        with open(path) as text_file:
+            return text_file.read().strip()
+    except OSError:
+        return None
+
+
+def driver_version(paths=None):
+    """Loaded Nvidia kernel module version (e.g. '570.86.16'), or None if unknown."""
+    for path in paths or DRIVER_VERSION_PATHS:
+        text = _read_text(path)
+        if not text:
+            continue
+        if re.fullmatch(r"\d+(?:\.\d+)+", text):
+            return text
+        match = _DRIVER_BANNER.search(text)
+        if match:
+            return match.group(1)
+    return None
+
+
+def gpu_count_hint(path=None):
+    """Number of GPUs the loaded driver knows, without spawning nvidia-smi; None if unknown."""
+    try:
+        return len(os.listdir(path or PROC_GPUS_PATH)) or None
+    except OSError:
+        return None
+
+
+def cache_key(boot_id_path=None, driver_paths=None):
+    """
+    Returns:
+        dict: {'driver', 'boot_id'}.
+        None: If either is unknown (no cache is used then).
+    """
+    key = {"driver": driver_version(driver_paths), "boot_id": _read_text(boot_id_path or BOOT_ID_PATH)}
+    return key if all(key.values()) else None
+
+
+def load(path=None, key=None):
+    """
+    Cached static info for the running driver and boot.
+
+    Args:
+        path (str): Cache file (default DEFAULT_PATH).
+        key (dict): Expected key (default cache_key()).
+
+    Returns:
+        list: Same shape as core.get_all_gpu_static_info().
+        None: No cache, a stale one, simulated devices, or an unknown key.
+    """
+    if core.has_device_source():
+        return None # Simulated GPUs: nothing to save, nothing to cache
+    key = key or cache_key()
+    if key is None:
+        return None
+    try:
+        with open(path or DEFAULT_PATH) as cache_file:
+            cached = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("key") != key:
+        return None
+    return cached.get("gpus") or None
+
+
+def store(infos, path=None, key=None):
+    """Saves infos (core.get_all_gpu_static_info() result) under the current key; errors are ignored."""
+    if not infos or core.has_device_source():
+        return
+    key = key or cache_key()
+    if key is None:
+        return
+    path = path or DEFAULT_PATH
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(prefix=".static_info-", dir=directory)
+        try:
+            with os.fdopen(handle, "w") as cache_file:
+                json.dump({"key": key, "gpus": infos}, cache_file)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+    except OSError:
+        pass # A read-only home only costs the next start the nvidia-smi run
+
+
+def fetch_and_store(path=None):
+    """Queries the static info (one nvidia-smi run) and caches it. Returns the info, or None on error."""
+    infos = core.get_all_gpu_static_info()
+    if infos:
+        store(infos, path)
+    return infos
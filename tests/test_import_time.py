@@ -0,0 +1,31 @@
+# tests/test_import_time.py
+"""
+Import-time budget of the headless entry points (see benchmarks/import_time.py):
+'import src.cli' and 'import src.core' must not load Qt or NumPy and must stay
+within BUDGET_MS cumulative time under python -X importtime.
+"""
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.import_time import CHECKED_MODULES, FORBIDDEN_PREFIXES, measure # noqa: E402
+
+BUDGET_MS = 50.0
+# Best of several fresh interpreters, so one slow run on a busy machine does not fail the test
+RUNS = 5
+
+
+@pytest.mark.parametrize("module", CHECKED_MODULES)
+def test_no_gui_or_array_imports(module):
+    _cumulative, imported = measure(module)
+    assert not sorted(name for name in imported if name.startswith(FORBIDDEN_PREFIXES))
+
+
+@pytest.mark.parametrize("module", CHECKED_MODULES)
+def test_import_time_budget(module):
+    best_us = min(measure(module)[0] for _ in range(RUNS))
+    assert best_us / 1000.0 <= BUDGET_MS, f"import {module} took {best_us / 1000.0:.1f} ms (budget {BUDGET_MS:.0f} ms)"